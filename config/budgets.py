@@ -0,0 +1,306 @@
+"""
+Per-endpoint query, HTTP and latency budgets for the API.
+
+``ENDPOINT_BUDGETS`` has one row per ``(url name, HTTP method)`` of the
+service_requests and service_orders routers, checked by
+``config.testing.EndpointBudgetMixin`` against the dataset built by
+``seed_budget_dataset``. A route without a row fails the tests, and so
+does a change that makes a route issue more queries or outbound calls
+than its row allows: raise a budget only together with the reason.
+
+``kwargs`` and ``data`` may name seeded objects as ``{placeholders}``,
+replaced by their primary key.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+
+# Rows per list: enough for a per-row query to show up in every budget
+SEED_ROWS = 20
+
+
+class EndpointBudget(NamedTuple):
+    queries: int
+    http: int = 0
+    ms: Optional[int] = None
+    status: int = 200
+    kwargs: Optional[dict] = None
+    data: Optional[object] = None
+
+
+def request_data(**overrides):
+    return {
+        'title': 'Backend developer',
+        'role_name': 'Developer',
+        'start_date': '2026-01-01',
+        'end_date': '2026-06-30',
+        'expected_man_days': 100,
+        'offer_deadline': '2025-12-15',
+        **overrides,
+    }
+
+
+def offer_data(**overrides):
+    return {
+        'service_request': '{service_request}',
+        'provider_id': 'supplier-new',
+        'provider_name': 'Supplier',
+        'specialist_id': 'specialist-new',
+        'specialist_name': 'Specialist',
+        'daily_rate': '500.00',
+        'total_cost': '50000.00',
+        **overrides,
+    }
+
+
+def extension_data():
+    return {
+        'service_order': '{order}',
+        'additional_man_days': 5,
+        'new_end_date': (date.today() + timedelta(days=60)).isoformat(),
+        'additional_cost': '2500.00',
+        'reason': 'More work',
+    }
+
+
+def substitution_data():
+    return {
+        'service_order': '{order}',
+        'initiated_by': 'PROJECT_MANAGER',
+        'outgoing_specialist_id': 'specialist-0',
+        'outgoing_specialist_name': 'Specialist',
+        'reason': 'OTHER',
+    }
+
+
+REQUEST = {'pk': '{service_request}'}
+OFFER = {'pk': '{offer}'}
+ORDER = {'pk': '{order}'}
+EXTENSION = {'pk': '{extension}'}
+SUBSTITUTION = {'pk': '{substitution}'}
+
+
+ENDPOINT_BUDGETS = {
+    # --- /api/requests/service-requests/ ---
+    ('service-requests-list', 'get'): EndpointBudget(queries=2, ms=500),
+    ('service-requests-list', 'post'): EndpointBudget(queries=2, status=202, data=request_data()),
+    ('service-requests-bulk-create', 'post'): EndpointBudget(
+        queries=7, http=10, status=201, data=[request_data(title=f'Request {i}') for i in range(10)],
+    ),
+    ('service-requests-detail', 'get'): EndpointBudget(queries=1, kwargs=REQUEST),
+    ('service-requests-detail', 'put'): EndpointBudget(queries=2, kwargs=REQUEST, data=request_data()),
+    ('service-requests-detail', 'patch'): EndpointBudget(queries=2, kwargs=REQUEST, data={'title': 'Renamed'}),
+    ('service-requests-process-status', 'get'): EndpointBudget(queries=2, kwargs=REQUEST),
+    ('service-requests-get-tasks', 'get'): EndpointBudget(queries=1, http=1, ms=500, data={'group': 'procurement'}),
+    ('service-requests-complete-task', 'post'): EndpointBudget(
+        queries=4, http=2, kwargs={'task_id': 'request-task-0'}, data={'decision': 'approved'},
+    ),
+    # 1 lookup, then a status save and a coalesced sync job per task
+    ('service-requests-complete-tasks-bulk', 'post'): EndpointBudget(
+        queries=16, http=10, data=[{'task_id': f'request-task-{i}', 'decision': 'approved'} for i in range(5)],
+    ),
+
+    # --- /api/requests/service-offers/ ---
+    ('service-offers-list', 'get'): EndpointBudget(queries=2, ms=500),
+    ('service-offers-list', 'post'): EndpointBudget(queries=3, http=2, data=offer_data(external_id='ext-new')),
+    # The batch's service requests, its existing offers, one insert
+    ('service-offers-bulk-create', 'post'): EndpointBudget(
+        queries=3, http=2, data=[offer_data(external_id=f'ext-new-{i}') for i in range(10)],
+    ),
+    ('service-offers-detail', 'get'): EndpointBudget(queries=1, kwargs=OFFER),
+    ('service-offers-detail', 'put'): EndpointBudget(queries=3, kwargs=OFFER, data=offer_data()),
+    ('service-offers-detail', 'patch'): EndpointBudget(queries=2, kwargs=OFFER, data={'notes': 'Checked'}),
+    # 60 seeded offer tasks: two inbox pages, each enriched with one query
+    ('service-offers-get-tasks', 'get'): EndpointBudget(queries=2, http=2, ms=500, data={'group': 'resourcePlanners'}),
+    ('service-offers-complete-task', 'post'): EndpointBudget(
+        queries=14, http=2, kwargs={'task_id': 'offer-task-0'}, data={'decision': 'final_approval'},
+    ),
+    # 1 lookup, then one decision transaction per completed task
+    ('service-offers-complete-tasks-bulk', 'post'): EndpointBudget(
+        queries=16, http=10, data=[{'task_id': f'offer-task-{i}', 'decision': 'reviewed'} for i in range(5)],
+    ),
+
+    # --- /api/orders/service-orders/ ---
+    ('service-orders-list', 'get'): EndpointBudget(queries=2, ms=500),
+    ('service-orders-list', 'post'): EndpointBudget(
+        queries=2, status=201, data={
+            'title': 'Backend developer',
+            'service_request_id': 'request-new',
+            'winning_offer_id': 'offer-new',
+            'supplier_id': 'supplier-0',
+            'supplier_name': 'Supplier',
+            'start_date': '2026-01-01',
+            'current_end_date': '2026-06-30',
+            'current_specialist_id': 'specialist-new',
+            'current_specialist_name': 'Specialist',
+            'role': 'Developer',
+            'current_man_days': 100,
+            'daily_rate': '500.00',
+            'current_contract_value': '50000.00',
+        },
+    ),
+    ('service-orders-detail', 'get'): EndpointBudget(queries=1, kwargs=ORDER),
+    ('service-orders-detail', 'put'): EndpointBudget(queries=2, kwargs=ORDER, data={'status': 'ACTIVE', 'notes': 'Checked'}),
+    ('service-orders-detail', 'patch'): EndpointBudget(queries=2, kwargs=ORDER, data={'notes': 'Checked'}),
+    # Cascades to extensions and substitutions (loaded, for their delete
+    # signals), then rebuilds the summary
+    ('service-orders-detail', 'delete'): EndpointBudget(queries=13, status=204, kwargs=ORDER),
+    ('service-orders-complete', 'post'): EndpointBudget(queries=3, kwargs=ORDER),
+    ('service-orders-extensions', 'get'): EndpointBudget(queries=2, kwargs=ORDER),
+    ('service-orders-substitutions', 'get'): EndpointBudget(queries=2, kwargs=ORDER),
+
+    # --- /api/orders/extensions/ ---
+    ('extensions-list', 'get'): EndpointBudget(queries=1, ms=500),
+    ('extensions-list', 'post'): EndpointBudget(queries=5, status=201, data=extension_data()),
+    ('extensions-detail', 'get'): EndpointBudget(queries=1, kwargs=EXTENSION),
+    ('extensions-detail', 'put'): EndpointBudget(queries=3, kwargs=EXTENSION, data=extension_data()),
+    ('extensions-detail', 'patch'): EndpointBudget(queries=2, kwargs=EXTENSION, data={'reason': 'Even more work'}),
+    ('extensions-detail', 'delete'): EndpointBudget(queries=3, status=204, kwargs=EXTENSION),
+    ('extensions-approve-extension', 'post'): EndpointBudget(
+        queries=5, kwargs=EXTENSION, data={'user_role': 'SUPPLIER_REP'},
+    ),
+    ('extensions-reject', 'post'): EndpointBudget(
+        queries=4, kwargs=EXTENSION, data={'user_role': 'SUPPLIER_REP', 'reason': 'Over budget'},
+    ),
+
+    # --- /api/orders/substitutions/ ---
+    ('substitutions-list', 'get'): EndpointBudget(queries=1, ms=500),
+    ('substitutions-list', 'post'): EndpointBudget(
+        queries=5, status=201, data={
+            **substitution_data(),
+            'incoming_specialist_id': 'specialist-new',
+            'incoming_specialist_name': 'New Specialist',
+            'incoming_specialist_daily_rate': '550.00',
+        },
+    ),
+    ('substitutions-initiate', 'post'): EndpointBudget(queries=5, status=201, data=substitution_data()),
+    ('substitutions-detail', 'get'): EndpointBudget(queries=1, kwargs=SUBSTITUTION),
+    ('substitutions-detail', 'put'): EndpointBudget(queries=3, kwargs=SUBSTITUTION, data=substitution_data()),
+    ('substitutions-detail', 'patch'): EndpointBudget(queries=2, kwargs=SUBSTITUTION, data={'reason': 'JOB_CHANGE'}),
+    ('substitutions-detail', 'delete'): EndpointBudget(queries=4, status=204, kwargs=SUBSTITUTION),
+    ('substitutions-approve-substitution', 'post'): EndpointBudget(
+        queries=5, kwargs=SUBSTITUTION, data={
+            'user_role': 'SUPPLIER_REP',
+            'incoming_specialist_id': 'specialist-new',
+            'incoming_specialist_name': 'New Specialist',
+            'incoming_specialist_daily_rate': '550.00',
+        },
+    ),
+    ('substitutions-reject', 'post'): EndpointBudget(
+        queries=5, kwargs=SUBSTITUTION, data={'user_role': 'PROJECT_MANAGER', 'reason': 'Not needed'},
+    ),
+
+    # --- /api/orders/suppliers/ ---
+    ('suppliers-summary', 'get'): EndpointBudget(queries=3, kwargs={'supplier_id': '{supplier}'}),
+}
+
+
+def flowable_task(task_id, name, group_variable, object_id):
+    return {
+        'id': task_id,
+        'name': name,
+        'processInstanceId': f'proc-{task_id}',
+        'createTime': '2026-01-01T00:00:00.000+00:00',
+        'assignee': None,
+        'variables': [{'name': group_variable, 'value': str(object_id)}],
+    }
+
+
+def seed_budget_dataset():
+    """
+    ``SEED_ROWS`` service requests with three offers each, and as many
+    service orders with an extension and a substitution each, over three
+    suppliers. Returns the objects the budget rows refer to and the
+    Flowable task inboxes (``{group: [task, ...]}``) that point at them.
+    """
+    from service_requests.models import ServiceRequest, ServiceOffer, ProjectRequest
+    from service_orders.models import ServiceOrder, ServiceOrderExtension, ServiceOrderSubstitution
+
+    today = date.today()
+    requests, offers, orders, extensions, substitutions = [], [], [], [], []
+
+    for i in range(SEED_ROWS):
+        service_request = ServiceRequest.objects.create(
+            title=f'Request {i}',
+            role_name='Developer',
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 6, 30),
+            expected_man_days=100,
+            offer_deadline=date(2025, 12, 15),
+            process_id=f'proc-{i}',
+        )
+        requests.append(service_request)
+
+        for j in range(3):
+            offers.append(ServiceOffer.objects.create(
+                service_request=service_request,
+                external_id=f'ext-{i}-{j}',
+                provider_id=f'supplier-{j}',
+                provider_name='Supplier',
+                specialist_id=f'specialist-{i}-{j}',
+                specialist_name='Specialist',
+                daily_rate=Decimal('500.00'),
+                total_cost=Decimal('50000.00'),
+            ))
+
+        order = ServiceOrder.objects.create(
+            title=f'Order {i}',
+            service_request_id=str(service_request.id),
+            winning_offer_id=f'offer-{i}',
+            supplier_id=f'supplier-{i % 3}',
+            supplier_name='Supplier',
+            start_date=today - timedelta(days=10),
+            original_end_date=today + timedelta(days=30),
+            current_end_date=today + timedelta(days=30),
+            current_specialist_id=f'specialist-{i}',
+            current_specialist_name='Specialist',
+            original_specialist_id=f'specialist-{i}',
+            original_specialist_name='Specialist',
+            role='Developer',
+            original_man_days=40,
+            current_man_days=40,
+            daily_rate=Decimal('500.00'),
+            original_contract_value=Decimal('20000.00'),
+            current_contract_value=Decimal('20000.00'),
+        )
+        orders.append(order)
+
+        extensions.append(ServiceOrderExtension.objects.create(
+            service_order=order,
+            additional_man_days=5,
+            new_end_date=today + timedelta(days=45),
+            additional_cost=Decimal('2500.00'),
+            reason='More work',
+        ))
+        substitutions.append(ServiceOrderSubstitution.objects.create(
+            service_order=order,
+            initiated_by='SUPPLIER_REPRESENTATIVE',
+            status='PENDING_CLIENT',
+            outgoing_specialist_id=f'specialist-{i}',
+            outgoing_specialist_name='Specialist',
+            reason='OTHER',
+        ))
+
+    ProjectRequest.objects.create(project_id='project-1', project_name='Project', specialist_id='')
+
+    tasks = {
+        'procurement': [
+            flowable_task(f'request-task-{i}', 'Internal Validation', 'request_id', service_request.id)
+            for i, service_request in enumerate(requests)
+        ],
+        'resourcePlanners': [
+            flowable_task(f'offer-task-{i}', 'Evaluate & Select Offer', 'offerId', offer.id)
+            for i, offer in enumerate(offers)
+        ],
+    }
+
+    objects = {
+        'service_request': requests[0],
+        'offer': offers[0],
+        'order': orders[0],
+        'extension': extensions[0],
+        'substitution': substitutions[0],
+        'supplier': orders[0].supplier_id,
+    }
+    return objects, tasks
@@ -0,0 +1,78 @@
+import hashlib
+from functools import reduce
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified validators for ``list`` and ``retrieve``.
+
+    A detail's validators come from its ``updated_at``. A list's come from
+    max(``updated_at``) and the row count of the filtered queryset, in one
+    aggregate query. Requests carrying a matching If-None-Match or
+    If-Modified-Since get a 304 before anything is serialized.
+
+    ``conditional_fields`` lists every updated_at the payload depends on,
+    e.g. a related object whose fields are inlined.
+    """
+    conditional_fields = ('updated_at',)
+
+    def get_etag_extra(self):
+        """
+        Anything besides the rows that changes the payload (e.g. the date
+        for date-relative fields)
+        """
+        return ''
+
+    def _etag(self, *parts):
+        parts = (self.__class__.__name__, self.request.get_full_path(), self.get_etag_extra(), *parts)
+        return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+    def _conditional(self, etag, last_modified, render):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(self.request, etag=quote_etag(etag), last_modified=timestamp)
+        if response is None:
+            response = render()
+
+        response['ETag'] = quote_etag(etag)
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Let clients keep the payload but always revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        stats = queryset.order_by().aggregate(
+            _rows=Count('*'),
+            **{f'_max_{i}': Max(field) for i, field in enumerate(self.conditional_fields)},
+        )
+        modified = [stats[f'_max_{i}'] for i in range(len(self.conditional_fields))]
+        last_modified = max((value for value in modified if value), default=None)
+
+        return self._conditional(
+            self._etag(stats['_rows'], *(value.isoformat() if value else '' for value in modified)),
+            last_modified,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        modified = [
+            reduce(lambda obj, attr: getattr(obj, attr, None), field.split('__'), instance)
+            for field in self.conditional_fields
+        ]
+        last_modified = max((value for value in modified if value), default=None)
+
+        return self._conditional(
+            self._etag(instance.pk, *(value.isoformat() if value else '' for value in modified)),
+            last_modified,
+            lambda: Response(self.get_serializer(instance).data),
+        )
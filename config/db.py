@@ -0,0 +1,35 @@
+"""
+Database helpers shared by the apps.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+
+# One writer at a time per process; waiting threads queue on the lock
+_writer = threading.RLock()
+
+
+@contextmanager
+def serialized_writes():
+    with _writer:
+        yield
+
+
+@contextmanager
+def write_transaction(using=None):
+    """
+    ``transaction.atomic()`` for blocks that write.
+
+    With SQLITE_SERIALIZE_WRITES on, the block first waits for this
+    process's writer slot, so concurrent requests queue in Python instead of
+    contending for SQLite's file lock. Nested blocks re-enter the slot.
+    """
+    if settings.SQLITE_SERIALIZE_WRITES:
+        with serialized_writes(), transaction.atomic(using=using):
+            yield
+    else:
+        with transaction.atomic(using=using):
+            yield
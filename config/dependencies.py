@@ -0,0 +1,300 @@
+"""
+Circuit breakers and bulkheads for outbound dependencies (Flowable, the
+partner API).
+
+Every call to a dependency goes through ``get_dependency(name).call()`` (or
+``acall()`` on the event loop):
+
+- The circuit breaker keeps the outcomes of the last ``window`` calls. Once
+  at least ``min_calls`` are known and ``failure_ratio`` of them failed
+  (an exception, a 5xx, or slower than ``slow_call_seconds``), the circuit
+  opens and calls fail at once with CircuitOpen. After ``reset_timeout``
+  seconds one trial call is let through; its outcome closes the circuit or
+  opens it again.
+- The bulkhead caps the calls in flight at ``max_concurrent``, so a slow
+  dependency can tie up only that many worker threads. A call waits up to
+  ``max_wait`` seconds for a slot, then fails with BulkheadFull. Async
+  calls (``acall()``) hold no thread while they wait, and get a bulkhead of
+  their own per event loop: ``max_concurrent_async`` slots, waited for up to
+  ``max_wait_async`` seconds (both default to the sync values).
+
+Both raise DependencyUnavailable subclasses, which are deliberately not
+``requests``/``httpx`` errors: callers that retry later (the outbox and
+sync workers) treat them like any failure, and the inbox views fall back
+to a stale cached inbox. State is per worker process, configured by
+``settings.DEPENDENCY_LIMITS``.
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from types import SimpleNamespace
+
+from django.conf import settings
+
+from config import metrics
+
+
+class DependencyUnavailable(Exception):
+
+    reason = None
+
+    def __init__(self, dependency):
+        self.dependency = dependency
+        super().__init__(f'{dependency} unavailable: {self.reason.replace("_", " ")}')
+
+
+class CircuitOpen(DependencyUnavailable):
+    reason = 'circuit_open'
+
+
+class BulkheadFull(DependencyUnavailable):
+    reason = 'bulkhead_full'
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, *, window, min_calls, failure_ratio, reset_timeout):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raise CircuitOpen unless a call may go through now
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpen(self.name)
+                self.state = self.HALF_OPEN
+
+            if self.state == self.HALF_OPEN:
+                # One trial call at a time
+                if self._trial:
+                    raise CircuitOpen(self.name)
+                self._trial = True
+
+    def cancel(self):
+        """
+        A call let through by before_call() was not made after all
+        """
+        with self._lock:
+            self._trial = False
+
+    def record(self, failed):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append(failed)
+            if (
+                self.state == self.CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) >= self.failure_ratio * len(self._outcomes)
+            ):
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+
+class Bulkhead:
+
+    def __init__(self, name, *, max_concurrent, max_wait):
+        self.name = name
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def acquire(self):
+        if self.max_wait:
+            acquired = self._slots.acquire(timeout=self.max_wait)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise BulkheadFull(self.name)
+
+    def release(self):
+        self._slots.release()
+
+
+class AsyncBulkhead:
+    """
+    Bulkhead for coroutines: one semaphore per event loop (asyncio
+    primitives cannot be shared between loops)
+    """
+
+    def __init__(self, name, *, max_concurrent, max_wait):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._slots = weakref.WeakKeyDictionary()
+
+    def _loop_slots(self):
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.BoundedSemaphore(self.max_concurrent)
+        return slots
+
+    async def acquire(self):
+        slots = self._loop_slots()
+        if not slots.locked():
+            # A free slot is taken without suspending
+            await slots.acquire()
+            return
+        if not self.max_wait:
+            raise BulkheadFull(self.name)
+        try:
+            await asyncio.wait_for(slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            raise BulkheadFull(self.name) from None
+
+    def release(self):
+        self._loop_slots().release()
+
+
+class Dependency:
+
+    def __init__(self, name, *, max_concurrent, max_wait, window, min_calls, failure_ratio,
+                 slow_call_seconds, reset_timeout, max_concurrent_async=None, max_wait_async=None):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.breaker = CircuitBreaker(
+            name, window=window, min_calls=min_calls, failure_ratio=failure_ratio, reset_timeout=reset_timeout,
+        )
+        self.bulkhead = Bulkhead(name, max_concurrent=max_concurrent, max_wait=max_wait)
+        self.async_bulkhead = AsyncBulkhead(
+            name,
+            max_concurrent=max_concurrent_async or max_concurrent,
+            max_wait=max_wait if max_wait_async is None else max_wait_async,
+        )
+
+    def _admit(self):
+        try:
+            self.breaker.before_call()
+        except CircuitOpen as e:
+            metrics.DEPENDENCY_REJECTIONS.inc(dependency=self.name, reason=e.reason)
+            raise
+
+    def _turned_away(self, e):
+        # Let through by the breaker, but no bulkhead slot
+        self.breaker.cancel()
+        if isinstance(e, BulkheadFull):
+            metrics.DEPENDENCY_REJECTIONS.inc(dependency=self.name, reason=e.reason)
+
+    @contextmanager
+    def _observe(self):
+        call = SimpleNamespace(status_code=None)
+        started = time.monotonic()
+        try:
+            yield call
+        except Exception:
+            self.breaker.record(failed=True)
+            raise
+        except BaseException:
+            # Cancelled or interrupted: the dependency told us nothing, but a
+            # half-open trial must not stay claimed
+            self.breaker.cancel()
+            raise
+        else:
+            slow = self.slow_call_seconds and time.monotonic() - started > self.slow_call_seconds
+            self.breaker.record(failed=bool(slow) or (call.status_code or 0) >= 500)
+
+    @contextmanager
+    def call(self):
+        """
+        Guard one call. Set ``.status_code`` on the yielded object so 5xx
+        responses count as failures.
+        """
+        self._admit()
+        try:
+            self.bulkhead.acquire()
+        except BulkheadFull as e:
+            self._turned_away(e)
+            raise
+
+        try:
+            with self._observe() as call:
+                yield call
+        finally:
+            self.bulkhead.release()
+
+    @asynccontextmanager
+    async def acall(self):
+        """
+        ``call()`` for coroutines: waits for a slot without blocking the
+        event loop
+        """
+        self._admit()
+        try:
+            await self.async_bulkhead.acquire()
+        except BaseException as e:
+            self._turned_away(e)
+            raise
+
+        try:
+            with self._observe() as call:
+                yield call
+        finally:
+            self.async_bulkhead.release()
+
+
+_dependencies = {}
+_dependencies_lock = threading.Lock()
+
+
+def get_dependency(name):
+    """
+    This process's Dependency for ``name``, built from DEPENDENCY_LIMITS
+    """
+    dependency = _dependencies.get(name)
+    if dependency is None:
+        with _dependencies_lock:
+            dependency = _dependencies.get(name)
+            if dependency is None:
+                dependency = _dependencies[name] = Dependency(name, **settings.DEPENDENCY_LIMITS[name])
+    return dependency
+
+
+def reset_dependencies():
+    """
+    Forget every breaker and bulkhead (they are rebuilt from settings)
+    """
+    with _dependencies_lock:
+        _dependencies.clear()
+
+
+def _reset_after_fork():
+    global _dependencies_lock
+
+    _dependencies.clear()
+    _dependencies_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def circuit_states():
+    return {name: dependency.breaker.state for name, dependency in list(_dependencies.items())}
@@ -0,0 +1,567 @@
+"""
+Prometheus-style metrics for the API, Flowable and outbound calls.
+
+Metrics live in process memory. Each thread records into its own shard, so
+recording takes no lock; a scrape sums the shards, folding those of exited
+threads into one retired shard as it goes.
+
+With METRICS_MULTIPROC_DIR set, every process (web workers and the outbox
+and sync workers alike) writes its totals to
+``<dir>/metrics-<pid>-<start ms>.json`` every METRICS_FLUSH_INTERVAL seconds
+and at exit, and ``/metrics`` merges the files: counters and histograms over
+every process that ever wrote one (exited ones folded into
+``metrics-retired.json``), gauges over live processes only. Without it, ``/metrics`` reports the
+process that serves the scrape.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REGISTRY = []
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._reset()
+        REGISTRY.append(self)
+
+    def _reset(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+            _ensure_flusher()
+            return shard
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _merge(self, totals, values):
+        for key, value in values.items():
+            totals[key] = totals.get(key, 0) + value
+
+    def collect(self):
+        """
+        ``{label values: value}`` summed over every thread
+        """
+        with self._lock:
+            live = []
+            for ref, shard in self._shards:
+                thread = ref()
+                if thread is None or not thread.is_alive():
+                    self._merge(self._retired, shard.copy())
+                else:
+                    live.append((ref, shard))
+            self._shards = live
+
+            totals = {}
+            self._merge(totals, self._retired)
+            for _, shard in live:
+                self._merge(totals, shard.copy())
+        return totals
+
+    def samples(self, totals):
+        for key, value in sorted(totals.items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A gauge moved with inc()/dec(), or read from ``function`` (returning
+    ``{label values: value}``) when collected
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def inc(self, amount=1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def collect(self):
+        if self.function is not None:
+            return dict(self.function())
+        return super().collect()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        # One slot per bucket, one for +Inf, then the sum
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _merge(self, totals, values):
+        for key, counts in values.items():
+            total = totals.get(key)
+            totals[key] = list(counts) if total is None else [a + b for a, b in zip(total, counts)]
+
+    def samples(self, totals):
+        for key, counts in sorted(totals.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', {**labels, 'le': str(bound)}, cumulative
+            yield f'{self.name}_sum', labels, counts[-1]
+            yield f'{self.name}_count', labels, cumulative
+
+
+def _client_pools():
+    # Imported here: flowable_client imports this module
+    from flowable_client import _async_clients, _client
+
+    pools = {}
+    if _client is not None:
+        pools[('sync',)] = settings.FLOWABLE_POOL_SIZE
+    if _async_clients:
+        pools[('async',)] = settings.FLOWABLE_POOL_SIZE * len(_async_clients)
+    return pools
+
+
+def _open_circuits():
+    # Imported here: config.dependencies imports this module
+    from config.dependencies import CircuitBreaker, circuit_states
+
+    return {(name,): int(state != CircuitBreaker.CLOSED) for name, state in circuit_states().items()}
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'API request latency by route and view action.',
+    ('method', 'route', 'action', 'status'),
+)
+FLOWABLE_LATENCY = Histogram(
+    'flowable_request_duration_seconds',
+    'Flowable REST call latency by operation.',
+    ('operation',),
+)
+FLOWABLE_ERRORS = Counter(
+    'flowable_request_errors_total',
+    'Flowable REST calls that failed, by operation and HTTP status or exception.',
+    ('operation', 'reason'),
+)
+FLOWABLE_IN_FLIGHT = Gauge(
+    'flowable_pool_connections_in_use',
+    'Flowable calls holding a pooled connection.',
+    ('client',),
+)
+FLOWABLE_POOL_SIZE = Gauge(
+    'flowable_pool_connections_max',
+    'Flowable connection pool capacity.',
+    ('client',),
+    function=_client_pools,
+)
+PARTNER_LATENCY = Histogram(
+    'partner_push_duration_seconds',
+    'Third-party (partner) API push latency by host.',
+    ('host',),
+)
+PARTNER_ERRORS = Counter(
+    'partner_push_errors_total',
+    'Third-party (partner) API pushes that failed, by host and HTTP status or exception.',
+    ('host', 'reason'),
+)
+PARTNER_IN_FLIGHT = Gauge(
+    'partner_push_in_flight',
+    'Third-party (partner) API pushes in progress, by host.',
+    ('host',),
+)
+INBOX_CACHE_LOOKUPS = Counter(
+    'inbox_cache_lookups_total',
+    'Task inbox cache lookups by candidate group and outcome (hit or miss).',
+    ('group', 'outcome'),
+)
+INBOX_STALE_RESPONSES = Counter(
+    'inbox_stale_responses_total',
+    'Task inboxes served from the stale copy while Flowable was unavailable, by group.',
+    ('group',),
+)
+DEPENDENCY_REJECTIONS = Counter(
+    'dependency_rejections_total',
+    'Outbound calls refused without being made, by dependency and reason (circuit_open or bulkhead_full).',
+    ('dependency', 'reason'),
+)
+DEPENDENCY_CIRCUIT_OPEN = Gauge(
+    'dependency_circuit_open',
+    'Worker processes whose circuit for the dependency is open or half-open.',
+    ('dependency',),
+    function=_open_circuits,
+)
+
+
+@contextmanager
+def _observe_call(latency, errors, in_flight, slot, **labels):
+    """
+    Time an outbound call; set ``.status_code`` on the yielded object so
+    HTTP error responses are counted as errors too
+    """
+    call = SimpleNamespace(status_code=None)
+    in_flight.inc(**slot)
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        errors.inc(reason=type(e).__name__, **labels)
+        raise
+    else:
+        if call.status_code is not None and call.status_code >= 400:
+            errors.inc(reason=str(call.status_code), **labels)
+    finally:
+        in_flight.dec(**slot)
+        latency.observe(time.perf_counter() - started, **labels)
+
+
+def flowable_call(operation, client):
+    return _observe_call(FLOWABLE_LATENCY, FLOWABLE_ERRORS, FLOWABLE_IN_FLIGHT, {'client': client}, operation=operation)
+
+
+def partner_call(host):
+    return _observe_call(PARTNER_LATENCY, PARTNER_ERRORS, PARTNER_IN_FLIGHT, {'host': host}, host=host)
+
+
+# ---- Multi-process -------------------------------------------------------
+#
+# Each process writes metrics-<pid>-<start ms>.json and holds an exclusive
+# lock on the matching .lock file while it lives; a reused PID gets a file
+# of its own. A snapshot whose lock can be taken belongs to a process that
+# has exited: the next scrape (or the process itself, at exit) folds its
+# counters and histograms into metrics-retired.json and deletes it, so
+# totals never go down and the directory does not fill up.
+
+RETIRED = 'metrics-retired.json'
+
+_process_key = f'{os.getpid()}-{int(time.time() * 1000)}'
+_process_lock = None
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _path(name):
+    return os.path.join(settings.METRICS_MULTIPROC_DIR, name)
+
+
+def _snapshot_path(key):
+    return _path(f'metrics-{key}.json')
+
+
+def _write_json(path, data):
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _try_lock(path):
+    """
+    An open file holding an exclusive lock on ``path``, or None when
+    another open file holds it
+    """
+    f = open(path, 'a')
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+def flush():
+    """
+    Write this process's totals for the other processes' scrapes
+    """
+    global _process_lock
+
+    if not settings.METRICS_MULTIPROC_DIR:
+        return
+
+    lock_path = _path(f'metrics-{_process_key}.lock')
+    if _process_lock is None or _process_lock.name != lock_path:
+        if _process_lock is not None:
+            _process_lock.close()
+        _process_lock = _try_lock(lock_path)
+
+    _write_json(_snapshot_path(_process_key), {
+        metric.name: [[list(key), value] for key, value in metric.collect().items()]
+        for metric in REGISTRY
+    })
+
+
+@contextmanager
+def _directory_locked(operation):
+    with open(_path('metrics.lock'), 'a') as f:
+        fcntl.flock(f, operation)
+        yield
+
+
+def _snapshot_keys():
+    return {
+        os.path.basename(path)[len('metrics-'):-len('.json')]: path
+        for path in glob.glob(_snapshot_path('*-*'))
+    }
+
+
+def _retire_exited(skip):
+    """
+    Fold the snapshots of exited processes (all but ``skip``) into the
+    retired totals, and delete them
+    """
+    snapshots = _snapshot_keys()
+    exited = {}
+    for key, path in snapshots.items():
+        if key == skip:
+            continue
+        owner_lock = _try_lock(_path(f'metrics-{key}.lock'))
+        if owner_lock is not None:
+            exited[key] = (path, owner_lock)
+    if not exited:
+        return
+
+    with _directory_locked(fcntl.LOCK_EX):
+        retired = _read_json(_path(RETIRED)) or {'merged': [], 'metrics': {}}
+        # Keys folded in by a retirement that stopped before deleting them
+        merged = set(retired['merged']) & set(snapshots)
+
+        for key, (path, _) in exited.items():
+            snapshot = key not in merged and _read_json(path)
+            if not snapshot:
+                continue
+            for metric in REGISTRY:
+                if metric.type == 'gauge':
+                    continue
+                totals = {tuple(k): v for k, v in retired['metrics'].get(metric.name, [])}
+                metric._merge(totals, {tuple(k): v for k, v in snapshot.get(metric.name, [])})
+                retired['metrics'][metric.name] = [[list(k), v] for k, v in totals.items()]
+            merged.add(key)
+
+        retired['merged'] = sorted(merged)
+        _write_json(_path(RETIRED), retired)
+
+        for key, (path, owner_lock) in exited.items():
+            for name in (path, _path(f'metrics-{key}.lock')):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+            owner_lock.close()
+
+
+def _flush_forever():
+    while True:
+        time.sleep(settings.METRICS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def _exit():
+    global _process_lock
+
+    if not settings.METRICS_MULTIPROC_DIR:
+        return
+
+    flush()
+    if _process_lock is not None:
+        # Give up the lock so this process's snapshot is retired right away
+        _process_lock.close()
+        _process_lock = None
+        _retire_exited(skip=None)
+
+
+def _ensure_flusher():
+    global _flusher_pid
+
+    if _flusher_pid == os.getpid() or not settings.METRICS_MULTIPROC_DIR:
+        return
+
+    with _flusher_lock:
+        if _flusher_pid != os.getpid():
+            _flusher_pid = os.getpid()
+            threading.Thread(target=_flush_forever, name='metrics-flush', daemon=True).start()
+            atexit.register(_exit)
+
+
+def _reset_after_fork():
+    # A forked worker starts from zero rather than re-reporting the parent's
+    # totals, under a key (and lock) of its own
+    global _process_key, _process_lock, _flusher_pid, _flusher_lock
+
+    if _process_lock is not None:
+        _process_lock.close()
+    _process_key = f'{os.getpid()}-{int(time.time() * 1000)}'
+    _process_lock = None
+    _flusher_pid = None
+    _flusher_lock = threading.Lock()
+    for metric in REGISTRY:
+        metric._reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def collect():
+    """
+    ``{metric name: {label values: value}}`` for every process
+    """
+    totals = {metric.name: metric.collect() for metric in REGISTRY}
+    if not settings.METRICS_MULTIPROC_DIR:
+        return totals
+
+    _retire_exited(skip=_process_key)
+
+    with _directory_locked(fcntl.LOCK_SH):
+        retired = _read_json(_path(RETIRED)) or {'merged': [], 'metrics': {}}
+        snapshots = [(retired['metrics'], False)]
+        for key, path in _snapshot_keys().items():
+            # Retired but not deleted yet: already in the retired totals
+            if key == _process_key or key in retired['merged']:
+                continue
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                snapshots.append((snapshot, True))
+
+    for snapshot, live in snapshots:
+        for metric in REGISTRY:
+            if metric.type == 'gauge' and not live:
+                continue
+            metric._merge(totals[metric.name], {
+                tuple(key): value for key, value in snapshot.get(metric.name, [])
+            })
+    return totals
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def render():
+    """
+    Every metric in the Prometheus text exposition format
+    """
+    totals = collect()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for name, labels, value in metric.samples(totals[metric.name]):
+            label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_MULTIPROC_DIR:
+        flush()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+def _request_labels(request, response):
+    match = getattr(request, 'resolver_match', None)
+    actions = getattr(match.func, 'actions', None) if match else None
+    return {
+        'method': request.method,
+        # Unmatched paths share one label instead of one series each
+        'route': match.route if match else '<unmatched>',
+        'action': actions.get(request.method.lower(), '') if actions else '',
+        'status': response.status_code,
+    }
+
+
+@sync_and_async_middleware
+def MetricsMiddleware(get_response):
+    """
+    Observe every request in ``http_request_duration_seconds``
+    """
+    if not settings.METRICS_ENABLED:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            REQUEST_LATENCY.observe(time.perf_counter() - started, **_request_labels(request, response))
+            return response
+
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            response = get_response(request)
+            REQUEST_LATENCY.observe(time.perf_counter() - started, **_request_labels(request, response))
+            return response
+
+    return middleware
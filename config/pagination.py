@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Default list pagination: keyset on (created_at, id), newest first.
+
+    Pages are fetched with `created_at < <cursor>` range scans on the
+    (created_at, id) index, so deep pages cost the same as the first one,
+    and no COUNT(*) is ever issued. `id` breaks ties between rows created
+    in the same instant.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -40,6 +40,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so their totals cover every other middleware
+    'config.metrics.MetricsMiddleware',
+    'config.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -72,10 +75,43 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 
+# SQLite connection tuning, applied as PRAGMAs on every new connection
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB rather than pages
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+}
+
+# Take the write lock at BEGIN so busy_timeout applies, instead of failing
+# on a read-to-write lock upgrade
+SQLITE_TRANSACTION_MODE = os.getenv("SQLITE_TRANSACTION_MODE", "IMMEDIATE") or None
+
+# Queue config.db.write_transaction() blocks behind one writer per process
+SQLITE_SERIALIZE_WRITES = os.getenv("SQLITE_SERIALIZE_WRITES", "False") == "True"
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f"PRAGMA {name}={value}" for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': SQLITE_TRANSACTION_MODE,
+            'timeout': SQLITE_PRAGMAS["busy_timeout"] / 1000,
+        },
+    }
+}
+
+
+# Cached Flowable lookups must be visible to every worker and to the outbox
+# worker that invalidates them, so deployments point this at a shared
+# backend (e.g. FileBasedCache on the shared volume, or RedisCache)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("DJANGO_CACHE_LOCATION", ""),
     }
 }
 
@@ -130,7 +166,39 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         'rest_framework.filters.SearchFilter', 
         'rest_framework.filters.OrderingFilter',
-    ]
+    ],
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.CreatedAtCursorPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "config.timing.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# Per-request DB/Flowable/partner/serialization breakdown in a Server-Timing
+# header (config/timing.py). Set REQUEST_TIMING_LOG_LEVEL=INFO to also log
+# one "config.timing" record per request
+REQUEST_TIMING = os.getenv("REQUEST_TIMING", "True") == "True"
+REQUEST_TIMING_LOG_LEVEL = os.getenv("REQUEST_TIMING_LOG_LEVEL", "WARNING")
+
+# Prometheus-style /metrics (config/metrics.py). With several worker
+# processes, point METRICS_MULTIPROC_DIR at a directory they all share
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "config.timing": {
+            "handlers": ["console"],
+            "level": REQUEST_TIMING_LOG_LEVEL,
+            "propagate": False,
+        },
+    },
 }
 
 
@@ -144,9 +212,96 @@ FLOWABLE_AUTH = (
     FLOWABLE_REST_PASSWORD,
 )
 
+# Shared FlowableClient connection pool (per worker process)
+FLOWABLE_POOL_SIZE = int(os.getenv("FLOWABLE_POOL_SIZE", "10"))
+FLOWABLE_MAX_RETRIES = int(os.getenv("FLOWABLE_MAX_RETRIES", "3"))
+FLOWABLE_RETRY_BACKOFF = float(os.getenv("FLOWABLE_RETRY_BACKOFF", "0.3"))
+FLOWABLE_CONNECT_TIMEOUT = float(os.getenv("FLOWABLE_CONNECT_TIMEOUT", "3"))
+
+# Read timeouts in seconds, per Flowable operation
+FLOWABLE_TIMEOUTS = {
+    "start_process": float(os.getenv("FLOWABLE_TIMEOUT_START_PROCESS", "10")),
+    "list_tasks": float(os.getenv("FLOWABLE_TIMEOUT_LIST_TASKS", "10")),
+    "get_task_variables": float(os.getenv("FLOWABLE_TIMEOUT_GET_TASK_VARIABLES", "5")),
+    "complete_task": float(os.getenv("FLOWABLE_TIMEOUT_COMPLETE_TASK", "10")),
+    "list_executions": float(os.getenv("FLOWABLE_TIMEOUT_LIST_EXECUTIONS", "5")),
+    "trigger_message": float(os.getenv("FLOWABLE_TIMEOUT_TRIGGER_MESSAGE", "10")),
+}
+
+# Flowable /runtime/tasks paging when reading a whole group inbox
+FLOWABLE_TASK_PAGE_SIZE = int(os.getenv("FLOWABLE_TASK_PAGE_SIZE", "100"))
+FLOWABLE_PAGE_CONCURRENCY = int(os.getenv("FLOWABLE_PAGE_CONCURRENCY", "4"))
+
+# Seconds to serve a group's task inbox from cache (0 disables); any
+# workflow write invalidates every cached inbox immediately
+FLOWABLE_INBOX_CACHE_TTL = int(os.getenv("FLOWABLE_INBOX_CACHE_TTL", "15"))
+
+# Candidate groups in ServiceRequestProcess.bpmn20.xml
+FLOWABLE_TASK_GROUPS = os.getenv(
+    "FLOWABLE_TASK_GROUPS", "procurement,suppliers,resourcePlanners,projectManager"
+).split(",")
+
+# Seconds to remember which execution waits at the offer message event
+FLOWABLE_EXECUTION_CACHE_TTL = int(os.getenv("FLOWABLE_EXECUTION_CACHE_TTL", "300"))
+
+# Answer Flowable calls from the in-process fake (fake_flowable.py) instead
+# of FLOWABLE_BASE_URL, with optional injected latency and failures
+FLOWABLE_FAKE = os.getenv("FLOWABLE_FAKE", "False") == "True"
+FLOWABLE_FAKE_LATENCY_MS = float(os.getenv("FLOWABLE_FAKE_LATENCY_MS", "0"))
+FLOWABLE_FAKE_JITTER_MS = float(os.getenv("FLOWABLE_FAKE_JITTER_MS", "0"))
+FLOWABLE_FAKE_ERROR_RATE = float(os.getenv("FLOWABLE_FAKE_ERROR_RATE", "0"))
+FLOWABLE_FAKE_SEED = int(os.getenv("FLOWABLE_FAKE_SEED")) if os.getenv("FLOWABLE_FAKE_SEED") else None
+
+# Route the task inbox endpoints to the native async views (run under ASGI)
+ASYNC_TASK_VIEWS = os.getenv("ASYNC_TASK_VIEWS", "False") == "True"
+
+# Upper bound on POST /api/requests/service-requests/bulk/ items
+SERVICE_REQUEST_BULK_MAX = int(os.getenv("SERVICE_REQUEST_BULK_MAX", "500"))
+
+# Upper bound on POST /api/requests/service-offers/bulk/ items
+SERVICE_OFFER_BULK_MAX = int(os.getenv("SERVICE_OFFER_BULK_MAX", "500"))
+
+# Upper bound on tasks per POST .../tasks/complete-bulk/ call
+TASK_COMPLETE_BULK_MAX = int(os.getenv("TASK_COMPLETE_BULK_MAX", "200"))
+
 DJANGO_BASE_URL = os.environ.get('DJANGO_BASE_URL', 'http://django:8000')
 
 THIRD_PARTY_API_BASE = os.getenv('THIRD_PARTY_API_BASE')
+THIRD_PARTY_API_TIMEOUT = float(os.getenv('THIRD_PARTY_API_TIMEOUT', '10'))
+THIRD_PARTY_MAX_CONCURRENCY_PER_HOST = int(os.getenv('THIRD_PARTY_MAX_CONCURRENCY_PER_HOST', '4'))
+
+# Per-process circuit breaker and bulkhead for each outbound dependency
+# (config/dependencies.py). A circuit opens once failure_ratio of the last
+# window calls (at least min_calls) failed or took over slow_call_seconds,
+# and lets a trial call through after reset_timeout seconds. At most
+# max_concurrent calls are in flight; others wait max_wait seconds, then fail.
+DEPENDENCY_LIMITS = {
+    "flowable": {
+        "max_concurrent": int(os.getenv("FLOWABLE_BULKHEAD", str(FLOWABLE_POOL_SIZE))),
+        "max_wait": float(os.getenv("FLOWABLE_BULKHEAD_WAIT", "1")),
+        # The async inbox views wait on the event loop, not on a thread
+        "max_concurrent_async": int(os.getenv("FLOWABLE_ASYNC_BULKHEAD", "100")),
+        "max_wait_async": float(os.getenv("FLOWABLE_ASYNC_BULKHEAD_WAIT", "5")),
+        "window": int(os.getenv("FLOWABLE_BREAKER_WINDOW", "20")),
+        "min_calls": int(os.getenv("FLOWABLE_BREAKER_MIN_CALLS", "10")),
+        "failure_ratio": float(os.getenv("FLOWABLE_BREAKER_FAILURE_RATIO", "0.5")),
+        "slow_call_seconds": float(os.getenv("FLOWABLE_BREAKER_SLOW_CALL_SECONDS", "5")),
+        "reset_timeout": float(os.getenv("FLOWABLE_BREAKER_RESET_SECONDS", "30")),
+    },
+    "partner": {
+        "max_concurrent": int(os.getenv("PARTNER_BULKHEAD", "8")),
+        "max_wait": float(os.getenv("PARTNER_BULKHEAD_WAIT", "1")),
+        "window": int(os.getenv("PARTNER_BREAKER_WINDOW", "20")),
+        "min_calls": int(os.getenv("PARTNER_BREAKER_MIN_CALLS", "10")),
+        "failure_ratio": float(os.getenv("PARTNER_BREAKER_FAILURE_RATIO", "0.5")),
+        "slow_call_seconds": float(os.getenv("PARTNER_BREAKER_SLOW_CALL_SECONDS", "5")),
+        "reset_timeout": float(os.getenv("PARTNER_BREAKER_RESET_SECONDS", "60")),
+    },
+}
+
+# Seconds to keep the last good copy of each cached task inbox, served
+# (marked stale) while Flowable's circuit is open; 0 disables
+FLOWABLE_INBOX_STALE_TTL = int(os.getenv("FLOWABLE_INBOX_STALE_TTL", "3600"))
 
 
 # Add CSRF_TRUSTED_ORIGINS
@@ -0,0 +1,247 @@
+"""
+Shared test helpers.
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from config.budgets import ENDPOINT_BUDGETS, seed_budget_dataset
+
+
+# `SCAN <table>` without `USING [COVERING] INDEX` is a full table scan
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+TEMP_BTREE = 'USE TEMP B-TREE'
+
+
+def explain_query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class QueryPlanAssertionsMixin:
+    """
+    Run a request, EXPLAIN every SELECT it issued and fail on full table
+    scans or temp B-tree sorts (SQLite).
+    """
+
+    def assertIndexedPlans(self, method, *args, allow_scans=(), **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = method(*args, **kwargs)
+
+        self.assertLess(response.status_code, 400, response.content)
+
+        selects = [query['sql'] for query in queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, 'request issued no SELECT')
+
+        for sql in selects:
+            plan = explain_query_plan(sql)
+            for step in plan:
+                full_scan = FULL_SCAN.match(step)
+                if full_scan and full_scan.group(1) not in allow_scans:
+                    self.fail(f'Full table scan of {full_scan.group(1)}:\n{sql}\n' + '\n'.join(plan))
+                if TEMP_BTREE in step:
+                    self.fail(f'Temp B-tree sort:\n{sql}\n' + '\n'.join(plan))
+
+        return response
+
+
+# Transaction control the ORM issues around atomic blocks; not real work
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def counted_queries(queries):
+    """
+    SQL of the captured statements, minus transaction control
+    """
+    return [
+        query['sql'] for query in queries
+        if not query['sql'].lstrip().upper().startswith(TRANSACTION_CONTROL)
+    ]
+
+
+class OutboundHTTPStub:
+    """
+    Answer every HTTP request made through ``requests`` in-process and
+    record it, so API tests never reach Flowable or the partner API.
+
+    Flowable calls are answered from ``tasks`` (``{group: [task, ...]}`` in
+    Flowable's REST shape); any other host gets an empty 200.
+    """
+
+    def __init__(self, tasks=None):
+        self.tasks = tasks or {}
+        self.variables = {
+            task['id']: task.get('variables', [])
+            for group_tasks in self.tasks.values()
+            for task in group_tasks
+        }
+        self.calls = []
+        self._lock = threading.Lock()
+        self._process_ids = itertools.count(1)
+
+    def __enter__(self):
+        stub = self
+
+        def send(session, request, **kwargs):
+            return stub.respond(request)
+
+        self._patcher = mock.patch.object(requests.Session, 'send', send)
+        self._patcher.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._patcher.stop()
+
+    def respond(self, request):
+        with self._lock:
+            self.calls.append((request.method, request.url))
+
+        base_url = settings.FLOWABLE_BASE_URL.rstrip('/')
+        if request.url.startswith(base_url):
+            url = urlsplit(request.url[len(base_url):])
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status_code, body = self.flowable(request.method, url.path, params)
+        else:
+            status_code, body = 200, {}
+
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode()
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def flowable(self, method, path, params):
+        parts = path.strip('/').split('/')
+
+        if (method, parts) == ('POST', ['runtime', 'process-instances']):
+            with self._lock:
+                return 201, {'id': f'proc-stub-{next(self._process_ids)}'}
+
+        if (method, parts) == ('GET', ['runtime', 'tasks']):
+            tasks = self.tasks.get(params.get('candidateGroup'), [])
+            start, size = int(params.get('start', 0)), int(params.get('size', 100))
+            return 200, {'data': tasks[start:start + size], 'total': len(tasks)}
+
+        if method == 'GET' and parts[:2] == ['runtime', 'tasks'] and parts[3:] == ['variables']:
+            if parts[2] not in self.variables:
+                return 404, {}
+            return 200, self.variables[parts[2]]
+
+        if method == 'POST' and parts[:2] == ['runtime', 'tasks'] and len(parts) == 3:
+            return 200, {}
+
+        if (method, parts) == ('GET', ['runtime', 'executions']):
+            return 200, {'data': [{'id': f"exec-{params.get('processInstanceId')}"}]}
+
+        if method == 'PUT' and parts[:2] == ['runtime', 'executions']:
+            return 200, {}
+
+        return 404, {}
+
+
+def router_endpoints(router):
+    """
+    ``(url name, HTTP method)`` of every action a DRF router exposes,
+    without the API root and the ``.json``-style format suffix variants
+    """
+    endpoints = []
+    for pattern in router.urls:
+        actions = getattr(pattern.callback, 'actions', None)
+        if not actions or 'format' in pattern.pattern.regex.groupindex:
+            continue
+        # DRF answers HEAD with the GET action
+        endpoints.extend((pattern.name, method) for method in actions if method != 'head')
+    return endpoints
+
+
+def _fill(value, refs):
+    # "{name}" placeholders -> the seeded object's pk
+    if isinstance(value, str):
+        return value.format_map(refs)
+    if isinstance(value, dict):
+        return {key: _fill(item, refs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, refs) for item in value]
+    return value
+
+
+class EndpointBudgetMixin:
+    """
+    Call every route of ``router`` against the seeded budget dataset and
+    hold it to its row of ``config.budgets.ENDPOINT_BUDGETS``: at most
+    ``queries`` DB queries and ``http`` outbound HTTP calls, within ``ms``
+    milliseconds when set.
+
+    Each call runs in a rolled-back transaction on a cleared cache, so the
+    routes see the same data whatever order they run in.
+    """
+    router = None
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        objects, cls.flowable_tasks = seed_budget_dataset()
+        cls.refs = {name: str(getattr(obj, 'pk', obj)) for name, obj in objects.items()}
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_every_route_has_a_budget(self):
+        missing = [endpoint for endpoint in router_endpoints(self.router) if endpoint not in ENDPOINT_BUDGETS]
+        self.assertFalse(missing, f'No budget in config/budgets.py for {missing}')
+
+    def test_routes_stay_within_budget(self):
+        for name, method in router_endpoints(self.router):
+            budget = ENDPOINT_BUDGETS.get((name, method))
+            if budget is not None:
+                with self.subTest(route=name, method=method.upper()):
+                    self.assertWithinBudget(name, method, budget)
+
+    def assertWithinBudget(self, name, method, budget):
+        path = reverse(name, kwargs=_fill(budget.kwargs, self.refs))
+        data = _fill(budget.data, self.refs)
+        cache.clear()
+
+        with transaction.atomic(), OutboundHTTPStub(self.flowable_tasks) as http:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                if method == 'get':
+                    response = self.client.get(path, data)
+                else:
+                    response = getattr(self.client, method)(path, data, format='json')
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+
+        label = f'{method.upper()} {path}'
+        self.assertEqual(response.status_code, budget.status, f'{label}: {response.content[:500]!r}')
+
+        sql = counted_queries(queries)
+        self.assertLessEqual(
+            len(sql), budget.queries,
+            f'{label} ran {len(sql)} queries, budget {budget.queries}:\n' + '\n'.join(sql),
+        )
+        self.assertLessEqual(
+            len(http.calls), budget.http,
+            f'{label} made {len(http.calls)} HTTP calls, budget {budget.http}:\n'
+            + '\n'.join(f'{verb} {url}' for verb, url in http.calls),
+        )
+        if budget.ms is not None:
+            self.assertLessEqual(elapsed_ms, budget.ms, f'{label} took {elapsed_ms:.0f} ms, budget {budget.ms} ms')
+
+        return response
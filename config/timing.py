@@ -0,0 +1,225 @@
+"""
+Per-request time breakdown: DB, Flowable HTTP, partner HTTP, serialization.
+
+``RequestTimingMiddleware`` opens a ``RequestTiming`` for each request and
+makes it current (a context variable, so it follows the request through
+``sync_to_async``). Instrumented code reports into it with ``timed()``:
+
+- every DB query, through an execute wrapper on each connection
+- ``FlowableClient``/``AsyncFlowableClient`` calls
+- ``call_third_party_api`` (partner pushes)
+- ``TimedModelSerializer`` (building a serializer's ``.data``) and
+  ``TimedJSONRenderer`` (rendering it to JSON), together ``serialize``
+
+The result goes out in a ``Server-Timing`` header and, when the
+``config.timing`` logger is enabled for INFO (REQUEST_TIMING_LOG_LEVEL), one
+structured log record per request. Outside a request ``timed()``
+only checks the context variable, so the hooks cost next to nothing.
+
+Work a request hands to a thread pool is counted when the callable is
+wrapped in ``propagate()``. Calls that overlap in time are all counted, so a
+category can add up to more than the request's wall time.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+
+
+logger = logging.getLogger(__name__)
+
+# Server-Timing metric names, in header order
+CATEGORIES = ('db', 'flowable', 'partner', 'serialize')
+
+_current = contextvars.ContextVar('request_timing', default=None)
+_serializing = contextvars.ContextVar('serializing', default=False)
+
+
+class RequestTiming:
+    """
+    Milliseconds and call counts per category for one request
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals = {category: [0, 0.0] for category in CATEGORIES}
+        self._lock = threading.Lock()
+
+    def add(self, category, ms):
+        with self._lock:
+            total = self.totals[category]
+            total[0] += 1
+            total[1] += ms
+
+    def elapsed(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms):
+        metrics = [
+            f'{category};dur={ms:.1f};desc="{count} calls"'
+            for category, (count, ms) in self.totals.items()
+        ]
+        metrics.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(metrics)
+
+    def record(self, request, response, total_ms):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            **{
+                f'{category}_{field}': value
+                for category, (count, ms) in self.totals.items()
+                for field, value in (('count', count), ('ms', round(ms, 2)))
+            },
+        }
+
+
+def current_timing():
+    return _current.get()
+
+
+@contextmanager
+def timed(category):
+    """
+    Count the enclosed block against the current request, if there is one
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(category, (time.perf_counter() - started) * 1000)
+
+
+def propagate(fn):
+    """
+    ``fn`` reporting into the calling request's timing when run on another
+    thread (thread pools do not carry context variables over)
+    """
+    timing = _current.get()
+    if timing is None:
+        return fn
+
+    def run(*args, **kwargs):
+        _instrument(connection)
+        token = _current.set(timing)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+def _instrument(conn):
+    if _time_query not in conn.execute_wrappers:
+        conn.execute_wrappers.append(_time_query)
+
+
+def _instrument_new_connection(sender, connection, **kwargs):
+    _instrument(connection)
+
+
+def _instrument_request_thread(sender, **kwargs):
+    # Sent on the thread the ORM runs on, under WSGI and ASGI alike
+    _instrument(connection)
+
+
+connection_created.connect(_instrument_new_connection, dispatch_uid='config.timing')
+request_started.connect(_instrument_request_thread, dispatch_uid='config.timing')
+
+
+class TimedModelSerializer(ModelSerializer):
+    """
+    ModelSerializer whose output is counted as ``serialize``: one call per
+    object (per item of a ``many=True`` list); nested serializers fall
+    inside their parent's call
+    """
+
+    def to_representation(self, instance):
+        if _current.get() is None or _serializing.get():
+            return super().to_representation(instance)
+
+        token = _serializing.set(True)
+        try:
+            with timed('serialize'):
+                return super().to_representation(instance)
+        finally:
+            _serializing.reset(token)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    DRF's JSONRenderer, with rendering counted as ``serialize``
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def _finish(timing, request, response):
+    total_ms = timing.elapsed()
+    response['Server-Timing'] = timing.server_timing(total_ms)
+
+    if logger.isEnabledFor(logging.INFO):
+        record = timing.record(request, response, total_ms)
+        logger.info(json.dumps(record), extra={'request_timing': record})
+    return response
+
+
+@sync_and_async_middleware
+def RequestTimingMiddleware(get_response):
+    """
+    Time each request's DB, Flowable, partner and serialization work and
+    report it in ``Server-Timing`` and the ``config.timing`` log
+    """
+    if not settings.REQUEST_TIMING:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timing = RequestTiming()
+            token = _current.set(timing)
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            return _finish(timing, request, response)
+
+    else:
+        def middleware(request):
+            timing = RequestTiming()
+            token = _current.set(timing)
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            return _finish(timing, request, response)
+
+    return middleware
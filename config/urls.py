@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from config.metrics import metrics_view
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -13,4 +15,7 @@ urlpatterns = [
     # Apps
     path("api/requests/", include("service_requests.urls")),
     path("api/orders/", include("service_orders.urls")),
+
+    # Prometheus scrape target
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,431 @@
+"""
+In-process stand-in for the parts of the Flowable REST API we use.
+
+``FakeFlowable`` runs ServiceRequestProcess.bpmn20.xml itself: process
+instances move through its user tasks, exclusive gateway and message
+catch event as tasks are completed and messages received, so the real
+views can be driven end to end without a Flowable server. Latency and
+failures can be injected to make benchmarks and failure tests
+reproducible.
+
+It is reachable three ways:
+
+* ``FakeFlowableAdapter``, a requests adapter (``use_fake_flowable`` mounts
+  it on the shared FlowableClient);
+* ``fake_flowable_transport``, an httpx transport for AsyncFlowableClient;
+* ``manage.py run_fake_flowable``, a plain HTTP server for out-of-process
+  benchmarks (point FLOWABLE_BASE_URL at it).
+
+``FLOWABLE_FAKE=True`` routes both clients of a process to a process-wide
+instance configured from the ``FLOWABLE_FAKE_*`` settings.
+"""
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+
+
+BPMN_PATH = Path(__file__).resolve().parent / 'ServiceRequestProcess.bpmn20.xml'
+
+BPMN_NS = {
+    'bpmn': 'http://www.omg.org/spec/BPMN/20100524/MODEL',
+    'flowable': 'http://flowable.org/bpmn',
+}
+
+# ${name == 'value'} / ${name != 'value'}, the only conditions the process uses
+CONDITION = re.compile(r"^\$\{\s*(\w+)\s*(==|!=)\s*'([^']*)'\s*\}$")
+
+# Tasks get increasing createTime values, so sorting by it is deterministic
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FlowableError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ProcessDefinition:
+    """
+    The flow graph of a BPMN process, enough to walk it: user tasks and
+    message catch events are wait states, anything else is passed through,
+    exclusive gateways take the first flow whose condition holds.
+    """
+
+    WAIT_STATES = ('userTask', 'intermediateCatchEvent')
+
+    def __init__(self, path=BPMN_PATH):
+        root = ET.parse(path).getroot()
+        messages = {
+            message.get('id'): message.get('name')
+            for message in root.iterfind('bpmn:message', BPMN_NS)
+        }
+        process = root.find('bpmn:process', BPMN_NS)
+
+        self.key = process.get('id')
+        self.nodes = {}
+        self.flows = {}
+
+        for element in process:
+            kind = element.tag.rsplit('}', 1)[-1]
+            if kind == 'sequenceFlow':
+                condition = element.find('bpmn:conditionExpression', BPMN_NS)
+                self.flows.setdefault(element.get('sourceRef'), []).append(
+                    (element.get('targetRef'), condition.text.strip() if condition is not None else None)
+                )
+            elif element.get('id'):
+                message = element.find('bpmn:messageEventDefinition', BPMN_NS)
+                self.nodes[element.get('id')] = {
+                    'kind': kind,
+                    'name': element.get('name'),
+                    'group': element.get(f"{{{BPMN_NS['flowable']}}}candidateGroups"),
+                    'message': messages.get(message.get('messageRef')) if message is not None else None,
+                }
+
+        self.start = next(node_id for node_id, node in self.nodes.items() if node['kind'] == 'startEvent')
+
+    @staticmethod
+    def _holds(condition, variables):
+        if condition is None:
+            return True
+        match = CONDITION.match(condition)
+        if match is None:
+            raise FlowableError(500, f'Unsupported condition expression {condition}')
+        name, operator, value = match.groups()
+        return (variables.get(name) == value) == (operator == '==')
+
+    def advance(self, node_id, variables):
+        """
+        Leave ``node_id`` and walk to the next wait state; returns its id,
+        or None once the process has ended
+        """
+        for _ in range(len(self.nodes) + 1):
+            flows = self.flows.get(node_id, [])
+            targets = [target for target, condition in flows if self._holds(condition, variables)]
+            if not targets:
+                raise FlowableError(500, f"No outgoing sequence flow of element '{node_id}' could be selected")
+
+            node_id = targets[0]
+            kind = self.nodes[node_id]['kind']
+            if kind in self.WAIT_STATES:
+                return node_id
+            if kind == 'endEvent':
+                return None
+
+        raise FlowableError(500, f'Process {self.key} loops without reaching a wait state')
+
+
+def _variables_list(variables):
+    return [
+        {'name': name, 'type': 'string', 'value': value, 'scope': 'global'}
+        for name, value in variables.items()
+    ]
+
+
+def _variables_dict(variables):
+    return {variable['name']: variable.get('value') for variable in variables or []}
+
+
+class FakeFlowable:
+    """
+    Thread-safe in-memory Flowable engine answering REST calls.
+
+    ``latency`` (+ up to ``jitter``) seconds are slept before every call and
+    ``error_rate`` of the calls fail with a 503 before touching any state.
+    ``calls`` keeps the last ``recorded_calls`` ``(method, path)`` pairs and
+    ``call_count`` counts them all, so a long-running fake stays bounded.
+    """
+
+    SORT_FIELDS = {'createTime': 'create_time', 'name': 'name', 'priority': 'priority', 'dueDate': 'create_time'}
+
+    def __init__(self, definition=None, *, latency=0.0, jitter=0.0, error_rate=0.0, seed=None, recorded_calls=1000):
+        self.definition = definition or ProcessDefinition()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        self.instances = {}
+        self.tasks = {}
+        self.executions = {}
+        self.calls = deque(maxlen=recorded_calls)
+        self.call_count = 0
+        self._lock = threading.RLock()
+        self._ticks = itertools.count()
+
+    # --- engine ---
+
+    def _now(self):
+        return (EPOCH + timedelta(milliseconds=next(self._ticks))).isoformat(timespec='milliseconds')
+
+    def _enter(self, instance, node_id):
+        instance['activity'] = node_id
+        if node_id is None:
+            instance['ended'] = True
+            return
+
+        node = self.definition.nodes[node_id]
+        if node['kind'] == 'userTask':
+            task_id = str(uuid.uuid4())
+            self.tasks[task_id] = {
+                'id': task_id,
+                'name': node['name'],
+                'taskDefinitionKey': node_id,
+                'candidateGroup': node['group'],
+                'processInstanceId': instance['id'],
+                'create_time': self._now(),
+                'priority': 50,
+            }
+        else:
+            execution_id = str(uuid.uuid4())
+            self.executions[execution_id] = {
+                'id': execution_id,
+                'processInstanceId': instance['id'],
+                'activityId': node_id,
+                'message': node['message'],
+            }
+
+    def start_process(self, key, variables):
+        if key != self.definition.key:
+            raise FlowableError(404, f"No process definition found for key '{key}'")
+
+        instance = {'id': str(uuid.uuid4()), 'variables': dict(variables), 'activity': None, 'ended': False}
+        self.instances[instance['id']] = instance
+        self._enter(instance, self.definition.advance(self.definition.start, instance['variables']))
+        return instance
+
+    def complete_task(self, task_id, variables):
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise FlowableError(404, f"Could not find a task with id '{task_id}'.")
+
+        instance = self.instances[task['processInstanceId']]
+        merged = {**instance['variables'], **variables}
+        # Pick the next state before changing anything, as Flowable rolls back
+        next_node = self.definition.advance(task['taskDefinitionKey'], merged)
+
+        del self.tasks[task_id]
+        instance['variables'] = merged
+        self._enter(instance, next_node)
+
+    def receive_message(self, execution_id, message_name, variables):
+        execution = self.executions.get(execution_id)
+        if execution is None:
+            raise FlowableError(404, f"Could not find an execution with id '{execution_id}'.")
+        if execution['message'] != message_name:
+            raise FlowableError(500, f"Execution '{execution_id}' does not have a subscription to a message event with name '{message_name}'")
+
+        instance = self.instances[execution['processInstanceId']]
+        merged = {**instance['variables'], **variables}
+        next_node = self.definition.advance(execution['activityId'], merged)
+
+        del self.executions[execution_id]
+        instance['variables'] = merged
+        self._enter(instance, next_node)
+        return execution
+
+    # --- REST ---
+
+    def _task_json(self, task, include_variables=False):
+        data = {key: value for key, value in task.items() if key not in ('create_time', 'candidateGroup')}
+        data.update(createTime=task['create_time'], assignee=None)
+        if include_variables:
+            data['variables'] = _variables_list(self.instances[task['processInstanceId']]['variables'])
+        return data
+
+    def _list_tasks(self, params):
+        tasks = [
+            task for task in self.tasks.values()
+            if params.get('candidateGroup') in (None, task['candidateGroup'])
+            and params.get('processInstanceId') in (None, task['processInstanceId'])
+        ]
+
+        field = self.SORT_FIELDS.get(params.get('sort'), 'create_time')
+        tasks.sort(key=lambda task: (task[field], task['id']), reverse=params.get('order') == 'desc')
+
+        start, size = int(params.get('start', 0)), int(params.get('size', 10))
+        include_variables = params.get('includeProcessVariables') == 'true'
+        return {
+            'data': [self._task_json(task, include_variables) for task in tasks[start:start + size]],
+            'total': len(tasks),
+            'start': start,
+            'size': min(size, max(len(tasks) - start, 0)),
+        }
+
+    def _list_executions(self, params):
+        executions = [
+            {key: value for key, value in execution.items() if key != 'message'}
+            for execution in self.executions.values()
+            if params.get('processInstanceId') in (None, execution['processInstanceId'])
+            and params.get('activityId') in (None, execution['activityId'])
+        ]
+        return {'data': executions, 'total': len(executions), 'start': 0, 'size': len(executions)}
+
+    def _route(self, method, parts, params, body):
+        if parts == ['runtime', 'process-instances'] and method == 'POST':
+            instance = self.start_process(body.get('processDefinitionKey'), _variables_dict(body.get('variables')))
+            return 201, {
+                'id': instance['id'],
+                'processDefinitionKey': self.definition.key,
+                'ended': instance['ended'],
+                'activityId': instance['activity'],
+            }
+
+        if parts == ['runtime', 'tasks'] and method == 'GET':
+            return 200, self._list_tasks(params)
+
+        if parts[:2] == ['runtime', 'tasks'] and len(parts) >= 3:
+            task = self.tasks.get(parts[2])
+            if task is None:
+                raise FlowableError(404, f"Could not find a task with id '{parts[2]}'.")
+
+            if parts[3:] == ['variables'] and method == 'GET':
+                return 200, _variables_list(self.instances[task['processInstanceId']]['variables'])
+            if len(parts) == 3 and method == 'GET':
+                return 200, self._task_json(task)
+            if len(parts) == 3 and method == 'POST':
+                if body.get('action') != 'complete':
+                    raise FlowableError(400, f"Invalid action: '{body.get('action')}'.")
+                self.complete_task(task['id'], _variables_dict(body.get('variables')))
+                return 200, None
+
+        if parts == ['runtime', 'executions'] and method == 'GET':
+            return 200, self._list_executions(params)
+
+        if parts[:2] == ['runtime', 'executions'] and len(parts) == 3 and method == 'PUT':
+            if body.get('action') != 'messageEventReceived':
+                raise FlowableError(400, f"Invalid action: '{body.get('action')}'.")
+            execution = self.receive_message(parts[2], body.get('messageName'), _variables_dict(body.get('variables')))
+            return 200, {key: value for key, value in execution.items() if key != 'message'}
+
+        raise FlowableError(404, f'No fake for {method} /{"/".join(parts)}')
+
+    def handle(self, method, path, params=None, body=None):
+        """
+        Answer one REST call; returns ``(status_code, json_body_or_None)``
+        """
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        parts = [part for part in path.split('/') if part]
+        with self._lock:
+            self.calls.append((method, path))
+            self.call_count += 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                return 503, {'message': 'Injected failure', 'exception': 'FakeFlowable'}
+
+            try:
+                return self._route(method, parts, params or {}, body or {})
+            except FlowableError as e:
+                return e.status_code, {'message': str(e), 'exception': str(e)}
+
+    def handle_url(self, method, url, base_url, content):
+        """
+        ``handle`` for a full request URL under ``base_url``
+        """
+        split = urlsplit(url)
+        path = split.path[len(urlsplit(base_url).path.rstrip('/')):]
+        params = {key: values[-1] for key, values in parse_qs(split.query).items()}
+        body = json.loads(content) if content else None
+        return self.handle(method, path, params, body)
+
+
+class FakeFlowableAdapter(BaseAdapter):
+    """
+    requests transport answering from a FakeFlowable
+    """
+
+    def __init__(self, fake, base_url):
+        super().__init__()
+        self.fake = fake
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        status_code, body = self.fake.handle_url(request.method, request.url, self.base_url, request.body)
+
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode() if body is not None else b''
+        response.headers['Content-Type'] = 'application/json'
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def fake_flowable_transport(fake, base_url):
+    """
+    httpx transport answering from a FakeFlowable
+    """
+    def handler(request):
+        status_code, body = fake.handle_url(request.method, str(request.url), base_url, request.content)
+        return httpx.Response(status_code, json=body) if body is not None else httpx.Response(status_code)
+
+    return httpx.MockTransport(handler)
+
+
+_default_fake = None
+_default_fake_lock = threading.Lock()
+
+
+def get_fake_flowable():
+    """
+    The process-wide FakeFlowable used when ``FLOWABLE_FAKE`` is on
+    """
+    global _default_fake
+    from django.conf import settings
+
+    if _default_fake is None:
+        with _default_fake_lock:
+            if _default_fake is None:
+                _default_fake = FakeFlowable(
+                    latency=settings.FLOWABLE_FAKE_LATENCY_MS / 1000,
+                    jitter=settings.FLOWABLE_FAKE_JITTER_MS / 1000,
+                    error_rate=settings.FLOWABLE_FAKE_ERROR_RATE,
+                    seed=settings.FLOWABLE_FAKE_SEED,
+                )
+    return _default_fake
+
+
+def mount_fake_flowable(client, fake):
+    """
+    Route a FlowableClient's calls to ``fake``; returns the mount prefix
+    """
+    prefix = client.base_url + '/'
+    client.session.mount(prefix, FakeFlowableAdapter(fake, client.base_url))
+    return prefix
+
+
+@contextmanager
+def use_fake_flowable(fake=None):
+    """
+    Route the shared FlowableClient to ``fake`` (a fresh one by default)
+    for the duration of the block
+    """
+    from flowable_client import get_flowable_client
+
+    fake = fake or FakeFlowable()
+    client = get_flowable_client()
+    prefix = mount_fake_flowable(client, fake)
+    try:
+        yield fake
+    finally:
+        client.session.adapters.pop(prefix, None)
@@ -1,110 +1,579 @@
+import asyncio
+import os
+import threading
+import uuid
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlsplit
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from config import metrics
+from config.dependencies import get_dependency
+from config.timing import propagate, timed
 
 
 print(settings.FLOWABLE_BASE_URL)
 
-def generate_request_task(*, request_id):
-    url = f"{settings.FLOWABLE_BASE_URL}/runtime/process-instances"
-
-    payload = {
-        "processDefinitionKey": "serviceRequestProcess",
-        "variables": [
-            {
-                "name": "request_id",
-                "value": request_id,
-                "type": "string",
-            }
-        ],
+
+class FlowableClient:
+    """
+    Pooled, keep-alive client for the Flowable REST API.
+
+    A single instance is shared by every thread of a worker process (see
+    ``get_flowable_client``), so TCP/TLS connections are reused across calls
+    instead of being opened for each one.
+    """
+
+    def __init__(self, *, base_url, auth, pool_size=10, connect_timeout=3,
+                 timeouts=None, max_retries=3, backoff_factor=0.3):
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.timeouts = timeouts or {}
+
+        # Retries only apply to idempotent GETs; POST/PUT are never replayed
+        # once the request has reached Flowable.
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def timeout_for(self, operation):
+        return (self.connect_timeout, self.timeouts.get(operation, 10))
+
+    def request(self, operation, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout_for(operation))
+        with get_dependency('flowable').call() as guard, timed('flowable'), \
+                metrics.flowable_call(operation, 'sync') as call:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            guard.status_code = call.status_code = response.status_code
+        return response
+
+    def start_process(self, *, request_id):
+        payload = {
+            "processDefinitionKey": "serviceRequestProcess",
+            "variables": [
+                {
+                    "name": "request_id",
+                    "value": request_id,
+                    "type": "string",
+                }
+            ],
+        }
+        return self.request('start_process', 'POST', '/runtime/process-instances', json=payload)
+
+    def list_tasks(self, *, params):
+        return self.request('list_tasks', 'GET', '/runtime/tasks', params=params)
+
+    def get_task_variables(self, *, task_id):
+        return self.request('get_task_variables', 'GET', f'/runtime/tasks/{task_id}/variables')
+
+    def complete_task(self, *, task_id, variables):
+        payload = {
+            "action": "complete",
+            "variables": variables,
+        }
+        return self.request('complete_task', 'POST', f'/runtime/tasks/{task_id}', json=payload)
+
+    def list_executions(self, *, params):
+        return self.request('list_executions', 'GET', '/runtime/executions', params=params)
+
+    def trigger_message(self, *, execution_id, message_name, variables):
+        payload = {
+            "action": "messageEventReceived",
+            "messageName": message_name,
+            "variables": variables,
+        }
+        return self.request(
+            'trigger_message',
+            'PUT',
+            f'/runtime/executions/{execution_id}',
+            json=payload,
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_flowable_client():
+    """
+    Return the FlowableClient shared by this worker process.
+
+    The client is created lazily so that pre-forking servers build one pool
+    per child instead of sharing sockets inherited from the parent.
+    """
+    global _client, _client_pid
+
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = FlowableClient(
+                    base_url=settings.FLOWABLE_BASE_URL,
+                    auth=settings.FLOWABLE_AUTH,
+                    pool_size=settings.FLOWABLE_POOL_SIZE,
+                    connect_timeout=settings.FLOWABLE_CONNECT_TIMEOUT,
+                    timeouts=settings.FLOWABLE_TIMEOUTS,
+                    max_retries=settings.FLOWABLE_MAX_RETRIES,
+                    backoff_factor=settings.FLOWABLE_RETRY_BACKOFF,
+                )
+                if settings.FLOWABLE_FAKE:
+                    from fake_flowable import get_fake_flowable, mount_fake_flowable
+                    mount_fake_flowable(_client, get_fake_flowable())
+                _client_pid = os.getpid()
+
+    return _client
+
+
+class AsyncFlowableClient:
+    """
+    asyncio counterpart of FlowableClient for the ASGI inbox views.
+
+    Mirrors FlowableClient's pool size, per-operation timeouts and GET
+    retry policy, but never blocks a worker thread while Flowable is slow.
+    """
+
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, *, base_url, auth, pool_size=10, connect_timeout=3,
+                 timeouts=None, max_retries=3, backoff_factor=0.3, transport=None):
+        self.connect_timeout = connect_timeout
+        self.timeouts = timeouts or {}
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip('/'),
+            auth=auth if all(auth) else None,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+            transport=transport,
+        )
+
+    def timeout_for(self, operation):
+        return httpx.Timeout(self.timeouts.get(operation, 10), connect=self.connect_timeout)
+
+    async def request(self, operation, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout_for(operation))
+        retries = self.max_retries if method == 'GET' else 0
+
+        for attempt in range(retries + 1):
+            try:
+                async with get_dependency('flowable').acall() as guard:
+                    with timed('flowable'), metrics.flowable_call(operation, 'async') as call:
+                        response = await self.client.request(method, path, **kwargs)
+                        guard.status_code = call.status_code = response.status_code
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt == retries:
+                    return response
+
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def list_tasks(self, *, params):
+        return await self.request('list_tasks', 'GET', '/runtime/tasks', params=params)
+
+    async def get_task_variables(self, *, task_id):
+        return await self.request('get_task_variables', 'GET', f'/runtime/tasks/{task_id}/variables')
+
+    async def complete_task(self, *, task_id, variables):
+        payload = {
+            "action": "complete",
+            "variables": variables,
+        }
+        return await self.request('complete_task', 'POST', f'/runtime/tasks/{task_id}', json=payload)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_flowable_client():
+    """
+    Return the AsyncFlowableClient bound to the running event loop.
+
+    httpx connection pools cannot be shared between event loops, so one
+    client is kept per loop (normally exactly one per ASGI worker).
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+
+    if client is None:
+        transport = None
+        if settings.FLOWABLE_FAKE:
+            from fake_flowable import get_fake_flowable, fake_flowable_transport
+            transport = fake_flowable_transport(get_fake_flowable(), settings.FLOWABLE_BASE_URL)
+
+        client = AsyncFlowableClient(
+            base_url=settings.FLOWABLE_BASE_URL,
+            auth=settings.FLOWABLE_AUTH,
+            pool_size=settings.FLOWABLE_POOL_SIZE,
+            connect_timeout=settings.FLOWABLE_CONNECT_TIMEOUT,
+            timeouts=settings.FLOWABLE_TIMEOUTS,
+            max_retries=settings.FLOWABLE_MAX_RETRIES,
+            backoff_factor=settings.FLOWABLE_RETRY_BACKOFF,
+            transport=transport,
+        )
+        _async_clients[loop] = client
+
+    return client
+
+
+def variables_to_dict(variables):
+    """
+    Flatten Flowable's [{"name": ..., "value": ...}] variable list
+    """
+    return {var.get('name'): var.get('value') for var in variables or []}
+
+
+def format_task(task):
+    """
+    Extract the task fields used by the inbox views
+    """
+    return {
+        'task_id': task.get('id'),
+        'task_name': task.get('name'),
+        'process_instance_id': task.get('processInstanceId'),
+        'created_time': task.get('createTime'),
+        'assignee': task.get('assignee'),
+        'variables': variables_to_dict(task.get('variables')),
     }
 
-    response = requests.post(
-        url,
-        auth=settings.FLOWABLE_AUTH,
-        json=payload,
-        timeout=10,
-    )
+
+def decision_variables(decision):
+    return [
+        {
+            "name": "validationResult",
+            "value": decision
+        }
+    ]
+
+
+def generate_request_task(*, request_id):
+    try:
+        response = get_flowable_client().start_process(request_id=request_id)
+    finally:
+        invalidate_inboxes()
 
     response.raise_for_status()
-    result = response.json()
     return response.json()
 
 
-def get_tasks_by_group(*, group_id):
-    """
-    Get all active tasks for a specific group
-    """
-    url = f"{settings.FLOWABLE_BASE_URL}/runtime/tasks"
-    
+# Inbox sort keys accepted by the API -> Flowable /runtime/tasks sort fields
+TASK_SORT_FIELDS = {
+    'created_time': 'createTime',
+    'name': 'name',
+    'priority': 'priority',
+    'due_date': 'dueDate',
+}
+
+
+def task_page_params(*, group_id, start, size, sort=None):
     params = {
         'candidateGroup': group_id,
-        'includeProcessVariables': 'true'
+        'includeProcessVariables': 'true',
+        'start': start,
+        'size': size,
     }
-    
+
+    if sort:
+        params['sort'] = TASK_SORT_FIELDS[sort.lstrip('-')]
+        params['order'] = 'desc' if sort.startswith('-') else 'asc'
+
+    return params
+
+
+def _unseen_tasks(tasks, seen):
+    # Pages fetched concurrently can overlap if tasks complete in between
+    for task in tasks:
+        if task['task_id'] not in seen:
+            seen.add(task['task_id'])
+            yield task
+
+
+def get_task_page(*, group_id, start=0, size=None, sort=None):
+    """
+    Get one page of active tasks for a group, along with Flowable's total
+    """
+    params = task_page_params(
+        group_id=group_id,
+        start=start,
+        size=size or settings.FLOWABLE_TASK_PAGE_SIZE,
+        sort=sort,
+    )
+
     try:
-        response = requests.get(
-            url,
-            params=params,
-            auth=settings.FLOWABLE_AUTH,
-            timeout=10
-        )
+        response = get_flowable_client().list_tasks(params=params)
         response.raise_for_status()
-        
+
         result = response.json()
-        tasks = result.get('data', [])
-        
-        # Extract relevant task information
-        formatted_tasks = []
-        for task in tasks:
-            task_info = {
-                'task_id': task.get('id'),
-                'task_name': task.get('name'),
-                'process_instance_id': task.get('processInstanceId'),
-                'created_time': task.get('createTime'),
-                'assignee': task.get('assignee'),
-                'variables': {}
-            }
-            
-            # Extract process variables
-            if task.get('variables'):
-                for var in task.get('variables', []):
-                    task_info['variables'][var.get('name')] = var.get('value')
-            
-            formatted_tasks.append(task_info)
-        
-        return formatted_tasks
-        
+
+        return {
+            'total': result.get('total', 0),
+            'tasks': [format_task(task) for task in result.get('data', [])],
+        }
+
     except requests.exceptions.RequestException as e:
         raise Exception(f"Flowable get tasks failed: {str(e)}")
 
 
+def iter_tasks_by_group(*, group_id, size=None, sort=None, max_workers=None):
+    """
+    Yield every active task for a group, page by page.
+
+    The first page tells us Flowable's ``total``; the remaining pages are
+    fetched concurrently, at most ``max_workers`` pages ahead of the
+    consumer, and yielded in order.
+    """
+    size = size or settings.FLOWABLE_TASK_PAGE_SIZE
+    max_workers = max_workers or settings.FLOWABLE_PAGE_CONCURRENCY
+    seen = set()
+
+    first_page = get_task_page(group_id=group_id, start=0, size=size, sort=sort)
+    yield from _unseen_tasks(first_page['tasks'], seen)
+
+    starts = iter(range(size, first_page['total'], size))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        def fetch(start):
+            return pool.submit(propagate(get_task_page), group_id=group_id, start=start, size=size, sort=sort)
+
+        pending = deque(fetch(start) for start in islice(starts, max_workers))
+
+        try:
+            while pending:
+                page = pending.popleft().result()
+
+                next_start = next(starts, None)
+                if next_start is not None:
+                    pending.append(fetch(next_start))
+
+                yield from _unseen_tasks(page['tasks'], seen)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def get_tasks_by_group(*, group_id):
+    """
+    Get all active tasks for a specific group
+    """
+    return list(iter_tasks_by_group(group_id=group_id))
+
+
+# Formatted group inboxes are cached for FLOWABLE_INBOX_CACHE_TTL seconds.
+# Every key embeds the current generation token; any workflow write replaces
+# the token, which orphans all cached inboxes at once. Tasks move between
+# groups, so a write cannot tell which groups it touched.
+_INBOX_GENERATION_KEY = "flowable:inbox-generation"
+
+
+def _inbox_generation():
+    generation = cache.get(_INBOX_GENERATION_KEY)
+    if generation is None:
+        cache.add(_INBOX_GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(_INBOX_GENERATION_KEY)
+    return generation
+
+
+def _inbox_key(generation, group_id, variant):
+    return f"flowable:inbox:{generation}:{group_id}:" + ":".join(str(part) for part in variant)
+
+
+def _stale_inbox_key(key):
+    # The last good copy outlives generations: "flowable:inbox-stale:<group>:<variant>"
+    return "flowable:inbox-stale:" + key.split(":", 3)[3]
+
+
+def _inbox_stats_key(group_id, outcome):
+    return f"flowable:inbox-stats:{group_id}:{outcome}"
+
+
+def _count_inbox_lookup(group_id, hit):
+    metrics.INBOX_CACHE_LOOKUPS.inc(group=group_id, outcome='hit' if hit else 'miss')
+    key = _inbox_stats_key(group_id, 'hits' if hit else 'misses')
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_cached_inbox(*, group_id, variant):
+    """
+    ``(key, value)`` for a group's cached inbox; value is None on a miss.
+    Pass the key to set_cached_inbox once the live result is fetched.
+    """
+    if not settings.FLOWABLE_INBOX_CACHE_TTL:
+        return None, None
+
+    key = _inbox_key(_inbox_generation(), group_id, variant)
+    value = cache.get(key)
+    _count_inbox_lookup(group_id, hit=value is not None)
+    return key, value
+
+
+def set_cached_inbox(key, value):
+    if key:
+        cache.set(key, value, settings.FLOWABLE_INBOX_CACHE_TTL)
+        if settings.FLOWABLE_INBOX_STALE_TTL:
+            cache.set(_stale_inbox_key(key), (timezone.now(), value), settings.FLOWABLE_INBOX_STALE_TTL)
+
+
+def get_stale_inbox(key):
+    """
+    ``(cached_at, value)`` of the last good copy for a get_cached_inbox
+    key, whatever the generation, or None
+    """
+    if not key or not settings.FLOWABLE_INBOX_STALE_TTL:
+        return None
+    return cache.get(_stale_inbox_key(key))
+
+
+def invalidate_inboxes():
+    cache.set(_INBOX_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def inbox_cache_stats(group_ids):
+    """
+    ``{group_id: {'hits': n, 'misses': n}}`` since the last reset
+    """
+    keys = {
+        _inbox_stats_key(group_id, outcome): (group_id, outcome)
+        for group_id in group_ids
+        for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys))
+
+    stats = {group_id: {'hits': 0, 'misses': 0} for group_id in group_ids}
+    for key, (group_id, outcome) in keys.items():
+        stats[group_id][outcome] = values.get(key, 0)
+    return stats
+
+
+def reset_inbox_cache_stats(group_ids):
+    cache.delete_many([
+        _inbox_stats_key(group_id, outcome)
+        for group_id in group_ids
+        for outcome in ('hits', 'misses')
+    ])
+
+
+WAITING_ACTIVITY_ID = 'waitForApiTrigger'
+
+# Cached "no execution is waiting" marker (None means "not cached")
+_NOT_WAITING = ''
+
+# Striped by key: a fixed set of locks however many processes come and go
+_EXECUTION_LOCK_STRIPES = 64
+_execution_locks = [threading.Lock() for _ in range(_EXECUTION_LOCK_STRIPES)]
+
+
+def _execution_lock(key):
+    return _execution_locks[hash(key) % _EXECUTION_LOCK_STRIPES]
+
+
+def _waiting_execution_key(process_instance_id):
+    return f"flowable:waiting-execution:{process_instance_id}"
+
+
+def get_waiting_execution_id(*, process_instance_id, activity_id=WAITING_ACTIVITY_ID):
+    """
+    Id of the execution waiting at the message catch event, or None.
+
+    Flowable is asked for just that execution (filtered by activityId) and
+    the answer is cached per process instance, so a burst of offers for the
+    same request costs a single lookup. Concurrent misses in this process
+    share one lookup.
+    """
+    key = _waiting_execution_key(process_instance_id)
+    execution_id = cache.get(key)
+
+    if execution_id is None:
+        with _execution_lock(key):
+            execution_id = cache.get(key)
+
+            if execution_id is None:
+                try:
+                    response = get_flowable_client().list_executions(params={
+                        'processInstanceId': process_instance_id,
+                        'activityId': activity_id,
+                    })
+                    response.raise_for_status()
+                except requests.exceptions.RequestException as e:
+                    raise Exception(f"Flowable get executions failed: {str(e)}")
+
+                executions = response.json().get('data', [])
+                execution_id = executions[0]['id'] if executions else _NOT_WAITING
+                cache.set(key, execution_id, settings.FLOWABLE_EXECUTION_CACHE_TTL)
+
+    return execution_id or None
+
+
+def mark_message_consumed(*, process_instance_id):
+    """
+    The catch event fires once; until the process loops back no execution
+    is waiting, so remember that instead of asking Flowable again.
+    """
+    cache.set(
+        _waiting_execution_key(process_instance_id),
+        _NOT_WAITING,
+        settings.FLOWABLE_EXECUTION_CACHE_TTL,
+    )
+
+
+def invalidate_waiting_execution(*, process_instance_id):
+    cache.delete(_waiting_execution_key(process_instance_id))
+
+
+async def ainvalidate_waiting_execution(*, process_instance_id):
+    await cache.adelete(_waiting_execution_key(process_instance_id))
+
+
 def get_task_variable(*, task_id):
     """
     Get details of a specific task
     """
-    url = f"{settings.FLOWABLE_BASE_URL}/runtime/tasks/{task_id}/variables"
-        
     try:
-        response = requests.get(
-            url,
-            auth=settings.FLOWABLE_AUTH,
-            timeout=10
-        )
+        response = get_flowable_client().get_task_variables(task_id=task_id)
         response.raise_for_status()
         
-        variables = response.json()
-            
-        task_info = {
+        return {
             'task_id': task_id,
-            'variables': {}
+            'variables': variables_to_dict(response.json())
         }
-
-        # Extract process variables
-        if variables and len(variables) > 0:
-            for var in variables:
-                task_info['variables'][var.get('name')] = var.get('value')
-        
-        return task_info
             
     except requests.exceptions.RequestException as e:
         raise Exception(f"Flowable get task failed: {str(e)}")
@@ -114,26 +583,16 @@ def complete_task(*, task_id, decision):
     """
     Complete a task with action and optional variables
     """
-    url = f"{settings.FLOWABLE_BASE_URL}/runtime/tasks/{task_id}"
-        
-    payload = {
-        "action": "complete",
-        "variables": [
-            {
-                "name": "validationResult",
-                "value": decision
-            }
-        ]
-    }
-        
     try:
         print('calling flowable ccomplete task api ...............')
-        response = requests.post(
-            url,
-            json=payload,
-            auth=settings.FLOWABLE_AUTH,
-            timeout=10
-        )
+        try:
+            response = get_flowable_client().complete_task(
+                task_id=task_id,
+                variables=decision_variables(decision)
+            )
+        finally:
+            # Even a timed-out call may have moved the process on
+            invalidate_inboxes()
         print('complete task response ...............')
         print(response)
         response.raise_for_status()
@@ -151,7 +610,10 @@ def call_third_party_api(url, payload):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        with get_dependency('partner').call() as guard, timed('partner'), \
+                metrics.partner_call(urlsplit(url).netloc) as call:
+            response = requests.post(url, json=payload, headers=headers, timeout=settings.THIRD_PARTY_API_TIMEOUT)
+            guard.status_code = call.status_code = response.status_code
 
         if response.status_code in [200, 201]:
             return response
@@ -169,4 +631,153 @@ def call_third_party_api(url, payload):
     
     except requests.exceptions.RequestException as e:
         print(f"Request failed: {e}")
-        raise Exception(f"Third party API request failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Third party API request failed: {str(e)}")
+
+
+async def aget_task_page(*, group_id, start=0, size=None, sort=None):
+    """
+    Async version of get_task_page
+    """
+    params = task_page_params(
+        group_id=group_id,
+        start=start,
+        size=size or settings.FLOWABLE_TASK_PAGE_SIZE,
+        sort=sort,
+    )
+
+    try:
+        response = await get_async_flowable_client().list_tasks(params=params)
+        response.raise_for_status()
+
+        result = response.json()
+
+        return {
+            'total': result.get('total', 0),
+            'tasks': [format_task(task) for task in result.get('data', [])],
+        }
+
+    except httpx.HTTPError as e:
+        raise Exception(f"Flowable get tasks failed: {str(e)}")
+
+
+async def aiter_tasks_by_group(*, group_id, size=None, sort=None, max_workers=None):
+    """
+    Async version of iter_tasks_by_group
+    """
+    size = size or settings.FLOWABLE_TASK_PAGE_SIZE
+    max_workers = max_workers or settings.FLOWABLE_PAGE_CONCURRENCY
+    seen = set()
+
+    first_page = await aget_task_page(group_id=group_id, start=0, size=size, sort=sort)
+    for task in _unseen_tasks(first_page['tasks'], seen):
+        yield task
+
+    starts = iter(range(size, first_page['total'], size))
+
+    def fetch(start):
+        return asyncio.ensure_future(
+            aget_task_page(group_id=group_id, start=start, size=size, sort=sort)
+        )
+
+    pending = deque(fetch(start) for start in islice(starts, max_workers))
+
+    try:
+        while pending:
+            page = await pending.popleft()
+
+            next_start = next(starts, None)
+            if next_start is not None:
+                pending.append(fetch(next_start))
+
+            for task in _unseen_tasks(page['tasks'], seen):
+                yield task
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def aget_tasks_by_group(*, group_id):
+    """
+    Async version of get_tasks_by_group
+    """
+    return [task async for task in aiter_tasks_by_group(group_id=group_id)]
+
+
+async def aget_cached_inbox(*, group_id, variant):
+    """
+    Async version of get_cached_inbox
+    """
+    if not settings.FLOWABLE_INBOX_CACHE_TTL:
+        return None, None
+
+    generation = await cache.aget(_INBOX_GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(_INBOX_GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = await cache.aget(_INBOX_GENERATION_KEY)
+
+    key = _inbox_key(generation, group_id, variant)
+    value = await cache.aget(key)
+
+    metrics.INBOX_CACHE_LOOKUPS.inc(group=group_id, outcome='hit' if value is not None else 'miss')
+    stats_key = _inbox_stats_key(group_id, 'hits' if value is not None else 'misses')
+    if not await cache.aadd(stats_key, 1, None):
+        try:
+            await cache.aincr(stats_key)
+        except ValueError:
+            await cache.aset(stats_key, 1, None)
+
+    return key, value
+
+
+async def aset_cached_inbox(key, value):
+    if key:
+        await cache.aset(key, value, settings.FLOWABLE_INBOX_CACHE_TTL)
+        if settings.FLOWABLE_INBOX_STALE_TTL:
+            await cache.aset(_stale_inbox_key(key), (timezone.now(), value), settings.FLOWABLE_INBOX_STALE_TTL)
+
+
+async def aget_stale_inbox(key):
+    if not key or not settings.FLOWABLE_INBOX_STALE_TTL:
+        return None
+    return await cache.aget(_stale_inbox_key(key))
+
+
+async def ainvalidate_inboxes():
+    await cache.aset(_INBOX_GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+async def aget_task_variable(*, task_id):
+    """
+    Async version of get_task_variable
+    """
+    try:
+        response = await get_async_flowable_client().get_task_variables(task_id=task_id)
+        response.raise_for_status()
+
+        return {
+            'task_id': task_id,
+            'variables': variables_to_dict(response.json())
+        }
+
+    except httpx.HTTPError as e:
+        raise Exception(f"Flowable get task failed: {str(e)}")
+
+
+async def acomplete_task(*, task_id, decision):
+    """
+    Async version of complete_task
+    """
+    try:
+        try:
+            response = await get_async_flowable_client().complete_task(
+                task_id=task_id,
+                variables=decision_variables(decision)
+            )
+        finally:
+            await ainvalidate_inboxes()
+        response.raise_for_status()
+
+        return True
+
+    except httpx.HTTPError as e:
+        raise Exception(f"Flowable task completion failed: {str(e)}")
@@ -1,23 +1,40 @@
 from django.contrib import admin
 from .models import *
+from config.db import write_transaction
+
+
+class PortfolioTrackedAdmin(admin.ModelAdmin):
+
+    def delete_queryset(self, request, queryset):
+        # "Delete selected" goes through each row's delete(), like the
+        # change page, so every row leaves the supplier summary the same way
+        with write_transaction():
+            for obj in queryset:
+                obj.delete()
 
 
 @admin.register(ServiceOrder)
-class ServiceOrderAdmin(admin.ModelAdmin):
+class ServiceOrderAdmin(PortfolioTrackedAdmin):
     list_display = ['id', 'title', 'status', 'start_date', 'original_end_date']
     list_filter = ['status',]
     ordering = ['-created_at']
 
 
 @admin.register(ServiceOrderExtension)
-class ServiceOrderExtensionAdmin(admin.ModelAdmin):
+class ServiceOrderExtensionAdmin(PortfolioTrackedAdmin):
     list_display = ['id', 'status', 'new_end_date',]
     list_filter = ['status',]
     ordering = ['-created_at']
 
 
 @admin.register(ServiceOrderSubstitution)
-class ServiceOrderSubstitutionAdmin(admin.ModelAdmin):
+class ServiceOrderSubstitutionAdmin(PortfolioTrackedAdmin):
     list_display = ['id', 'status', 'outgoing_specialist_name', 'incoming_specialist_name']
     list_filter = ['status',]
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+
+@admin.register(SupplierPortfolioSummary)
+class SupplierPortfolioSummaryAdmin(admin.ModelAdmin):
+    list_display = ['supplier_id', 'supplier_name', 'active_order_count', 'total_current_contract_value', 'updated_at']
+    ordering = ['supplier_id']
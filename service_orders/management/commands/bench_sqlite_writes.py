@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config.db import serialized_writes
+
+
+SCHEMA = """
+CREATE TABLE service_order (id INTEGER PRIMARY KEY, status TEXT, updated_at REAL);
+CREATE TABLE extension (
+    id INTEGER PRIMARY KEY,
+    service_order_id INTEGER REFERENCES service_order (id),
+    reason TEXT,
+    created_at REAL
+);
+"""
+
+PROFILES = ('baseline', 'tuned', 'serialized')
+
+
+def connect(path, profile):
+    if profile == 'baseline':
+        # Django's stock sqlite3 connection: rollback journal, 5s timeout
+        return sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+
+    conn = sqlite3.connect(
+        path,
+        timeout=settings.SQLITE_PRAGMAS['busy_timeout'] / 1000,
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def write_extension(conn, begin, order_id):
+    """
+    The ExtensionCreateSerializer.create write: read the order, insert the
+    extension, flip the order's status
+    """
+    conn.execute(begin)
+    try:
+        conn.execute("SELECT status FROM service_order WHERE id = ?", (order_id,)).fetchone()
+        conn.execute(
+            "INSERT INTO extension (service_order_id, reason, created_at) VALUES (?, ?, ?)",
+            (order_id, 'More work', time.time()),
+        )
+        conn.execute(
+            "UPDATE service_order SET status = 'PENDING_EXTENSION', updated_at = ? WHERE id = ?",
+            (time.time(), order_id),
+        )
+        conn.execute("COMMIT")
+    except sqlite3.OperationalError:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def run_profile(profile, *, workers, transactions, orders):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+
+        setup = connect(path, profile)
+        setup.executescript(SCHEMA)
+        setup.executemany(
+            "INSERT INTO service_order (id, status, updated_at) VALUES (?, 'ACTIVE', 0)",
+            [(i,) for i in range(orders)],
+        )
+        setup.close()
+
+        if profile == 'baseline' or not settings.SQLITE_TRANSACTION_MODE:
+            begin = "BEGIN"
+        else:
+            begin = f"BEGIN {settings.SQLITE_TRANSACTION_MODE}"
+
+        committed = [0] * workers
+        locked = [0] * workers
+        start = threading.Barrier(workers)
+
+        def worker(index):
+            conn = connect(path, profile)
+            start.wait()
+            for i in range(transactions):
+                slot = serialized_writes() if profile == 'serialized' else nullcontext()
+                try:
+                    with slot:
+                        write_extension(conn, begin, (index * transactions + i) % orders)
+                    committed[index] += 1
+                except sqlite3.OperationalError:
+                    locked[index] += 1
+            conn.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(workers)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+    return sum(committed), sum(locked), elapsed
+
+
+class Command(BaseCommand):
+    help = ("Measure concurrent write throughput on a scratch SQLite file with the stock "
+            "connection settings and with the SQLITE_* tuning from settings.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Concurrent writer threads, one connection each.')
+        parser.add_argument('--transactions', type=int, default=200,
+                            help='Write transactions per worker.')
+        parser.add_argument('--orders', type=int, default=100,
+                            help='Service orders the writes are spread over.')
+        parser.add_argument('--profile', action='append', choices=PROFILES, dest='profiles',
+                            help='Profile to run (repeatable; default: all).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'profile':<12}{'committed':>10}{'locked':>8}{'seconds':>9}{'tx/s':>9}")
+
+        for profile in options['profiles'] or PROFILES:
+            committed, locked, elapsed = run_profile(
+                profile,
+                workers=options['workers'],
+                transactions=options['transactions'],
+                orders=options['orders'],
+            )
+            self.stdout.write(
+                f"{profile:<12}{committed:>10}{locked:>8}{elapsed:>9.2f}{committed / elapsed:>9.0f}"
+            )
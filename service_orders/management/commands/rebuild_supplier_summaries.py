@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from service_orders.models import ServiceOrder, SupplierPortfolioSummary
+
+
+class Command(BaseCommand):
+    help = "Recount SupplierPortfolioSummary rows from the service orders (backfill or repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('supplier_ids', nargs='*',
+                            help='Suppliers to rebuild (default: every supplier with orders).')
+
+    def handle(self, *args, **options):
+        supplier_ids = options['supplier_ids'] or (
+            ServiceOrder.objects.order_by().values_list('supplier_id', flat=True).distinct()
+        )
+
+        rebuilt = 0
+        for supplier_id in supplier_ids:
+            SupplierPortfolioSummary.rebuild(supplier_id)
+            rebuilt += 1
+
+        # Rows for suppliers whose orders are all gone
+        SupplierPortfolioSummary.objects.exclude(
+            supplier_id__in=ServiceOrder.objects.values('supplier_id')
+        ).delete()
+
+        self.stdout.write(f"Rebuilt {rebuilt} supplier summaries")
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_orders', '0003_alter_serviceorder_domain_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['created_at', 'id'], name='serviceorder_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceorderextension',
+            index=models.Index(fields=['created_at', 'id'], name='extension_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceordersubstitution',
+            index=models.Index(fields=['created_at', 'id'], name='substitution_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_orders', '0004_created_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['supplier_id', 'created_at', 'id'], name='serviceorder_supplier_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceorderextension',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='extension_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceorderextension',
+            index=models.Index(fields=['service_order', 'created_at'], name='extension_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceordersubstitution',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='substitution_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceordersubstitution',
+            index=models.Index(fields=['service_order', 'created_at'], name='substitution_order_idx'),
+        ),
+    ]
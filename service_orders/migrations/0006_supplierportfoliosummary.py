@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_orders', '0005_filter_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierPortfolioSummary',
+            fields=[
+                ('supplier_id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('supplier_name', models.CharField(blank=True, max_length=30)),
+                ('order_count', models.IntegerField(default=0)),
+                ('active_order_count', models.IntegerField(default=0)),
+                ('total_current_contract_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_original_contract_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('committed_man_days', models.IntegerField(default=0)),
+                ('extension_count', models.IntegerField(default=0)),
+                ('approved_extension_count', models.IntegerField(default=0)),
+                ('substitution_count', models.IntegerField(default=0)),
+                ('approved_substitution_count', models.IntegerField(default=0)),
+                ('remaining_man_days', models.IntegerField(blank=True, null=True)),
+                ('remaining_as_of', models.DateField(blank=True, null=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
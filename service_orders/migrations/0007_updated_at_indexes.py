@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_orders', '0006_supplierportfoliosummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['updated_at'], name='serviceorder_updated_idx'),
+        ),
+    ]
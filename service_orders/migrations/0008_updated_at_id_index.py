@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_orders', '0007_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='serviceorder',
+            name='serviceorder_updated_idx',
+        ),
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['updated_at', 'id'], name='serviceorder_updated_id_idx'),
+        ),
+    ]
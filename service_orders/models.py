@@ -1,10 +1,222 @@
 from django.db import models
+from django.db.models.signals import class_prepared, post_delete, post_save
+from django.dispatch import receiver
 from django.core.validators import MinValueValidator
+from django.db.models.functions import Cast, Greatest
+from django.utils import timezone
 from datetime import date
 import uuid
 
+from config.db import write_transaction
+
+
+class JulianDay(models.Func):
+    """
+    Date as a fractional day number, so date differences are plain arithmetic
+    """
+    function = 'julianday'
+    output_field = models.FloatField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='EXTRACT(JULIAN FROM %(expressions)s)', **extra_context)
+
+
+class PortfolioTrackedQuerySet(models.QuerySet):
+    """
+    ``update()`` sends no signals, so an update touching portfolio fields
+    recounts the suppliers it affected instead.
+    """
+
+    def update(self, **kwargs):
+        fields = self.model.portfolio_fields
+        if not any(name in fields or f'{name}_id' in fields for name in kwargs):
+            return super().update(**kwargs)
+
+        lookup = self.model.portfolio_supplier_lookup
+        with write_transaction():
+            pks = list(self.values_list('pk', flat=True))
+            rows = self.model._base_manager.filter(pk__in=pks)
+            suppliers = set(rows.values_list(lookup, flat=True))
+            updated = super().update(**kwargs)
+            suppliers.update(rows.values_list(lookup, flat=True))
+
+            for supplier_id in suppliers - {None}:
+                SupplierPortfolioSummary.rebuild(supplier_id)
+
+        return updated
+
+
+class ServiceOrderQuerySet(PortfolioTrackedQuerySet):
+
+    def with_man_days(self, as_of=None):
+        """
+        Annotate ``consumed_man_days``/``remaining_man_days`` as of ``as_of``
+        (default today), computed in SQL exactly like the model properties,
+        so orders can be filtered and sorted on them.
+        """
+        as_of = models.Value(as_of or date.today(), output_field=models.DateField())
+
+        elapsed_days = JulianDay(as_of) - JulianDay('start_date')
+        total_days = JulianDay('current_end_date') - JulianDay('start_date')
+
+        consumed = models.Case(
+            models.When(
+                models.Q(start_date__isnull=True) | models.Q(current_end_date__isnull=True) | models.Q(current_man_days=0),
+                then=0,
+            ),
+            models.When(start_date__gt=as_of, then=0),
+            models.When(current_end_date__lte=as_of, then=models.F('current_man_days')),
+            models.When(current_end_date__lte=models.F('start_date'), then=0),
+            default=Cast(elapsed_days / total_days * models.F('current_man_days'), models.IntegerField()),
+            output_field=models.IntegerField(),
+        )
+
+        return self.annotate(consumed_man_days=consumed).annotate(
+            remaining_man_days=Greatest(models.F('current_man_days') - models.F('consumed_man_days'), 0),
+        )
+
+    def with_latest_changes(self):
+        """
+        Annotate the id/status of each order's latest extension and
+        substitution, so serializing a page of orders needs no per-row queries.
+        """
+        latest_extension = (
+            ServiceOrderExtension.objects
+            .filter(service_order=models.OuterRef('pk'))
+            .order_by('-created_at')
+        )
+        latest_substitution = (
+            ServiceOrderSubstitution.objects
+            .filter(service_order=models.OuterRef('pk'))
+            .order_by('-created_at')
+        )
+
+        return self.annotate(
+            latest_extension_id=models.Subquery(latest_extension.values('id')[:1]),
+            latest_extension_status=models.Subquery(latest_extension.values('status')[:1]),
+            latest_substitution_id=models.Subquery(latest_substitution.values('id')[:1]),
+            latest_substitution_status=models.Subquery(latest_substitution.values('status')[:1]),
+        )
+
+    def with_changes_updated_at(self):
+        """
+        Annotate the latest ``updated_at`` of each order's extensions and
+        substitutions, for validators of payloads that show their status.
+        """
+        def latest_update(model):
+            return models.Subquery(
+                model.objects
+                .filter(service_order=models.OuterRef('pk'))
+                .order_by()
+                .values('service_order')
+                .annotate(latest=models.Max('updated_at'))
+                .values('latest')
+            )
+
+        return self.annotate(
+            extensions_updated_at=latest_update(ServiceOrderExtension),
+            substitutions_updated_at=latest_update(ServiceOrderSubstitution),
+        )
+
+
+class PortfolioTrackedModel(models.Model):
+    """
+    Keeps SupplierPortfolioSummary in step with saves and deletes.
+
+    Subclasses name the fields their contribution depends on
+    (``portfolio_fields``) and turn a snapshot of them into the supplier
+    and counter deltas they add. The snapshot taken when a row is loaded is
+    diffed against the one after save, so only real changes hit the summary.
+
+    The summary follows ``post_save``/``post_delete``, so queryset and admin
+    deletes keep it current too. ``bulk_create()`` sends no signals: rebuild
+    the suppliers after one.
+    """
+    portfolio_fields = ()
+
+    # Lookup from the model to its supplier, for PortfolioTrackedQuerySet
+    portfolio_supplier_lookup = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in instance.portfolio_fields):
+            instance._portfolio_loaded = instance._portfolio_snapshot()
+        return instance
+
+    def _portfolio_snapshot(self):
+        return tuple(getattr(self, field) for field in self.portfolio_fields)
+
+    def portfolio_supplier_id(self, snapshot):
+        """
+        Supplier the row counts towards, given a snapshot of portfolio_fields
+        """
+        raise NotImplementedError(f'{type(self).__name__} must implement portfolio_supplier_id()')
+
+    def portfolio_contribution(self, snapshot):
+        """
+        ``{counter: delta}`` the row adds to its supplier's summary, given a
+        snapshot of portfolio_fields
+        """
+        raise NotImplementedError(f'{type(self).__name__} must implement portfolio_contribution()')
+
+    def save(self, *args, **kwargs):
+        # post_save updates the summary in the same transaction as the row
+        with write_transaction():
+            super().save(*args, **kwargs)
+
+    def portfolio_saved(self, created):
+        before = None if created else self.__dict__.get('_portfolio_loaded')
+        after = self._portfolio_snapshot()
+
+        if created:
+            SupplierPortfolioSummary.apply(self.portfolio_supplier_id(after), self.portfolio_contribution(after))
+        elif before is None:
+            # Loaded without the tracked fields: nothing to diff against
+            SupplierPortfolioSummary.rebuild(self.portfolio_supplier_id(after))
+        elif before != after:
+            SupplierPortfolioSummary.apply_change(
+                self.portfolio_supplier_id(before), self.portfolio_contribution(before),
+                self.portfolio_supplier_id(after), self.portfolio_contribution(after),
+            )
+
+        self._portfolio_loaded = after
+
+    def portfolio_deleted(self, origin=None):
+        snapshot = self.__dict__.get('_portfolio_loaded') or self._portfolio_snapshot()
+        SupplierPortfolioSummary.apply(
+            self.portfolio_supplier_id(snapshot),
+            {name: -value for name, value in self.portfolio_contribution(snapshot).items()},
+        )
+
+
+def _portfolio_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        instance.portfolio_saved(created)
+
+
+def _portfolio_deleted(sender, instance, origin=None, **kwargs):
+    instance.portfolio_deleted(origin)
+
+
+def _deleted_model(origin):
+    return origin.model if isinstance(origin, models.QuerySet) else type(origin)
+
+
+@receiver(class_prepared)
+def _track_portfolio(sender, **kwargs):
+    # Per model, so untracked models keep Django's fast (signal-free) deletes
+    if issubclass(sender, PortfolioTrackedModel):
+        post_save.connect(_portfolio_saved, sender=sender)
+        post_delete.connect(_portfolio_deleted, sender=sender)
+
+
+class ServiceOrder(PortfolioTrackedModel):
+    ACTIVE_STATUSES = ['ACTIVE', 'PENDING_EXTENSION', 'PENDING_SUBSTITUTION']
 
-class ServiceOrder(models.Model):
     STATUS_CHOICES = [
         ('ACTIVE', 'Active'),
         ('COMPLETED', 'Completed'),
@@ -49,11 +261,46 @@ class ServiceOrder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ServiceOrderQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='serviceorder_created_id_idx'),
+            models.Index(fields=['supplier_id', 'created_at', 'id'], name='serviceorder_supplier_idx'),
+            # Covers the id too, which the extension/substitution validators
+            # join on, so list validators never read the table
+            models.Index(fields=['updated_at', 'id'], name='serviceorder_updated_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title}"
+
+    portfolio_supplier_lookup = 'supplier_id'
+    portfolio_fields = (
+        'supplier_id', 'status', 'current_contract_value', 'original_contract_value',
+        'current_man_days', 'start_date', 'current_end_date',
+    )
+
+    def portfolio_supplier_id(self, snapshot):
+        return snapshot[0]
+
+    def portfolio_contribution(self, snapshot):
+        _, status, current_value, original_value, man_days, _, _ = snapshot
+        active = status in self.ACTIVE_STATUSES
+        return {
+            'order_count': 1,
+            'active_order_count': int(active),
+            'total_current_contract_value': current_value if active else 0,
+            'total_original_contract_value': original_value if active else 0,
+            'committed_man_days': man_days if active else 0,
+        }
+
+    def portfolio_deleted(self, origin=None):
+        # Extensions and substitutions went with the order; recount instead
+        # of subtracting every cascaded row
+        snapshot = self.__dict__.get('_portfolio_loaded') or self._portfolio_snapshot()
+        SupplierPortfolioSummary.rebuild(self.portfolio_supplier_id(snapshot))
     
     @property
     def is_active(self):
@@ -61,6 +308,10 @@ class ServiceOrder(models.Model):
     
     @property
     def consumed_man_days(self) -> int:
+        # Set by ServiceOrderQuerySet.with_man_days()
+        if '_consumed_man_days' in self.__dict__:
+            return self._consumed_man_days
+
         if not self.start_date or not self.current_end_date or not self.current_man_days:
             return 0
 
@@ -87,11 +338,22 @@ class ServiceOrder(models.Model):
         
         return consumed
 
+    @consumed_man_days.setter
+    def consumed_man_days(self, value):
+        self._consumed_man_days = value
+
     @property
     def remaining_man_days(self) -> int:
+        if '_remaining_man_days' in self.__dict__:
+            return self._remaining_man_days
+
         if not self.current_man_days:
             return 0
         return max(0, self.current_man_days - self.consumed_man_days)
+
+    @remaining_man_days.setter
+    def remaining_man_days(self, value):
+        self._remaining_man_days = value
     
     @property
     def has_been_extended(self):
@@ -109,7 +371,7 @@ class ServiceOrder(models.Model):
         return self.status in ['ACTIVE', 'PENDING_SUBSTITUTION']
 
 
-class ServiceOrderExtension(models.Model):
+class ServiceOrderExtension(PortfolioTrackedModel):
     STATUS_CHOICES = [
         ('PENDING_SUPPLIER', 'Pending Supplier Approval'),
         ('PENDING_CLIENT', 'Pending Client Approval'),
@@ -129,15 +391,43 @@ class ServiceOrderExtension(models.Model):
     
     created_at   = models.DateTimeField(auto_now_add=True)
     updated_at   = models.DateTimeField(auto_now=True)
+
+    objects = PortfolioTrackedQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='extension_created_id_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='extension_status_idx'),
+            models.Index(fields=['service_order', 'created_at'], name='extension_order_idx'),
+        ]
+
+    portfolio_supplier_lookup = 'service_order__supplier_id'
+    portfolio_fields = ('service_order_id', 'status')
+
+    def portfolio_supplier_id(self, snapshot):
+        if snapshot[0] == self.service_order_id:
+            return self.service_order.supplier_id
+        return ServiceOrder.objects.filter(pk=snapshot[0]).values_list('supplier_id', flat=True).first()
+
+    def portfolio_contribution(self, snapshot):
+        return {
+            'extension_count': 1,
+            'approved_extension_count': int(snapshot[1] == 'APPROVED'),
+        }
+
+    def portfolio_deleted(self, origin=None):
+        # Deleted along with its order, whose rebuild recounts it
+        if _deleted_model(origin) is not ServiceOrder:
+            super().portfolio_deleted(origin)
     
+    @write_transaction()
     def approve(self):
         self.status = 'APPROVED'
         self._apply_extension()
         self.save()
     
+    @write_transaction()
     def reject(self, reason):
         self.rejection_reason = reason
         self.status = 'REJECTED'
@@ -155,7 +445,7 @@ class ServiceOrderExtension(models.Model):
         service_order.save()
 
 
-class ServiceOrderSubstitution(models.Model):
+class ServiceOrderSubstitution(PortfolioTrackedModel):
     STATUS_CHOICES = [
         ('PENDING_SUPPLIER', 'Pending Supplier Approval'),
         ('PENDING_CLIENT', 'Pending Client Approval'),
@@ -199,10 +489,37 @@ class ServiceOrderSubstitution(models.Model):
     
     created_at   = models.DateTimeField(auto_now_add=True)
     updated_at   = models.DateTimeField(auto_now=True)
+
+    objects = PortfolioTrackedQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='substitution_created_id_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='substitution_status_idx'),
+            models.Index(fields=['service_order', 'created_at'], name='substitution_order_idx'),
+        ]
+
+    portfolio_supplier_lookup = 'service_order__supplier_id'
+    portfolio_fields = ('service_order_id', 'status')
+
+    def portfolio_supplier_id(self, snapshot):
+        if snapshot[0] == self.service_order_id:
+            return self.service_order.supplier_id
+        return ServiceOrder.objects.filter(pk=snapshot[0]).values_list('supplier_id', flat=True).first()
+
+    def portfolio_contribution(self, snapshot):
+        return {
+            'substitution_count': 1,
+            'approved_substitution_count': int(snapshot[1] == 'APPROVED'),
+        }
+
+    def portfolio_deleted(self, origin=None):
+        # Deleted along with its order, whose rebuild recounts it
+        if _deleted_model(origin) is not ServiceOrder:
+            super().portfolio_deleted(origin)
     
+    @write_transaction()
     def reject(self, reason):
         self.rejection_reason = reason
         self.status = 'REJECTED'
@@ -211,3 +528,122 @@ class ServiceOrderSubstitution(models.Model):
         service_order = self.service_order
         service_order.status = 'ACTIVE'
         service_order.save()
+
+
+class SupplierPortfolioSummary(models.Model):
+    """
+    Per-supplier totals kept current by PortfolioTrackedModel. Contract
+    values and man-days cover the supplier's active orders.
+
+    Remaining man-days depend on the date, so they are recomputed lazily:
+    at most once a day, or after the supplier's orders changed.
+    """
+    supplier_id = models.CharField(max_length=64, primary_key=True)
+    supplier_name = models.CharField(max_length=30, blank=True)
+
+    order_count = models.IntegerField(default=0)
+    active_order_count = models.IntegerField(default=0)
+    total_current_contract_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_original_contract_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    committed_man_days = models.IntegerField(default=0)
+
+    extension_count = models.IntegerField(default=0)
+    approved_extension_count = models.IntegerField(default=0)
+    substitution_count = models.IntegerField(default=0)
+    approved_substitution_count = models.IntegerField(default=0)
+
+    remaining_man_days = models.IntegerField(null=True, blank=True)
+    remaining_as_of = models.DateField(null=True, blank=True)
+
+    # Bumped by every change, so a stale remaining_man_days is never stored
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.supplier_id
+
+    @classmethod
+    def apply(cls, supplier_id, deltas):
+        """
+        Add ``deltas`` to the supplier's counters in one UPDATE, or build the
+        row from the supplier's orders if it does not exist yet.
+        """
+        if supplier_id is None:
+            return
+
+        updated = cls.objects.filter(pk=supplier_id).update(
+            **{name: models.F(name) + value for name, value in deltas.items() if value},
+            version=models.F('version') + 1,
+            remaining_as_of=None,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            cls.rebuild(supplier_id)
+
+    @classmethod
+    def apply_change(cls, before_supplier_id, before, after_supplier_id, after):
+        if before_supplier_id == after_supplier_id:
+            cls.apply(after_supplier_id, {name: after[name] - before[name] for name in after})
+        else:
+            cls.apply(before_supplier_id, {name: -value for name, value in before.items()})
+            cls.apply(after_supplier_id, after)
+
+    @classmethod
+    def rebuild(cls, supplier_id):
+        """
+        Recount a supplier from scratch; drops the row if it has no orders left
+        """
+        orders = ServiceOrder.objects.filter(supplier_id=supplier_id)
+        active = models.Q(status__in=ServiceOrder.ACTIVE_STATUSES)
+        approved = models.Q(status='APPROVED')
+
+        totals = orders.aggregate(
+            order_count=models.Count('pk'),
+            active_order_count=models.Count('pk', filter=active),
+            total_current_contract_value=models.Sum('current_contract_value', filter=active, default=0),
+            total_original_contract_value=models.Sum('original_contract_value', filter=active, default=0),
+            committed_man_days=models.Sum('current_man_days', filter=active, default=0),
+        )
+        if not totals['order_count']:
+            cls.objects.filter(pk=supplier_id).delete()
+            return None
+
+        totals.update(ServiceOrderExtension.objects.filter(service_order__supplier_id=supplier_id).aggregate(
+            extension_count=models.Count('pk'),
+            approved_extension_count=models.Count('pk', filter=approved),
+        ))
+        totals.update(ServiceOrderSubstitution.objects.filter(service_order__supplier_id=supplier_id).aggregate(
+            substitution_count=models.Count('pk'),
+            approved_substitution_count=models.Count('pk', filter=approved),
+        ))
+        totals['supplier_name'] = orders.order_by('-created_at').values_list('supplier_name', flat=True).first()
+
+        summary, created = cls.objects.get_or_create(pk=supplier_id, defaults=totals)
+        if not created:
+            cls.objects.filter(pk=supplier_id).update(
+                **totals,
+                version=models.F('version') + 1,
+                remaining_as_of=None,
+                updated_at=timezone.now(),
+            )
+            summary.refresh_from_db()
+        return summary
+
+    def refresh_remaining(self, as_of=None):
+        as_of = as_of or date.today()
+        if self.remaining_as_of == as_of:
+            return
+
+        remaining = (
+            ServiceOrder.objects
+            .filter(supplier_id=self.supplier_id, status__in=ServiceOrder.ACTIVE_STATUSES)
+            .with_man_days(as_of)
+            .aggregate(total=models.Sum('remaining_man_days', default=0))['total']
+        )
+
+        SupplierPortfolioSummary.objects.filter(pk=self.pk, version=self.version).update(
+            remaining_man_days=remaining,
+            remaining_as_of=as_of,
+        )
+        self.remaining_man_days = remaining
+        self.remaining_as_of = as_of
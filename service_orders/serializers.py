@@ -3,9 +3,11 @@ from decimal import Decimal
 from django.utils import timezone
 
 from .models import *
+from config.db import write_transaction
+from config.timing import TimedModelSerializer
 
 
-class ServiceOrderDetailSerializer(serializers.ModelSerializer):
+class ServiceOrderDetailSerializer(TimedModelSerializer):
     consumed_man_days = serializers.ReadOnlyField()
     remaining_man_days = serializers.ReadOnlyField()
     has_been_extended = serializers.ReadOnlyField()
@@ -27,32 +29,43 @@ class ServiceOrderDetailSerializer(serializers.ModelSerializer):
     def get_can_request_substitution(self, obj):
         return obj.can_request_substitution()
     
+    def _latest(self, obj, relation):
+        """
+        (id, status) of the latest extension/substitution, read from the
+        ServiceOrderQuerySet.with_latest_changes() annotations when present
+        """
+        if hasattr(obj, f'latest_{relation}_id'):
+            return getattr(obj, f'latest_{relation}_id'), getattr(obj, f'latest_{relation}_status')
+
+        latest = getattr(obj, f'{relation}s').order_by('-created_at').values_list('id', 'status').first()
+        return latest or (None, None)
+
     def get_pending_extension_id(self, obj):
-        latest_extension = obj.extensions.order_by('-created_at').first()
+        latest_id, latest_status = self._latest(obj, 'extension')
         
-        if latest_extension and latest_extension.status == 'PENDING_SUPPLIER':
-            return latest_extension.id
+        if latest_status == 'PENDING_SUPPLIER':
+            return latest_id
         
         return None
 
     def get_pending_substitution_id(self, obj):
-        latest_subs = obj.substitutions.order_by('-created_at').first()
+        latest_id, latest_status = self._latest(obj, 'substitution')
         
-        if latest_subs and latest_subs.status == 'PENDING_SUPPLIER':
-            return latest_subs.id
+        if latest_status == 'PENDING_SUPPLIER':
+            return latest_id
         
         return None
 
     def get_pm_pending_subid(self, obj):
-        latest_subs = obj.substitutions.order_by('-created_at').first()
+        latest_id, latest_status = self._latest(obj, 'substitution')
         
-        if latest_subs and latest_subs.status == 'PENDING_CLIENT':
-            return latest_subs.id
+        if latest_status == 'PENDING_CLIENT':
+            return latest_id
         
         return None
 
 
-class ServiceOrderCreateSerializer(serializers.ModelSerializer):
+class ServiceOrderCreateSerializer(TimedModelSerializer):
     class Meta:
         model = ServiceOrder
         fields = [
@@ -83,7 +96,7 @@ class ServiceOrderCreateSerializer(serializers.ModelSerializer):
         return data
 
 
-class ServiceOrderUpdateSerializer(serializers.ModelSerializer):
+class ServiceOrderUpdateSerializer(TimedModelSerializer):
     class Meta:
         model = ServiceOrder
         fields = [
@@ -95,7 +108,7 @@ class ServiceOrderUpdateSerializer(serializers.ModelSerializer):
 # ====================
 # EXTENSION SERIALIZERS
 # ====================
-class ExtensionDetailSerializer(serializers.ModelSerializer):
+class ExtensionDetailSerializer(TimedModelSerializer):
     service_order_title = serializers.CharField(
         source='service_order.title',
         read_only=True
@@ -115,7 +128,7 @@ class ExtensionDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class ExtensionCreateSerializer(serializers.ModelSerializer):
+class ExtensionCreateSerializer(TimedModelSerializer):
     class Meta:
         model = ServiceOrderExtension
         fields = [
@@ -148,6 +161,7 @@ class ExtensionCreateSerializer(serializers.ModelSerializer):
         
         return data
     
+    @write_transaction()
     def create(self, validated_data):
         extension = super().create(validated_data)
         service_order = extension.service_order
@@ -160,7 +174,7 @@ class ExtensionCreateSerializer(serializers.ModelSerializer):
 # ====================
 # SUBSTITUTION SERIALIZERS
 # ====================
-class SubstitutionDetailSerializer(serializers.ModelSerializer):
+class SubstitutionDetailSerializer(TimedModelSerializer):
     class Meta:
         model = ServiceOrderSubstitution
         fields = '__all__'
@@ -171,7 +185,7 @@ class SubstitutionDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class SubstitutionCreateSerializer(serializers.ModelSerializer):
+class SubstitutionCreateSerializer(TimedModelSerializer):
     class Meta:
         model = ServiceOrderSubstitution
         fields = [
@@ -205,6 +219,7 @@ class SubstitutionCreateSerializer(serializers.ModelSerializer):
         
         return data
     
+    @write_transaction()
     def create(self, validated_data):
         if validated_data['initiated_by'] == 'PROJECT_MANAGER':
             validated_data['status'] = 'PENDING_SUPPLIER'
@@ -220,7 +235,7 @@ class SubstitutionCreateSerializer(serializers.ModelSerializer):
         return substitution
 
 
-class SubstitutionInitiateSerializer(serializers.ModelSerializer):
+class SubstitutionInitiateSerializer(TimedModelSerializer):
     class Meta:
         model = ServiceOrderSubstitution
         fields = [
@@ -246,6 +261,7 @@ class SubstitutionInitiateSerializer(serializers.ModelSerializer):
         
         return data
     
+    @write_transaction()
     def create(self, validated_data):
         validated_data['status'] = 'PENDING_SUPPLIER'
         
@@ -256,3 +272,27 @@ class SubstitutionInitiateSerializer(serializers.ModelSerializer):
         service_order.save()
 
         return substitution
+
+
+# ====================
+# SUPPLIER SERIALIZERS
+# ====================
+class SupplierPortfolioSummarySerializer(TimedModelSerializer):
+    class Meta:
+        model = SupplierPortfolioSummary
+        fields = [
+            'supplier_id',
+            'supplier_name',
+            'order_count',
+            'active_order_count',
+            'total_current_contract_value',
+            'total_original_contract_value',
+            'committed_man_days',
+            'remaining_man_days',
+            'remaining_as_of',
+            'extension_count',
+            'approved_extension_count',
+            'substitution_count',
+            'approved_substitution_count',
+            'updated_at',
+        ]
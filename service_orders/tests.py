@@ -1,3 +1,407 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
 from django.test import TestCase
+from django.contrib import admin
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .admin import ServiceOrderAdmin
+from .urls import router as service_orders_router
+from .models import (
+    ServiceOrder,
+    ServiceOrderExtension,
+    ServiceOrderSubstitution,
+    SupplierPortfolioSummary,
+)
+from .management.commands.bench_sqlite_writes import run_profile
+from config.testing import EndpointBudgetMixin, QueryPlanAssertionsMixin
+
+
+def create_order(**overrides):
+    fields = {
+        'title': 'Backend developer',
+        'service_request_id': 'request-1',
+        'winning_offer_id': 'offer-1',
+        'supplier_id': 'supplier-1',
+        'supplier_name': 'Supplier',
+        'start_date': date.today() - timedelta(days=10),
+        'original_end_date': date.today() + timedelta(days=10),
+        'current_end_date': date.today() + timedelta(days=10),
+        'current_specialist_id': 'specialist-1',
+        'current_specialist_name': 'Specialist',
+        'original_specialist_id': 'specialist-1',
+        'original_specialist_name': 'Specialist',
+        'role': 'Developer',
+        'original_man_days': 20,
+        'current_man_days': 20,
+        'daily_rate': Decimal('500.00'),
+        'original_contract_value': Decimal('10000.00'),
+        'current_contract_value': Decimal('10000.00'),
+    }
+    fields.update(overrides)
+    return ServiceOrder.objects.create(**fields)
+
+
+def create_extension(order, **overrides):
+    fields = {
+        'service_order': order,
+        'additional_man_days': 5,
+        'new_end_date': order.current_end_date + timedelta(days=7),
+        'additional_cost': order.daily_rate * 5,
+        'reason': 'More work',
+    }
+    fields.update(overrides)
+    return ServiceOrderExtension.objects.create(**fields)
+
+
+def create_substitution(order, **overrides):
+    fields = {
+        'service_order': order,
+        'initiated_by': 'PROJECT_MANAGER',
+        'outgoing_specialist_id': order.current_specialist_id,
+        'outgoing_specialist_name': order.current_specialist_name,
+        'reason': 'OTHER',
+    }
+    fields.update(overrides)
+    return ServiceOrderSubstitution.objects.create(**fields)
+
+
+class ServiceOrderListQueryTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def seed(self, count):
+        for _ in range(count):
+            order = create_order()
+            create_extension(order, status='APPROVED')
+            create_extension(order)
+            create_substitution(order, status='PENDING_CLIENT')
+
+    def test_list_query_count_does_not_grow_with_orders(self):
+        # Conditional GET validators + the page itself
+        self.seed(3)
+        with self.assertNumQueries(2):
+            self.client.get('/api/orders/service-orders/')
+
+        self.seed(30)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/orders/service-orders/')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_ids_come_from_latest_extension_and_substitution(self):
+        order = create_order()
+        create_extension(order, status='REJECTED')
+        pending_extension = create_extension(order)
+        create_substitution(order, status='PENDING_SUPPLIER')
+        pending_client = create_substitution(order, status='PENDING_CLIENT')
+        other = create_order()
+        create_extension(other, status='APPROVED')
+
+        response = self.client.get(f'/api/orders/service-orders/{order.id}/')
+
+        self.assertEqual(response.data['pending_extension_id'], pending_extension.id)
+        self.assertIsNone(response.data['pending_substitution_id'])
+        self.assertEqual(response.data['pm_pending_subid'], pending_client.id)
+
+        response = self.client.get(f'/api/orders/service-orders/{other.id}/')
+
+        self.assertIsNone(response.data['pending_extension_id'])
+        self.assertIsNone(response.data['pm_pending_subid'])
+
+
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.orders = [create_order(title=f'Order {i}') for i in range(12)]
+
+    def test_pages_walk_newest_first_without_count(self):
+        seen = []
+        url = '/api/orders/service-orders/?page_size=5'
+
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            # The ETag aggregate, then the page without a COUNT
+            self.assertEqual(len(queries), 2)
+            self.assertNotIn('COUNT(', queries[1]['sql'].upper())
+
+            seen.extend(order['id'] for order in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, [str(order.id) for order in reversed(self.orders)])
+
+    def test_list_endpoints_use_cursor_envelope(self):
+        for url in (
+            '/api/orders/service-orders/',
+            '/api/orders/extensions/',
+            '/api/orders/substitutions/',
+            '/api/requests/service-requests/',
+            '/api/requests/service-offers/',
+        ):
+            response = self.client.get(url)
+            self.assertEqual(set(response.data), {'next', 'previous', 'results'}, url)
+
+
+class QueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    Hot list/filter paths must be served by index searches on a seeded
+    dataset: no full table scans and no temp B-tree sorts.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        statuses = ['PENDING_SUPPLIER', 'PENDING_CLIENT', 'APPROVED', 'REJECTED']
+        for i in range(60):
+            order = create_order(supplier_id=f'supplier-{i % 6}')
+            create_extension(order, status=statuses[i % 4])
+            create_substitution(order, status=statuses[(i + 1) % 4])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_order_list(self):
+        self.assertIndexedPlans(self.client.get, '/api/orders/service-orders/')
+
+    def test_order_list_by_supplier(self):
+        response = self.assertIndexedPlans(
+            self.client.get, '/api/orders/service-orders/', {'supplier_id': 'supplier-2', 'page_size': 3}
+        )
+        self.assertIndexedPlans(self.client.get, response.data['next'])
+
+    def test_order_detail(self):
+        order = ServiceOrder.objects.first()
+        self.assertIndexedPlans(self.client.get, f'/api/orders/service-orders/{order.id}/')
+
+    def test_extensions_by_status(self):
+        self.assertIndexedPlans(self.client.get, '/api/orders/extensions/', {'status': 'PENDING_SUPPLIER'})
+
+    def test_substitutions_by_status(self):
+        self.assertIndexedPlans(self.client.get, '/api/orders/substitutions/', {'status': 'PENDING_CLIENT'})
+
+
+class SQLiteTuningTests(TestCase):
+
+    def test_connections_apply_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            # 1 == NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_tuned_writers_do_not_hit_locked_errors(self):
+        for profile in ('tuned', 'serialized'):
+            committed, locked, _ = run_profile(profile, workers=4, transactions=25, orders=10)
+            self.assertEqual((committed, locked), (100, 0), profile)
+
+
+class ManDaysAnnotationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_annotations_match_properties(self):
+        today = date.today()
+        for start, end, man_days in [
+            (today + timedelta(days=5), today + timedelta(days=20), 10),   # not started
+            (today - timedelta(days=30), today - timedelta(days=1), 15),   # finished
+            (today - timedelta(days=30), today, 15),                       # ends today
+            (today - timedelta(days=7), today + timedelta(days=14), 20),
+            (today - timedelta(days=1), today + timedelta(days=2), 7),
+            (today - timedelta(days=3), today + timedelta(days=7), 10),
+            (None, today + timedelta(days=7), 10),
+        ]:
+            create_order(start_date=start, current_end_date=end, current_man_days=man_days)
+
+        for order in ServiceOrder.objects.with_man_days():
+            plain = ServiceOrder.objects.get(pk=order.pk)
+            self.assertEqual(order.consumed_man_days, plain.consumed_man_days)
+            self.assertEqual(order.remaining_man_days, plain.remaining_man_days)
+
+    def test_filter_and_order_by_remaining_man_days(self):
+        today = date.today()
+        almost_done = create_order(start_date=today - timedelta(days=90), current_end_date=today + timedelta(days=10))
+        halfway = create_order(start_date=today - timedelta(days=10), current_end_date=today + timedelta(days=10))
+        create_order(start_date=today, current_end_date=today + timedelta(days=60), current_man_days=60)
+
+        response = self.client.get('/api/orders/service-orders/', {
+            'remaining_lt': 20,
+            'ending_before': (today + timedelta(days=30)).isoformat(),
+            'ordering': 'remaining_man_days',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([order['id'] for order in response.data['results']], [str(almost_done.id), str(halfway.id)])
+        self.assertEqual([order['remaining_man_days'] for order in response.data['results']], [2, 10])
+
+    def test_rejects_malformed_filters(self):
+        for params in ({'remaining_lt': 'ten'}, {'ending_before': 'soon'}, {'ending_before': '2026-02-30'}):
+            response = self.client.get('/api/orders/service-orders/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class SupplierSummaryTests(TestCase):
+
+    COUNTERS = [
+        'order_count', 'active_order_count', 'total_current_contract_value', 'total_original_contract_value',
+        'committed_man_days', 'extension_count', 'approved_extension_count',
+        'substitution_count', 'approved_substitution_count',
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def counters(self, supplier_id):
+        return SupplierPortfolioSummary.objects.values(*self.COUNTERS).get(pk=supplier_id)
+
+    def test_incremental_updates_match_a_rebuild(self):
+        first = create_order()
+        second = create_order()
+        create_order(supplier_id='supplier-2')
+
+        extension = create_extension(first)
+        self.client.post(f'/api/orders/extensions/{extension.id}/approve_extension/', {'user_role': 'SUPPLIER_REP'})
+        rejected = create_extension(second)
+        self.client.post(f'/api/orders/extensions/{rejected.id}/reject/', {'user_role': 'SUPPLIER_REP', 'reason': 'No'})
+
+        substitution = create_substitution(second, status='PENDING_CLIENT')
+        self.client.post(f'/api/orders/substitutions/{substitution.id}/approve_substitution/', {'user_role': 'PROJECT_MANAGER'})
+        self.client.post(f'/api/orders/service-orders/{second.id}/complete/')
+
+        incremental = self.counters('supplier-1')
+        self.assertEqual(incremental['order_count'], 2)
+        self.assertEqual(incremental['active_order_count'], 1)
+        self.assertEqual(incremental['committed_man_days'], 25)
+        self.assertEqual(incremental['approved_extension_count'], 1)
+        self.assertEqual(incremental['approved_substitution_count'], 1)
+
+        SupplierPortfolioSummary.rebuild('supplier-1')
+        self.assertEqual(self.counters('supplier-1'), incremental)
+
+        first.delete()
+        self.assertEqual(self.counters('supplier-1')['extension_count'], 1)
+
+    def test_summary_endpoint_reads_one_row(self):
+        order = create_order(start_date=date.today() - timedelta(days=10), current_end_date=date.today() + timedelta(days=10))
+        create_extension(order)
+
+        self.client.get('/api/orders/suppliers/supplier-1/summary/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/orders/suppliers/supplier-1/summary/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['active_order_count'], 1)
+        self.assertEqual(response.data['remaining_man_days'], 10)
+        self.assertEqual(response.data['extension_count'], 1)
+
+        response = self.client.get('/api/orders/suppliers/unknown/summary/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_row_is_built_from_existing_orders(self):
+        create_order()
+        create_order()
+        SupplierPortfolioSummary.objects.all().delete()
+
+        response = self.client.get('/api/orders/suppliers/supplier-1/summary/')
+
+        self.assertEqual(response.data['order_count'], 2)
+
+    def test_queryset_writes_keep_the_summary_current(self):
+        orders = [create_order() for _ in range(4)]
+        for order in orders:
+            create_extension(order)
+
+        ServiceOrderExtension.objects.filter(service_order=orders[0]).update(status='APPROVED')
+        ServiceOrder.objects.filter(pk=orders[1].pk).update(status='COMPLETED')
+        ServiceOrder.objects.filter(pk__in=[orders[2].pk, orders[3].pk]).delete()
+
+        counters = self.counters('supplier-1')
+        self.assertEqual(counters['order_count'], 2)
+        self.assertEqual(counters['active_order_count'], 1)
+        self.assertEqual(counters['extension_count'], 2)
+        self.assertEqual(counters['approved_extension_count'], 1)
+
+        SupplierPortfolioSummary.rebuild('supplier-1')
+        self.assertEqual(self.counters('supplier-1'), counters)
+
+    def test_admin_bulk_delete_keeps_the_summary_current(self):
+        orders = [create_order() for _ in range(3)]
+        model_admin = ServiceOrderAdmin(ServiceOrder, admin.site)
+
+        model_admin.delete_queryset(None, ServiceOrder.objects.filter(pk__in=[orders[0].pk, orders[1].pk]))
+
+        self.assertEqual(self.counters('supplier-1')['order_count'], 1)
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.order = create_order()
+
+    def test_detail_revalidates_to_304_until_the_order_changes(self):
+        url = f'/api/orders/service-orders/{self.order.id}/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(f'{url}complete/')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_etag_tracks_filtered_rows(self):
+        url = '/api/orders/service-orders/?supplier_id=supplier-1'
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        create_order(supplier_id='supplier-2')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        create_order()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        ServiceOrder.objects.exclude(pk=self.order.pk).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+    def test_validators_follow_extension_changes(self):
+        extension = create_extension(self.order)
+        detail = f'/api/orders/service-orders/{self.order.id}/'
+        listing = '/api/orders/service-orders/'
+        etags = {url: self.client.get(url)['ETag'] for url in (detail, listing)}
+
+        # Rejected without touching the order
+        extension.status = 'REJECTED'
+        extension.save()
+
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etags[detail])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['pending_extension_id'])
+
+        response = self.client.get(listing, HTTP_IF_NONE_MATCH=etags[listing])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['results'][0]['pending_extension_id'])
+
 
-# Create your tests here.
+class EndpointBudgetTests(EndpointBudgetMixin, TestCase):
+    router = service_orders_router
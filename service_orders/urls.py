@@ -6,5 +6,6 @@ router = DefaultRouter()
 router.register(r"service-orders", ServiceOrderViewSet, basename="service-orders")
 router.register(r"extensions", ServiceOrderExtensionViewSet, basename="extensions")
 router.register(r"substitutions", ServiceOrderSubstitutionViewSet, basename="substitutions")
+router.register(r"suppliers", SupplierViewSet, basename="suppliers")
 
 urlpatterns = router.urls
\ No newline at end of file
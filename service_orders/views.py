@@ -1,31 +1,67 @@
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import date
 
 from .models import *
 from .serializers import *
+from config.conditional import ConditionalGetMixin
+from config.db import write_transaction
 
 
 # ====================
 # SERVICE ORDER VIEWSET
 # ====================
-class ServiceOrderViewSet(viewsets.ModelViewSet):
+class ServiceOrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ServiceOrder.objects.all()
     permission_classes = [AllowAny]
     
     # Ordering
-    ordering_fields = ['created_at']
-    ordering = ['-created_at']
+    ordering_fields = ['created_at', 'current_end_date', 'consumed_man_days', 'remaining_man_days']
+    ordering = ['-created_at', '-id']
+
+    # The payload shows the latest extension/substitution status
+    conditional_fields = ('updated_at', 'extensions_updated_at', 'substitutions_updated_at')
 
     def get_queryset(self):
-        qs = self.queryset
-        supplier_id = self.request.query_params.get("supplier_id")
+        qs = self.queryset.with_latest_changes().with_changes_updated_at().with_man_days()
+        params = self.request.query_params
+
+        supplier_id = params.get("supplier_id")
         if supplier_id:
             qs = qs.filter(supplier_id=supplier_id)
+
+        status_param = params.get("status")
+        if status_param:
+            qs = qs.filter(status=status_param)
+
+        remaining_lt = params.get("remaining_lt")
+        if remaining_lt:
+            try:
+                qs = qs.filter(remaining_man_days__lt=int(remaining_lt))
+            except ValueError:
+                raise ValidationError({'remaining_lt': 'Must be an integer.'})
+
+        ending_before = params.get("ending_before")
+        if ending_before:
+            try:
+                ending_before = parse_date(ending_before)
+            except ValueError:
+                ending_before = None
+            if ending_before is None:
+                raise ValidationError({'ending_before': 'Must be a date (YYYY-MM-DD).'})
+            qs = qs.filter(current_end_date__lt=ending_before)
+
         return qs
     
+    def get_etag_extra(self):
+        # consumed/remaining man-days move with the calendar
+        return date.today().isoformat()
+
     def get_serializer_class(self):
         if self.action == 'create':
             return ServiceOrderCreateSerializer
@@ -87,7 +123,14 @@ class ServiceOrderExtensionViewSet(viewsets.ModelViewSet):
     
     # Ordering
     ordering_fields = ['created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+
+    def get_queryset(self):
+        qs = self.queryset.select_related('service_order')
+        status_param = self.request.query_params.get("status")
+        if status_param:
+            qs = qs.filter(status=status_param)
+        return qs
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -163,7 +206,14 @@ class ServiceOrderSubstitutionViewSet(viewsets.ModelViewSet):
     
     # Ordering
     ordering_fields = ['created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+
+    def get_queryset(self):
+        qs = self.queryset
+        status_param = self.request.query_params.get("status")
+        if status_param:
+            qs = qs.filter(status=status_param)
+        return qs
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -221,8 +271,9 @@ class ServiceOrderSubstitutionViewSet(viewsets.ModelViewSet):
         # Approve the substitution
         substitution.status = 'APPROVED'
         service_order.status = 'ACTIVE'
-        service_order.save()        
-        substitution.save()
+        with write_transaction():
+            service_order.save()
+            substitution.save()
         
         response_serializer = SubstitutionDetailSerializer(substitution)
         return Response(response_serializer.data)
@@ -257,4 +308,31 @@ class ServiceOrderSubstitutionViewSet(viewsets.ModelViewSet):
         substitution.reject(reason=reason)
         
         response_serializer = SubstitutionDetailSerializer(substitution)
-        return Response(response_serializer.data)
\ No newline at end of file
+        return Response(response_serializer.data)
+
+
+# ====================
+# SUPPLIER VIEWSET
+# ====================
+
+class SupplierViewSet(viewsets.GenericViewSet):
+    queryset = SupplierPortfolioSummary.objects.all()
+    serializer_class = SupplierPortfolioSummarySerializer
+    permission_classes = [AllowAny]
+    lookup_field = 'supplier_id'
+    lookup_value_regex = '[^/]+'
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, supplier_id=None):
+        summary = self.get_queryset().filter(pk=supplier_id).first()
+        if summary is None:
+            # First read for a supplier whose orders predate the summary table
+            summary = SupplierPortfolioSummary.rebuild(supplier_id)
+        if summary is None:
+            return Response(
+                {'error': 'Supplier has no service orders'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        summary.refresh_remaining()
+        return Response(self.get_serializer(summary).data)
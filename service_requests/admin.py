@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ServiceRequest, ServiceOffer
+from .models import ServiceRequest, ServiceOffer, ProcessStartOutbox, ThirdPartySyncJob
 
 
 @admin.register(ServiceRequest)
@@ -15,4 +15,20 @@ class ServiceOfferAdmin(admin.ModelAdmin):
     list_display = ['id', 'status', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['id', 'service_request__id', 'provider_name']
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+
+@admin.register(ProcessStartOutbox)
+class ProcessStartOutboxAdmin(admin.ModelAdmin):
+    list_display = ['service_request', 'status', 'attempts', 'next_attempt_at']
+    list_filter = ['status']
+    search_fields = ['service_request__id']
+    ordering = ['-created_at']
+
+
+@admin.register(ThirdPartySyncJob)
+class ThirdPartySyncJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'coalesce_key', 'status', 'attempts', 'next_attempt_at']
+    list_filter = ['status']
+    search_fields = ['coalesce_key', 'url']
+    ordering = ['-created_at']
@@ -0,0 +1,227 @@
+"""
+Async variants of the task inbox endpoints for the ASGI stack.
+
+They mirror ``ServiceRequestViewSet.get_tasks``/``complete_task`` and
+``ServiceOfferViewSet.get_tasks``/``complete_task`` but await Flowable and
+the ORM instead of blocking a worker thread on every round trip. They are
+mounted in front of the DRF router when ``ASYNC_TASK_VIEWS`` is enabled
+(see ``service_requests/urls.py``).
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import ServiceRequest, ServiceOffer
+from .inbox import (
+    aenrich_request_tasks,
+    aenrich_offer_tasks,
+    aload_inbox,
+    inbox_headers,
+    inbox_page_params,
+    third_party_request_payload,
+)
+from .offers import AlreadyAwarded, decide_offer
+from .sync_jobs import enqueue_request_generate
+from config.db import write_transaction
+from config.dependencies import DependencyUnavailable
+from flowable_client import (
+    aget_task_variable,
+    acomplete_task,
+    ainvalidate_waiting_execution,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _response(data, status=status.HTTP_200_OK, headers=None):
+    # Same encoder as DRF's JSONRenderer so both stacks emit identical payloads
+    return JsonResponse(data, status=status, encoder=JSONEncoder, headers=headers)
+
+
+def _decision(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}').get('decision')
+        except (ValueError, AttributeError):
+            return None
+    return request.POST.get('decision')
+
+
+@sync_to_async
+def _save_request_decision(service_request, decision):
+    # Same transaction as the status change; delivered by the sync worker
+    with write_transaction():
+        service_request.status = "OPEN"
+        service_request.save()
+
+        if decision == "approved":
+            enqueue_request_generate(service_request, third_party_request_payload(service_request))
+
+
+@require_GET
+async def request_tasks(request):
+    group_id = request.GET.get('group', None)
+
+    if not group_id:
+        return _response({'count': 0, 'tasks': []})
+
+    try:
+        paging = inbox_page_params(request.GET)
+    except ValueError as e:
+        return _response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        data = await aload_inbox(group_id=group_id, paging=paging, aenrich=aenrich_request_tasks)
+
+        return _response(data, headers=inbox_headers(data))
+
+    except DependencyUnavailable as e:
+        return _response(
+            {'error': f'Failed to retrieve tasks: {str(e)}'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    except Exception as e:
+        return _response(
+            {'error': f'Failed to retrieve tasks: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@csrf_exempt
+@require_POST
+async def complete_request_task(request, task_id):
+    decision = _decision(request)
+
+    if not decision:
+        return _response(
+            {'error': 'No decision provided'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        task_info = await aget_task_variable(task_id=task_id)
+    except Exception:
+        return _response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    service_id = task_info['variables'].get('request_id')
+
+    if not service_id:
+        return _response(
+            {"error": "Task does not have request id"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        service_request = await ServiceRequest.objects.aget(id=service_id)
+    except ServiceRequest.DoesNotExist:
+        return _response(
+            {"error": "Service request not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    await _save_request_decision(service_request, decision)
+
+    # The process leaves (or re-enters) the offer wait state with this decision
+    if service_request.process_id:
+        await ainvalidate_waiting_execution(process_instance_id=service_request.process_id)
+
+    try:
+        await acomplete_task(task_id=task_id, decision=decision)
+    except Exception as e:
+        logger.exception("Failed to complete task %s", task_id)
+        return _response(
+            {'error': f'Failed to submit counter offer: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    return _response({'message': f'Initial validation {decision} successfully'})
+
+
+@require_GET
+async def offer_tasks(request):
+    group_id = request.GET.get('group', None)
+
+    if not group_id:
+        return _response({'count': 0, 'tasks': []})
+
+    try:
+        paging = inbox_page_params(request.GET)
+    except ValueError as e:
+        return _response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        data = await aload_inbox(group_id=group_id, paging=paging, aenrich=aenrich_offer_tasks)
+
+        return _response(data, headers=inbox_headers(data))
+
+    except DependencyUnavailable as e:
+        return _response(
+            {'error': f'Failed to retrieve tasks: {str(e)}'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    except Exception as e:
+        return _response(
+            {'error': f'Failed to retrieve tasks: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@csrf_exempt
+@require_POST
+async def complete_offer_task(request, task_id):
+    decision = _decision(request)
+
+    if not decision:
+        return _response(
+            {'error': 'No decision provided'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        task_info = await aget_task_variable(task_id=task_id)
+    except Exception:
+        return _response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    offer_id = task_info['variables'].get('offerId')
+
+    if not offer_id:
+        return _response(
+            {"error": "Task does not have offer id"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        # service_request is needed for the order; lazy loads are not allowed here
+        offer = await ServiceOffer.objects.select_related('service_request').aget(id=offer_id)
+    except ServiceOffer.DoesNotExist:
+        return _response(
+            {"error": "Service offer not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    # record the decision before completing the task; an accepted offer is
+    # awarded, and an acceptance that loses the race leaves its task open
+    try:
+        await sync_to_async(decide_offer)(offer, decision)
+    except AlreadyAwarded as e:
+        return _response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+    try:
+        await acomplete_task(task_id=task_id, decision=decision)
+    except Exception as e:
+        logger.exception("Failed to complete task %s", task_id)
+        return _response(
+            {'error': f'Failed to submit counter offer: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    return _response({'message': f'Initial validation {decision} successfully'})
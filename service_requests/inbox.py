@@ -0,0 +1,361 @@
+"""
+Helpers shared by the sync (DRF) and async (ASGI) task inbox views.
+"""
+import uuid
+from itertools import islice
+
+from .models import ServiceRequest, ServiceOffer
+from config import metrics
+from config.dependencies import DependencyUnavailable
+from flowable_client import (
+    TASK_SORT_FIELDS,
+    get_task_page,
+    iter_tasks_by_group,
+    get_cached_inbox,
+    set_cached_inbox,
+    get_stale_inbox,
+    aget_task_page,
+    aiter_tasks_by_group,
+    aget_cached_inbox,
+    aset_cached_inbox,
+    aget_stale_inbox,
+)
+
+
+INBOX_DEFAULT_PAGE_SIZE = 50
+INBOX_MAX_PAGE_SIZE = 500
+
+# Sent with an inbox served from the stale copy (RFC 7234 warn-code 110)
+STALE_WARNING = '110 - "Response is Stale"'
+
+
+REQUEST_TASK_FIELDS = [
+    'id', 'title', 'role_name', 'technology', 'specialization',
+    'experience_level', 'start_date', 'end_date', 'expected_man_days',
+    'criteria_json', 'task_description', 'offer_deadline',
+]
+
+OFFER_TASK_FIELDS = [
+    'id', 'provider_name', 'specialist_name', 'status',
+    'daily_rate', 'travel_cost', 'total_cost',
+]
+
+
+def request_task_data(task, service_request):
+    return {
+        'task_id': task['task_id'],
+        'task_name': task['task_name'],
+        'created_time': task['created_time'],
+        'service_request': {
+            'id': service_request.id,
+            'title': service_request.title,
+            'role_name': service_request.role_name,
+            'technology': service_request.technology,
+            'specialization': service_request.specialization,
+            'experience_level': service_request.experience_level,
+            'start_date': service_request.start_date,
+            'end_date': service_request.end_date,
+            'expected_man_days': service_request.expected_man_days,
+            'criteria_json': service_request.criteria_json,
+            'task_description': service_request.task_description,
+            'offer_deadline': service_request.offer_deadline,
+        }
+    }
+
+
+def offer_task_data(task, offer):
+    return {
+        'task_id': task['task_id'],
+        'task_name': task['task_name'],
+        'created_time': task['created_time'],
+        'offer': {
+            'id': offer.id,
+            'provider_name': offer.provider_name,
+            'specialist_name': offer.specialist_name,
+            'status': offer.status,
+            'daily_rate': offer.daily_rate,
+            'travel_cost': offer.travel_cost,
+            'total_cost': offer.total_cost,
+        }
+    }
+
+
+def _task_object_id(task, variable):
+    try:
+        return uuid.UUID(str(task['variables'].get(variable)))
+    except ValueError:
+        return None
+
+
+def _task_object_ids(tasks, variable):
+    ids = {_task_object_id(task, variable) for task in tasks}
+    ids.discard(None)
+    return ids
+
+
+def _join_tasks(tasks, variable, objects, build):
+    """
+    Pair each task with its local row, skipping tasks whose row is missing
+    """
+    enriched = []
+    for task in tasks:
+        obj = objects.get(_task_object_id(task, variable))
+        if obj is not None:
+            enriched.append(build(task, obj))
+    return enriched
+
+
+def enrich_request_tasks(tasks):
+    """
+    Attach ServiceRequest details to a page of Flowable tasks in one query
+    """
+    ids = _task_object_ids(tasks, 'request_id')
+    requests = ServiceRequest.objects.only(*REQUEST_TASK_FIELDS).in_bulk(ids) if ids else {}
+    return _join_tasks(tasks, 'request_id', requests, request_task_data)
+
+
+def enrich_offer_tasks(tasks):
+    """
+    Attach ServiceOffer details to a page of Flowable tasks in one query
+    """
+    ids = _task_object_ids(tasks, 'offerId')
+    offers = ServiceOffer.objects.only(*OFFER_TASK_FIELDS).in_bulk(ids) if ids else {}
+    return _join_tasks(tasks, 'offerId', offers, offer_task_data)
+
+
+async def aenrich_request_tasks(tasks):
+    ids = _task_object_ids(tasks, 'request_id')
+    requests = await ServiceRequest.objects.only(*REQUEST_TASK_FIELDS).ain_bulk(ids) if ids else {}
+    return _join_tasks(tasks, 'request_id', requests, request_task_data)
+
+
+async def aenrich_offer_tasks(tasks):
+    ids = _task_object_ids(tasks, 'offerId')
+    offers = await ServiceOffer.objects.only(*OFFER_TASK_FIELDS).ain_bulk(ids) if ids else {}
+    return _join_tasks(tasks, 'offerId', offers, offer_task_data)
+
+
+def inbox_page_params(query_params):
+    """
+    Parse the ?page=&page_size=&sort= inbox parameters.
+
+    ``page`` is optional: without it the whole group inbox is streamed from
+    Flowable. Raises ValueError with a client-facing message on bad input.
+    """
+    page = query_params.get('page') or None
+
+    try:
+        page = int(page) if page is not None else None
+        page_size = int(query_params.get('page_size') or INBOX_DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('page and page_size must be integers')
+
+    if (page is not None and page < 1) or not 1 <= page_size <= INBOX_MAX_PAGE_SIZE:
+        raise ValueError(f'page must be >= 1 and page_size between 1 and {INBOX_MAX_PAGE_SIZE}')
+
+    sort = query_params.get('sort') or None
+    if sort and sort.lstrip('-') not in TASK_SORT_FIELDS:
+        raise ValueError(f'sort must be one of {sorted(TASK_SORT_FIELDS)} (prefix "-" for descending)')
+
+    return {'page': page, 'page_size': page_size, 'sort': sort}
+
+
+def inbox_headers(data):
+    """
+    Response headers for a load_inbox result
+    """
+    return {'Warning': STALE_WARNING} if data.get('stale') else None
+
+
+def _mark_stale(data, group_id, cached_at):
+    metrics.INBOX_STALE_RESPONSES.inc(group=group_id)
+    data['stale'] = True
+    data['stale_as_of'] = cached_at.isoformat()
+    return data
+
+
+def load_inbox(*, group_id, paging, enrich):
+    """
+    Fetch and enrich a group's tasks: one Flowable page when ``page`` is
+    given, otherwise the whole inbox streamed in ``page_size`` chunks.
+
+    The Flowable side is served from the short-lived inbox cache when
+    possible; enrichment always reads the current local rows. While
+    Flowable's circuit is open the last good copy is served instead, marked
+    ``stale`` with its ``stale_as_of`` time; without one, the
+    DependencyUnavailable propagates.
+    """
+    page, page_size, sort = paging['page'], paging['page_size'], paging['sort']
+    cached_at = None
+
+    if page:
+        key, result = get_cached_inbox(group_id=group_id, variant=('page', page, page_size, sort))
+        if result is None:
+            try:
+                result = get_task_page(group_id=group_id, start=(page - 1) * page_size, size=page_size, sort=sort)
+            except DependencyUnavailable:
+                stale = get_stale_inbox(key)
+                if stale is None:
+                    raise
+                cached_at, result = stale
+            else:
+                set_cached_inbox(key, result)
+
+        tasks = enrich(result['tasks'])
+        data = {
+            'count': len(tasks),
+            'total': result['total'],
+            'page': page,
+            'page_size': page_size,
+            'tasks': tasks,
+        }
+        return _mark_stale(data, group_id, cached_at) if cached_at else data
+
+    key, cached = get_cached_inbox(group_id=group_id, variant=('all', sort))
+    if cached is None:
+        stream = iter_tasks_by_group(group_id=group_id, size=page_size, sort=sort)
+    else:
+        stream = iter(cached)
+
+    fetched = []
+    tasks = []
+    try:
+        while chunk := list(islice(stream, page_size)):
+            if cached is None:
+                fetched.extend(chunk)
+            tasks.extend(enrich(chunk))
+    except DependencyUnavailable:
+        stale = get_stale_inbox(key)
+        if stale is None:
+            raise
+        cached_at, cached = stale
+        tasks = []
+        for start in range(0, len(cached), page_size):
+            tasks.extend(enrich(cached[start:start + page_size]))
+        return _mark_stale({'count': len(tasks), 'tasks': tasks}, group_id, cached_at)
+
+    if cached is None:
+        set_cached_inbox(key, fetched)
+
+    return {'count': len(tasks), 'tasks': tasks}
+
+
+async def aload_inbox(*, group_id, paging, aenrich):
+    """
+    Async version of load_inbox
+    """
+    page, page_size, sort = paging['page'], paging['page_size'], paging['sort']
+    cached_at = None
+
+    if page:
+        key, result = await aget_cached_inbox(group_id=group_id, variant=('page', page, page_size, sort))
+        if result is None:
+            try:
+                result = await aget_task_page(group_id=group_id, start=(page - 1) * page_size, size=page_size, sort=sort)
+            except DependencyUnavailable:
+                stale = await aget_stale_inbox(key)
+                if stale is None:
+                    raise
+                cached_at, result = stale
+            else:
+                await aset_cached_inbox(key, result)
+
+        tasks = await aenrich(result['tasks'])
+        data = {
+            'count': len(tasks),
+            'total': result['total'],
+            'page': page,
+            'page_size': page_size,
+            'tasks': tasks,
+        }
+        return _mark_stale(data, group_id, cached_at) if cached_at else data
+
+    key, cached = await aget_cached_inbox(group_id=group_id, variant=('all', sort))
+    if cached is None:
+        fetched = []
+        tasks = []
+        chunk = []
+        try:
+            async for task in aiter_tasks_by_group(group_id=group_id, size=page_size, sort=sort):
+                fetched.append(task)
+                chunk.append(task)
+                if len(chunk) == page_size:
+                    tasks.extend(await aenrich(chunk))
+                    chunk = []
+            if chunk:
+                tasks.extend(await aenrich(chunk))
+        except DependencyUnavailable:
+            stale = await aget_stale_inbox(key)
+            if stale is None:
+                raise
+            cached_at, cached = stale
+        else:
+            await aset_cached_inbox(key, fetched)
+            return {'count': len(tasks), 'tasks': tasks}
+
+    tasks = []
+    for start in range(0, len(cached), page_size):
+        tasks.extend(await aenrich(cached[start:start + page_size]))
+    data = {'count': len(tasks), 'tasks': tasks}
+    return _mark_stale(data, group_id, cached_at) if cached_at else data
+
+
+def third_party_request_payload(service_request):
+    """
+    Payload for the 3rd party `requests/service-requests/generate/` push
+    """
+    return {
+        "external_id": str(service_request.id),
+        "title": service_request.title,
+        "role_name": service_request.role_name,
+        "technology": service_request.technology,
+        "specialization": service_request.specialization,
+        "experience_level": service_request.experience_level,
+        "start_date": service_request.start_date.isoformat(),
+        "end_date": service_request.end_date.isoformat(),
+        "expected_man_days": service_request.expected_man_days,
+        "criteria_json": {
+            "skills": service_request.criteria_json.get("skills", []),
+            "certifications": service_request.criteria_json.get("certifications", []),
+            "languages": service_request.criteria_json.get("languages", [])
+        },
+        "status": service_request.status,
+        "task_description": service_request.task_description,
+        "offer_deadline": service_request.offer_deadline.isoformat(),
+        "word_mode": "Remote"
+    }
+
+
+def offer_status_for(decision):
+    if decision == "final_approval":
+        return "ACCEPTED"
+    elif decision == "final_rejection":
+        return "REJECTED"
+    return "UNDER_REVIEW"
+
+
+def service_order_fields(offer):
+    """
+    ServiceOrder fields for an accepted offer (service_request must be loaded)
+    """
+    service_request = offer.service_request
+    return {
+        'title': service_request.title,
+        'service_request_id': str(service_request.id),
+        'winning_offer_id': str(offer.id),
+        'supplier_id': offer.provider_id,
+        'start_date': service_request.start_date,
+        'current_end_date': service_request.end_date,
+        'original_end_date': service_request.end_date,
+        'supplier_name': offer.provider_name,
+        'current_specialist_id': offer.specialist_id,
+        'current_specialist_name': offer.specialist_name,
+        'original_specialist_id': offer.specialist_id,
+        'original_specialist_name': offer.specialist_name,
+        'role': service_request.role_name,
+        'current_man_days': service_request.expected_man_days,
+        'original_man_days': service_request.expected_man_days,
+        'daily_rate': offer.daily_rate,
+        'original_contract_value': offer.total_cost,
+        'current_contract_value': offer.total_cost,
+    }
@@ -0,0 +1,460 @@
+import contextlib
+import io
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from fake_flowable import FakeFlowable, use_fake_flowable
+from service_requests.outbox import drain_process_starts
+
+
+STEPS = (
+    'create_request',
+    'process_start',
+    'validation_inbox',
+    'validate',
+    'submit_offer',
+    'offer_inbox',
+    'award',
+    'order_visible',
+    'request_extension',
+    'approve_extension',
+    'initiate_substitution',
+    'approve_substitution',
+)
+
+POLL_INTERVAL = 0.02
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Tally:
+    """
+    DB queries and outbound HTTP calls made on behalf of one tenant
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.outbound = 0
+        self._lock = threading.Lock()
+
+    def add(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+_attribution = threading.local()
+
+
+def current_tally():
+    return getattr(_attribution, 'tally', None)
+
+
+def _count_query(execute, sql, params, many, context):
+    tally = current_tally()
+    if tally is not None:
+        tally.add('queries')
+    return execute(sql, params, many, context)
+
+
+def run_as(tally, fn, *args, **kwargs):
+    """
+    Call ``fn`` with its queries and outbound calls counted against ``tally``
+    """
+    previous = current_tally()
+    _attribution.tally = tally
+    try:
+        with connection.execute_wrapper(_count_query):
+            return fn(*args, **kwargs)
+    finally:
+        _attribution.tally = previous
+
+
+class HTTPDriver:
+    """
+    Calls a running server at ``base_url``
+    """
+    in_process = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def call(self, method, path, data=None, params=None):
+        response = self.session.request(method, f"{self.base_url}{path}", json=data, params=params, timeout=30)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+    def pump(self):
+        # The server's own drain_process_outbox worker starts the processes
+        pass
+
+
+class InProcessDriver:
+    """
+    Calls the views through the DRF test client; the process-start outbox
+    is drained on the calling thread while it polls
+    """
+    in_process = True
+
+    def __init__(self):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+
+    def call(self, method, path, data=None, params=None):
+        if method == 'GET':
+            response = self.client.get(path, params)
+        else:
+            response = getattr(self.client, method.lower())(path, data, format='json')
+        return response.status_code, getattr(response, 'data', None)
+
+    def pump(self):
+        drain_process_starts()
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {'p50': None, 'p95': None, 'p99': None}
+    if len(samples) == 1:
+        return {'p50': samples[0], 'p95': samples[0], 'p99': samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+class Recorder:
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.outbound = defaultdict(int)
+        self.api_calls = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def step(self, name):
+        tally = current_tally() or Tally()
+        queries, outbound = tally.queries, tally.outbound
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                self.errors[name].append(str(e)[:200])
+            raise
+        else:
+            with self._lock:
+                self.samples[name].append((time.perf_counter() - started) * 1000)
+        finally:
+            with self._lock:
+                self.queries[name] += tally.queries - queries
+                self.outbound[name] += tally.outbound - outbound
+
+    def call(self, driver, method, path, data=None, params=None, expect=(200,)):
+        with self._lock:
+            self.api_calls += 1
+        status_code, body = driver.call(method, path, data=data, params=params)
+        if status_code not in expect:
+            raise StepFailed(f'{method} {path} -> {status_code}: {body}')
+        return body
+
+    def report(self, *, tenants, completed, elapsed, in_process):
+        steps = {}
+        for name in STEPS:
+            samples = self.samples.get(name, [])
+            steps[name] = {
+                'count': len(samples),
+                'errors': len(self.errors.get(name, [])),
+                **{k: v and round(v, 2) for k, v in percentiles(samples).items()},
+                'mean': round(statistics.fmean(samples), 2) if samples else None,
+                'max': round(max(samples), 2) if samples else None,
+                'db_queries': self.queries[name] if in_process else None,
+                'outbound_calls': self.outbound[name] if in_process else None,
+            }
+        return {
+            'tenants': tenants,
+            'completed': completed,
+            'seconds': round(elapsed, 3),
+            'lifecycles_per_second': round(completed / elapsed, 2) if elapsed else None,
+            'api_calls_per_second': round(self.api_calls / elapsed, 2) if elapsed else None,
+            'db_queries': sum(self.queries.values()) if in_process else None,
+            'outbound_calls': sum(self.outbound.values()) if in_process else None,
+            'steps': steps,
+            'errors': {name: errors[:5] for name, errors in self.errors.items()},
+        }
+
+
+def wait_for(check, driver, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        driver.pump()
+        result = check()
+        if result:
+            return result
+        if time.monotonic() > deadline:
+            raise StepFailed('timed out')
+        time.sleep(POLL_INTERVAL)
+
+
+def find_task(recorder, driver, viewset, group, key, object_id):
+    tasks = recorder.call(driver, 'GET', f'/api/requests/{viewset}/tasks/', params={'group': group})['tasks']
+    return next((task for task in tasks if str(task[key]['id']) == object_id), None)
+
+
+def run_lifecycle(driver, recorder, tenant, *, timeout):
+    """
+    One tenant's request, from creation to an extended and substituted
+    service order
+    """
+    step = recorder.step
+    call = recorder.call
+    supplier_id = f'bench-supplier-{tenant}-{uuid.uuid4().hex[:8]}'
+    start_date = date.today() - timedelta(days=10)
+    end_date = date.today() + timedelta(days=80)
+
+    with step('create_request'):
+        created = call(driver, 'POST', '/api/requests/service-requests/', expect=(201, 202), data={
+            'title': f'Bench request {tenant}',
+            'role_name': 'Developer',
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'expected_man_days': 60,
+            'offer_deadline': date.today().isoformat(),
+        })
+        request_id = created['service_request_id']
+
+    with step('process_start'):
+        status_path = f'/api/requests/service-requests/{request_id}/process-status/'
+        wait_for(lambda: call(driver, 'GET', status_path)['process_status'] == 'STARTED', driver, timeout)
+
+    with step('validation_inbox'):
+        task = wait_for(
+            lambda: find_task(recorder, driver, 'service-requests', 'procurement', 'service_request', request_id),
+            driver, timeout,
+        )
+
+    with step('validate'):
+        call(driver, 'POST', f"/api/requests/service-requests/tasks/{task['task_id']}/complete/",
+             data={'decision': 'approved'})
+
+    with step('submit_offer'):
+        call(driver, 'POST', '/api/requests/service-offers/', data={
+            'service_request': request_id,
+            'external_id': f'bench-{tenant}-{uuid.uuid4().hex[:8]}',
+            'provider_id': supplier_id,
+            'provider_name': 'Bench Supplier',
+            'specialist_id': f'{supplier_id}-specialist',
+            'specialist_name': 'Bench Specialist',
+            'daily_rate': '500.00',
+            'total_cost': '30000.00',
+        })
+        offer_id = call(driver, 'GET', '/api/requests/service-offers/',
+                        params={'service_request': request_id})['results'][0]['id']
+
+    with step('offer_inbox'):
+        task = wait_for(
+            lambda: find_task(recorder, driver, 'service-offers', 'suppliers', 'offer', offer_id),
+            driver, timeout,
+        )
+
+    with step('award'):
+        call(driver, 'POST', f"/api/requests/service-offers/tasks/{task['task_id']}/complete/",
+             data={'decision': 'final_approval'})
+
+    with step('order_visible'):
+        order = wait_for(
+            lambda: next(iter(call(driver, 'GET', '/api/orders/service-orders/',
+                                   params={'supplier_id': supplier_id})['results']), None),
+            driver, timeout,
+        )
+        if order['winning_offer_id'] != offer_id:
+            raise StepFailed(f"order {order['id']} was awarded to {order['winning_offer_id']}")
+
+    with step('request_extension'):
+        call(driver, 'POST', '/api/orders/extensions/', expect=(201,), data={
+            'service_order': order['id'],
+            'additional_man_days': 5,
+            'new_end_date': (end_date + timedelta(days=7)).isoformat(),
+            'additional_cost': str(Decimal(order['daily_rate']) * 5),
+            'reason': 'Benchmark extension',
+        })
+
+    with step('approve_extension'):
+        # The create response has no id; the order carries the pending one
+        extension_id = call(driver, 'GET', f"/api/orders/service-orders/{order['id']}/")['pending_extension_id']
+        call(driver, 'POST', f"/api/orders/extensions/{extension_id}/approve_extension/",
+             data={'user_role': 'SUPPLIER_REP'})
+
+    with step('initiate_substitution'):
+        substitution = call(driver, 'POST', '/api/orders/substitutions/initiate/', expect=(201,), data={
+            'service_order': order['id'],
+            'initiated_by': 'PROJECT_MANAGER',
+            'outgoing_specialist_id': order['current_specialist_id'],
+            'outgoing_specialist_name': order['current_specialist_name'],
+            'reason': 'OTHER',
+        })
+
+    with step('approve_substitution'):
+        call(driver, 'POST', f"/api/orders/substitutions/{substitution['id']}/approve_substitution/", data={
+            'user_role': 'SUPPLIER_REP',
+            'incoming_specialist_id': f'{supplier_id}-replacement',
+            'incoming_specialist_name': 'Bench Replacement',
+            'incoming_specialist_daily_rate': '520.00',
+        })
+
+
+@contextlib.contextmanager
+def counting():
+    """
+    Attribute outbound HTTP calls, and work handed to thread pools (the
+    outbox and bulk helpers fan out), to the tenant that caused them
+    """
+    send = requests.Session.send
+    submit = ThreadPoolExecutor.submit
+
+    def counted_send(session, request, **kwargs):
+        tally = current_tally()
+        if tally is not None:
+            tally.add('outbound')
+        return send(session, request, **kwargs)
+
+    def attributed_submit(pool, fn, /, *args, **kwargs):
+        tally = current_tally()
+        if tally is not None:
+            return submit(pool, run_as, tally, fn, *args, **kwargs)
+        return submit(pool, fn, *args, **kwargs)
+
+    requests.Session.send = counted_send
+    ThreadPoolExecutor.submit = attributed_submit
+    try:
+        yield
+    finally:
+        requests.Session.send = send
+        ThreadPoolExecutor.submit = submit
+
+
+def run_benchmark(make_driver, *, tenants, concurrency, timeout=30.0):
+    """
+    Drive ``tenants`` lifecycles, ``concurrency`` at a time; returns the
+    JSON-ready report
+    """
+    in_process = make_driver().in_process
+    recorder = Recorder()
+    completed = []
+
+    def tenant(index):
+        driver = make_driver()
+        try:
+            if in_process:
+                run_as(Tally(), run_lifecycle, driver, recorder, index, timeout=timeout)
+            else:
+                run_lifecycle(driver, recorder, index, timeout=timeout)
+            completed.append(index)
+        except Exception:
+            # Recorded against the step that failed
+            pass
+        finally:
+            if in_process and threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    with counting() if in_process else contextlib.nullcontext():
+        started = time.perf_counter()
+        if concurrency == 1:
+            for index in range(tenants):
+                tenant(index)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(tenant, range(tenants)))
+        elapsed = time.perf_counter() - started
+
+    return recorder.report(tenants=tenants, completed=len(completed), elapsed=elapsed, in_process=in_process)
+
+
+@contextlib.contextmanager
+def scratch_database():
+    """
+    A throwaway migrated SQLite file for in-process runs
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent simulated tenants through the full request -> offer -> order -> "
+        "extension -> substitution lifecycle and report per-step latency percentiles, "
+        "throughput, DB queries and outbound calls as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=20,
+                            help='Lifecycles to run.')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Lifecycles in flight at once.')
+        parser.add_argument('--base-url',
+                            help='Run against this server instead of in-process (its outbox worker '
+                                 'must be running; DB and outbound counts are then not available).')
+        parser.add_argument('--flowable-latency-ms', type=float, default=0,
+                            help='In-process: latency of the fake Flowable.')
+        parser.add_argument('--flowable-error-rate', type=float, default=0,
+                            help='In-process: share of fake Flowable calls that fail.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='In-process: seed for the fake Flowable.')
+        parser.add_argument('--timeout', type=float, default=30,
+                            help='Seconds to wait for asynchronous steps.')
+        parser.add_argument('--output', help='Write the JSON report here as well.')
+
+    def handle(self, *args, **options):
+        if options['base_url']:
+            report = run_benchmark(
+                lambda: HTTPDriver(options['base_url']),
+                tenants=options['tenants'],
+                concurrency=options['concurrency'],
+                timeout=options['timeout'],
+            )
+        else:
+            fake = FakeFlowable(
+                latency=options['flowable_latency_ms'] / 1000,
+                error_rate=options['flowable_error_rate'],
+                seed=options['seed'],
+            )
+            # The views print their progress; keep it out of the report
+            with scratch_database(), use_fake_flowable(fake), contextlib.redirect_stdout(io.StringIO()):
+                report = run_benchmark(
+                    InProcessDriver,
+                    tenants=options['tenants'],
+                    concurrency=options['concurrency'],
+                    timeout=options['timeout'],
+                )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
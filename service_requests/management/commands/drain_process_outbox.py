@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from service_requests.outbox import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MAX_ATTEMPTS,
+    drain_process_starts,
+)
+
+
+class Command(BaseCommand):
+    help = "Start pending Flowable process instances recorded in the ProcessStartOutbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                            help='Concurrent Flowable calls per batch.')
+        parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                            help='Attempts before an entry is marked FAILED.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling instead of exiting once the outbox is empty.')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep between polls when idle (with --loop).')
+
+    def handle(self, *args, **options):
+        while True:
+            results = drain_process_starts(
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                max_attempts=options['max_attempts'],
+            )
+
+            if results:
+                started = sum(1 for _, process_id, _ in results if process_id)
+                self.stdout.write(f"Started {started}/{len(results)} process instances")
+                for entry, process_id, error in results:
+                    if error:
+                        self.stderr.write(f"{entry.service_request_id}: {error}")
+                continue
+
+            if not options['loop']:
+                break
+
+            time.sleep(options['interval'])
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from service_requests.sync_jobs import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MAX_ATTEMPTS,
+    drain_sync_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = "Deliver pending status pushes (ThirdPartySyncJob) to the partner platform."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                            help='Concurrent pushes per batch across all hosts.')
+        parser.add_argument('--per-host', type=int, default=None,
+                            help='Concurrent pushes per partner host '
+                                 '(default: THIRD_PARTY_MAX_CONCURRENCY_PER_HOST).')
+        parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                            help='Attempts before a job is marked FAILED.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling instead of exiting once no job is due.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep between polls when idle (with --loop).')
+
+    def handle(self, *args, **options):
+        while True:
+            results = drain_sync_jobs(
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                per_host=options['per_host'],
+                max_attempts=options['max_attempts'],
+            )
+
+            if results:
+                sent = sum(1 for _, error in results if error is None)
+                self.stdout.write(f"Delivered {sent}/{len(results)} sync jobs")
+                for job, error in results:
+                    if error:
+                        self.stderr.write(f"{job.coalesce_key or job.pk}: {error}")
+                continue
+
+            if not options['loop']:
+                break
+
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from flowable_client import inbox_cache_stats, reset_inbox_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show task inbox cache hits/misses per Flowable group (to size FLOWABLE_INBOX_CACHE_TTL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('groups', nargs='*',
+                            help='Groups to report (default: FLOWABLE_TASK_GROUPS).')
+        parser.add_argument('--reset', action='store_true',
+                            help='Zero the counters after reporting.')
+
+    def handle(self, *args, **options):
+        groups = options['groups'] or settings.FLOWABLE_TASK_GROUPS
+
+        self.stdout.write(f"TTL {settings.FLOWABLE_INBOX_CACHE_TTL}s")
+        self.stdout.write(f"{'group':<20}{'hits':>8}{'misses':>8}{'hit rate':>10}")
+        for group, counts in inbox_cache_stats(groups).items():
+            lookups = counts['hits'] + counts['misses']
+            rate = f"{counts['hits'] / lookups:.0%}" if lookups else '-'
+            self.stdout.write(f"{group:<20}{counts['hits']:>8}{counts['misses']:>8}{rate:>10}")
+
+        if options['reset']:
+            reset_inbox_cache_stats(groups)
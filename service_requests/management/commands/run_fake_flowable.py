@@ -0,0 +1,80 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from fake_flowable import FakeFlowable
+
+
+def make_handler(fake, base_path):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _answer(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            content = self.rfile.read(length) if length else None
+            url = f"http://{self.headers.get('Host', 'localhost')}{self.path}"
+
+            if not urlsplit(url).path.startswith(base_path):
+                status_code, body = 404, {'message': f'Not under {base_path}'}
+            else:
+                status_code, body = fake.handle_url(self.command, url, base_path, content)
+
+            payload = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = _answer
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the fake Flowable REST API (fake_flowable.py) over HTTP, for benchmarks "
+        "and CI runs that point FLOWABLE_BASE_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8090)
+        parser.add_argument('--base-path', default=urlsplit(settings.FLOWABLE_BASE_URL).path or '/',
+                            help='Path the REST API is served under (default: the path of FLOWABLE_BASE_URL).')
+        parser.add_argument('--latency-ms', type=float, default=settings.FLOWABLE_FAKE_LATENCY_MS,
+                            help='Delay added to every call.')
+        parser.add_argument('--jitter-ms', type=float, default=settings.FLOWABLE_FAKE_JITTER_MS,
+                            help='Random extra delay, up to this much, added to every call.')
+        parser.add_argument('--error-rate', type=float, default=settings.FLOWABLE_FAKE_ERROR_RATE,
+                            help='Share of calls answered with a 503 (0-1).')
+        parser.add_argument('--seed', type=int, default=settings.FLOWABLE_FAKE_SEED,
+                            help='Seed for jitter and injected failures.')
+
+    def handle(self, *args, **options):
+        fake = FakeFlowable(
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        base_path = options['base_path'].rstrip('/')
+        server = ThreadingHTTPServer((options['host'], options['port']), make_handler(fake, base_path))
+
+        self.stdout.write(
+            f"Fake Flowable on http://{options['host']}:{options['port']}{base_path} "
+            f"(latency {options['latency_ms']:g} ms, jitter {options['jitter_ms']:g} ms, "
+            f"error rate {options['error_rate']:g})"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-17 23:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0005_projectrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessStartOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('STARTED', 'Started'), ('FAILED', 'Failed')], default='PENDING', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('service_request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='process_start', to='service_requests.servicerequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='service_req_status_4298e5_idx')],
+            },
+        ),
+    ]
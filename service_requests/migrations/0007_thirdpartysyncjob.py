@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0006_processstartoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThirdPartySyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=512)),
+                ('payload', models.JSONField(default=dict)),
+                ('coalesce_key', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed'), ('SUPERSEDED', 'Superseded')], default='PENDING', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='service_req_status_49e904_idx'), models.Index(fields=['coalesce_key', 'status'], name='service_req_coalesc_141c25_idx')],
+            },
+        ),
+    ]
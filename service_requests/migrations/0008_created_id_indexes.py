@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0007_thirdpartysyncjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectrequest',
+            index=models.Index(fields=['created_at', 'id'], name='projectrequest_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceoffer',
+            index=models.Index(fields=['created_at', 'id'], name='serviceoffer_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['created_at', 'id'], name='servicerequest_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0008_created_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceoffer',
+            index=models.Index(fields=['service_request', 'created_at', 'id'], name='serviceoffer_request_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='servicerequest_status_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0009_filter_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceoffer',
+            index=models.Index(fields=['updated_at', 'service_request'], name='serviceoffer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['updated_at'], name='servicerequest_updated_idx'),
+        ),
+    ]
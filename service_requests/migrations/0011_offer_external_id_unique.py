@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-18 00:13
+
+from django.db import migrations, models
+
+
+def detach_duplicate_external_ids(apps, schema_editor):
+    """
+    Keep the external_id on the newest offer of each duplicate
+    (service_request, external_id) pair and clear it on the older re-sends,
+    so the constraint can be added without deleting any offer.
+    """
+    ServiceOffer = apps.get_model('service_requests', 'ServiceOffer')
+
+    duplicates = (
+        ServiceOffer.objects
+        .exclude(external_id__isnull=True)
+        .values('service_request_id', 'external_id')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        older = (
+            ServiceOffer.objects
+            .filter(service_request_id=duplicate['service_request_id'], external_id=duplicate['external_id'])
+            .order_by('-created_at')
+            .values_list('id', flat=True)[1:]
+        )
+        ServiceOffer.objects.filter(id__in=list(older)).update(external_id=None)
+
+    # '' is not "no external id" for the constraint
+    ServiceOffer.objects.filter(external_id='').update(external_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_requests', '0010_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(detach_duplicate_external_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='serviceoffer',
+            constraint=models.UniqueConstraint(fields=('service_request', 'external_id'), name='serviceoffer_external_id_uniq'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 
 
@@ -35,6 +36,13 @@ class ServiceRequest(models.Model):
     created_at          = models.DateTimeField(auto_now_add=True)
     updated_at          = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="servicerequest_created_id_idx"),
+            models.Index(fields=["status", "created_at", "id"], name="servicerequest_status_idx"),
+            models.Index(fields=["updated_at"], name="servicerequest_updated_idx"),
+        ]
+
 
 class ServiceOffer(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -52,10 +60,81 @@ class ServiceOffer(models.Model):
     created_at   = models.DateTimeField(auto_now_add=True)
     updated_at   = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="serviceoffer_created_id_idx"),
+            models.Index(fields=["service_request", "created_at", "id"], name="serviceoffer_request_idx"),
+            models.Index(fields=["updated_at", "service_request"], name="serviceoffer_updated_idx"),
+        ]
+        constraints = [
+            # Re-sent partner offers update the existing row (see offers.upsert_offers)
+            models.UniqueConstraint(fields=["service_request", "external_id"], name="serviceoffer_external_id_uniq"),
+        ]
+
 
 class ProjectRequest(models.Model):
     project_id = models.CharField(max_length=128)
     project_name = models.CharField(max_length=128)
     specialist_id = models.CharField(max_length=128)
     created_at = models.DateTimeField(auto_now_add=True)
-    
\ No newline at end of file
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="projectrequest_created_id_idx"),
+        ]
+    
+
+class ProcessStartStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    STARTED = "STARTED", "Started"
+    FAILED  = "FAILED", "Failed"
+
+
+class ProcessStartOutbox(models.Model):
+    """
+    Flowable process start for a ServiceRequest, written in the same
+    transaction as the request and drained by `manage.py drain_process_outbox`.
+    """
+    service_request = models.OneToOneField(ServiceRequest, on_delete=models.CASCADE, related_name="process_start")
+    status          = models.CharField(max_length=16, choices=ProcessStartStatus.choices, default=ProcessStartStatus.PENDING)
+    attempts        = models.PositiveIntegerField(default=0)
+    last_error      = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by      = models.CharField(max_length=64, blank=True)
+    created_at      = models.DateTimeField(auto_now_add=True)
+    updated_at      = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+
+class SyncJobStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    SENT    = "SENT", "Sent"
+    FAILED  = "FAILED", "Failed"
+    SUPERSEDED = "SUPERSEDED", "Superseded"
+
+
+class ThirdPartySyncJob(models.Model):
+    """
+    Status push to the partner platform, delivered by `manage.py drain_sync_jobs`.
+    Pending jobs sharing a coalesce_key are merged so only the latest payload is sent.
+    """
+    url             = models.URLField(max_length=512)
+    payload         = models.JSONField(default=dict)
+    coalesce_key    = models.CharField(max_length=255, blank=True)
+    status          = models.CharField(max_length=16, choices=SyncJobStatus.choices, default=SyncJobStatus.PENDING)
+    attempts        = models.PositiveIntegerField(default=0)
+    last_error      = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by      = models.CharField(max_length=64, blank=True)
+    created_at      = models.DateTimeField(auto_now_add=True)
+    updated_at      = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["coalesce_key", "status"]),
+        ]
@@ -1,4 +1,5 @@
-import requests
+import uuid
+
 from rest_framework import viewsets, mixins, status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -6,12 +7,29 @@ from rest_framework.decorators import action
 from django.conf import settings
 
 from .models import *
-from .serializers import ServiceOfferSerializer
-from service_orders.models import ServiceOrder
+from .serializers import ServiceOfferSerializer, load_related
+from .inbox import (
+    enrich_offer_tasks,
+    inbox_headers,
+    inbox_page_params,
+    load_inbox,
+)
+from .offers import (
+    DECIDED_STATUSES,
+    AlreadyAwarded,
+    decide_offer,
+    trigger_offer_event,
+    trigger_offer_events,
+    upsert_offers,
+)
+from .task_completion import complete_tasks_bulk
+from config.conditional import ConditionalGetMixin
+from config.dependencies import DependencyUnavailable
 from flowable_client import *
 
 
 class ServiceOfferViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
@@ -22,95 +40,153 @@ class ServiceOfferViewSet(
     serializer_class = ServiceOfferSerializer
     permission_classes = [AllowAny,]
 
+    # The payload inlines the service request's title and role
+    conditional_fields = ('updated_at', 'service_request__updated_at')
+
+    def get_queryset(self):
+        # The serializer reads title/role/duration from the service request
+        qs = self.queryset.select_related('service_request')
+
+        service_request_param = self.request.query_params.get("service_request")
+        if service_request_param:
+            try:
+                qs = qs.filter(service_request_id=uuid.UUID(service_request_param))
+            except ValueError:
+                return qs.none()
+
+        return qs
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        offer = serializer.save()
-        
-        try:
-            # Step 1: Find ALL executions for this process instance
-            executions_url = f"{settings.FLOWABLE_BASE_URL}/runtime/executions"
-            params = {
-                'processInstanceId': offer.service_request.process_id
-            }
-            
-            exec_response = requests.get(
-                executions_url,
-                params=params,
-                auth=settings.FLOWABLE_AUTH
-            )
-            print('called execution get request............')
+        [(offer, created)] = upsert_offers([serializer.validated_data])
 
-            if exec_response.status_code != 200:
-                return Response({
-                    'success': False,
-                    'error': 'Failed to find executions'
-                }, status=400)
-            
-            executions = exec_response.json().get('data', [])
-            
-            print('got execution data.....and will look for wait Trigger')
+        process_id = offer.service_request.process_id
 
-            # Step 2: Find the execution waiting at the message event
-            waiting_execution = None
-            for execution in executions:
-                if execution.get('activityId') == 'waitForApiTrigger':
-                    waiting_execution = execution
-                    break
+        if not created and offer.status in DECIDED_STATUSES:
+            return Response({
+                'success': False,
+                'error': 'Offer has already been evaluated',
+                'offerId': str(offer.id),
+            }, status=status.HTTP_409_CONFLICT)
 
-            if not waiting_execution:
-                return Response({
-                    'success': False,
-                    'error': 'No execution found waiting at message event',
-                    'availableExecutions': executions
-                }, status=404)
-            
-            print('got wait Trigger...........and will trigger msg envt')
-            
-            execution_id = waiting_execution['id']
-
-            # Step 3: Trigger the message event on the CORRECT execution
-            trigger_url = f"{settings.FLOWABLE_BASE_URL}/runtime/executions/{execution_id}"
-            payload = {
-                "action": "messageEventReceived",
-                "messageName": "ApiTriggerMessage",
-                "variables": [
-                    {
-                        "name": "offerId",
-                        "value": str(offer.id)
-                    }
-                ]
-            }
-            
-            trigger_response = requests.put(
-                trigger_url,
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                auth=settings.FLOWABLE_AUTH
-            )
+        if not created:
+            # A re-sent offer: the message event already fired for it
+            return Response({
+                'success': True,
+                'message': 'Offer updated',
+                'offerId': str(offer.id),
+                'processInstanceId': process_id,
+            })
 
-            print('triggered msg envt....')
-            
-            if trigger_response.status_code in [200, 201]:
-                return Response({
-                    'success': True,
-                    'message': 'Offer submitted and Message event triggered successfully',
-                    'executionId': execution_id,
-                    'processInstanceId': offer.service_request.process_id,
-                })
-            else:
-                return Response({
-                    'success': False,
-                    'error': trigger_response.text,
-                    'statusCode': trigger_response.status_code
-                }, status=trigger_response.status_code)
-                
+        if not process_id:
+            # The request's process has not started yet (the outbox is still
+            # draining): there is no execution to deliver the message to
+            return Response({
+                'success': True,
+                'message': 'Offer saved; its process has not started, no message event triggered',
+                'offerId': str(offer.id),
+                'processInstanceId': None,
+                'trigger': 'no_process',
+            }, status=status.HTTP_202_ACCEPTED)
+
+        try:
+            result = trigger_offer_event(process_id, [offer])
         except Exception as e:
             return Response({
                 'success': False,
                 'error': str(e)
             }, status=500)
-    
+
+        if result['status'] == 'triggered':
+            return Response({
+                'success': True,
+                'message': 'Offer submitted and Message event triggered successfully',
+                'executionId': result['execution_id'],
+                'processInstanceId': process_id,
+            })
+
+        body = {'success': False, 'error': result['error']}
+        if result['status'] == 'failed':
+            body['statusCode'] = result['status_code']
+        return Response(body, status=result['status_code'])
+
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Ingest a batch of partner offers.
+
+        Offers are upserted on (service_request, external_id); each process
+        instance with new offers gets one message event for all of them.
+        Re-sent offers that have already been evaluated are refused.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Expected a non-empty list of offers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.SERVICE_OFFER_BULK_MAX:
+            return Response(
+                {'error': f'At most {settings.SERVICE_OFFER_BULK_MAX} offers per call'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Every item's service request in one query, not one per item
+        context = self.get_serializer_context()
+        context['related'] = {'service_request': load_related(
+            ServiceRequest.objects.all(),
+            [item.get('service_request') for item in items if isinstance(item, dict)],
+        )}
+
+        serializer = self.get_serializer(data=items, many=True, context=context)
+        errors = [{}] * len(items) if serializer.is_valid() else serializer.errors
+        valid = [index for index, item_errors in enumerate(errors) if not item_errors]
+
+        if len(valid) != len(items):
+            serializer = self.get_serializer(data=[items[index] for index in valid], many=True, context=context)
+            serializer.is_valid(raise_exception=True)
+
+        upserted = upsert_offers(serializer.validated_data) if valid else []
+        triggers = trigger_offer_events([offer for offer, created in upserted if created])
+
+        results = [{'index': index, 'success': False, 'errors': item_errors} for index, item_errors in enumerate(errors)]
+        for index, (offer, created) in zip(valid, upserted):
+            process_id = offer.service_request.process_id
+            if not created and offer.status in DECIDED_STATUSES:
+                results[index] = {
+                    'index': index,
+                    'success': False,
+                    'offer_id': str(offer.id),
+                    'errors': {'non_field_errors': ['Offer has already been evaluated']},
+                }
+                continue
+            if not created:
+                trigger = 'duplicate'
+            elif not process_id:
+                trigger = 'no_process'
+            else:
+                trigger = triggers[process_id]['status']
+
+            results[index] = {
+                'index': index,
+                'success': True,
+                'offer_id': str(offer.id),
+                'created': created,
+                'processInstanceId': process_id,
+                'trigger': trigger,
+            }
+
+        failed = sum(1 for result in results if not result['success'])
+        return Response({
+            'created': sum(1 for _, created in upserted if created),
+            'updated': len(items) - failed - sum(1 for _, created in upserted if created),
+            'failed': failed,
+            'processes': triggers,
+            'results': results,
+        }, status=status.HTTP_200_OK if not failed else status.HTTP_207_MULTI_STATUS)
+
 
     @action(detail=False, methods=['get'], url_path='tasks')
     def get_tasks(self, request):
@@ -123,46 +199,22 @@ class ServiceOfferViewSet(
             }, status=status.HTTP_200_OK)
         
         try:
-            # Step 1: Get tasks from Flowable
-            flowable_tasks = get_tasks_by_group(group_id=group_id)
-            
-            # Step 2: Enrich with contract details from local database
-            tasks_with_request = []
+            paging = inbox_page_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # Get tasks from Flowable and enrich them from the local database
+            data = load_inbox(group_id=group_id, paging=paging, enrich=enrich_offer_tasks)
             
-            for task in flowable_tasks:
-                offer_id = task['variables'].get('offerId')
-                
-                if not offer_id:
-                    continue
-                
-                try:
-                    # Get contract from database
-                    offer = ServiceOffer.objects.get(id=offer_id)
-                    
-                    task_data = {
-                        'task_id': task['task_id'],
-                        'task_name': task['task_name'],
-                        'created_time': task['created_time'],
-                        'offer': {
-                            'id': offer.id,
-                            'provider_name': offer.provider_name,
-                            'specialist_name': offer.specialist_name,
-                            'status': offer.status,
-                            'daily_rate': offer.daily_rate,
-                            'travel_cost': offer.travel_cost,
-                            'total_cost': offer.total_cost,
-                        }
-                    }
-                    
-                    tasks_with_request.append(task_data)
-                    
-                except ServiceOffer.DoesNotExist:
-                    continue
-                        
-            return Response({
-                'count': len(tasks_with_request),
-                'tasks': tasks_with_request
-            }, status=status.HTTP_200_OK)
+            return Response(data, status=status.HTTP_200_OK, headers=inbox_headers(data))
+
+        except DependencyUnavailable as e:
+            # Flowable is being shed and there is no earlier copy to fall back on
+            return Response(
+                {'error': f'Failed to retrieve tasks: {str(e)}'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
             
         except Exception as e:
             return Response(
@@ -198,37 +250,26 @@ class ServiceOfferViewSet(
             )
         
         try:
-            offer = ServiceOffer.objects.get(id=offer_id)
+            offer = ServiceOffer.objects.select_related('service_request').get(id=offer_id)
         except ServiceOffer.DoesNotExist:
             return Response(
                 {"error": "Service offer not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # generate service request in 3rd party app
-        if decision == "final_approval":
-            offer_status = "ACCEPTED"
-        elif decision == "final_rejection":
-            offer_status = "REJECTED"
-        else:
-            offer_status = "UNDER_REVIEW"
-
-        offer.status = offer_status
-        offer.save()
-
+        # Step 1: record the decision; an accepted offer is awarded. Flowable
+        # hears of it only once this has committed, so an acceptance that
+        # loses the race leaves its task open
         try:
-            third_party_api_url = f"{settings.THIRD_PARTY_API_BASE}/requests/service-offers/update-status/"
-            payload = {
-                "id": str(offer.external_id) ,
-                "status": offer_status
-            }
-            response = call_third_party_api(url=third_party_api_url, payload=payload)
+            decide_offer(offer, decision)
+        except AlreadyAwarded as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_409_CONFLICT
+            )
 
-        except Exception as e:
-            print(f"Failed to call 3rd party API: {str(e)}")
-            raise Exception(f"Failed to update 3rd party API: {str(e)}")
-        
-        # Step 1: Complete Flowable task
+        # Step 2: Complete Flowable task (a retry after a failure here does
+        # not record the decision twice)
         try:
             complete_task(
                 task_id=task_id,
@@ -240,38 +281,45 @@ class ServiceOfferViewSet(
                 {'error': f'Failed to submit counter offer: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-
-        # create service order
-        if offer.status == 'ACCEPTED' or decision == "final_approval":
-            ServiceOrder.objects.create(
-                title=offer.service_request.title,
-                service_request_id=str(offer.service_request.id),
-                winning_offer_id=str(offer.id),
-                supplier_id=offer.provider_id,
-                start_date=offer.service_request.start_date,
-                current_end_date=offer.service_request.end_date,
-                original_end_date=offer.service_request.end_date,
-                supplier_name=offer.provider_name,
-                current_specialist_id=offer.specialist_id,
-                current_specialist_name=offer.specialist_name,
-                original_specialist_id=offer.specialist_id,
-                original_specialist_name=offer.specialist_name,
-                role=offer.service_request.role_name,
-                current_man_days=offer.service_request.expected_man_days,
-                original_man_days=offer.service_request.expected_man_days,
-                daily_rate=offer.daily_rate,
-                original_contract_value=offer.total_cost,
-                current_contract_value=offer.total_cost,
-            )
-
-            try:
-                project_req = ProjectRequest.objects.order_by('created_at').first()
-                if project_req:
-                    project_req.specialist_id = offer.specialist_id
-                    project_req.save()
-            except:
-                pass
         
         return Response({
             'message': f'Initial validation {decision} successfully',
         }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='tasks/complete-bulk')
+    def complete_tasks_bulk(self, request):
+        """
+        Complete many offer evaluation tasks at once.
+
+        Takes a list of {task_id, decision}; returns one outcome per task.
+        Decisions are recorded, and accepted offers awarded, before their
+        tasks are completed; an acceptance that loses the race fails with
+        409 and leaves its task open.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Expected a non-empty list of {task_id, decision}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.TASK_COMPLETE_BULK_MAX:
+            return Response(
+                {'error': f'At most {settings.TASK_COMPLETE_BULK_MAX} tasks per call'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        outcomes = complete_tasks_bulk(
+            items,
+            queryset=ServiceOffer.objects.select_related('service_request'),
+            variable='offerId',
+            label='offer',
+            apply=decide_offer,
+            conflicts=(AlreadyAwarded,),
+        )
+
+        completed = sum(1 for outcome in outcomes if outcome['success'])
+        return Response({
+            'completed': completed,
+            'failed': len(outcomes) - completed,
+            'results': outcomes,
+        }, status=status.HTTP_200_OK if completed == len(outcomes) else status.HTTP_207_MULTI_STATUS)
@@ -0,0 +1,263 @@
+"""
+Offer ingestion and evaluation shared by the single, batch and async
+offer endpoints.
+
+Offers are upserted on ``(service_request, external_id)``, so a re-sent
+partner offer updates its row instead of adding a duplicate, and the
+``ApiTriggerMessage`` event is fired once per process instance for all
+the new offers of a batch. An evaluation decision, and the award that
+follows an acceptance, is written in a single transaction.
+"""
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils import timezone
+
+from .inbox import offer_status_for, service_order_fields
+from .models import ServiceOffer, ServiceRequest, ProjectRequest, RequestStatus
+from .sync_jobs import enqueue_offer_status
+from service_orders.models import ServiceOrder
+from config.db import write_transaction
+from config.timing import propagate
+from flowable_client import (
+    get_flowable_client,
+    get_waiting_execution_id,
+    mark_message_consumed,
+    invalidate_waiting_execution,
+    invalidate_inboxes,
+)
+
+
+logger = logging.getLogger(__name__)
+
+OFFER_MESSAGE_NAME = "ApiTriggerMessage"
+
+
+# Evaluated offers; a partner re-send no longer changes them
+DECIDED_STATUSES = ('ACCEPTED', 'REJECTED')
+
+# Set by the evaluation, never by a re-sent offer
+UPSERT_KEPT_FIELDS = {'status'}
+
+
+class AlreadyAwarded(Exception):
+    pass
+
+DEFAULT_CONCURRENCY = 8
+
+
+def upsert_offers(items):
+    """
+    Insert or update validated offer dicts; returns ``(offer, created)``
+    pairs in input order.
+
+    Existing rows are read and written inside one write transaction
+    (BEGIN IMMEDIATE), so two batches carrying the same offer cannot both
+    insert it. A key repeated within the batch is applied in order to the
+    same object.
+
+    A re-sent offer never changes its ``status``, and one that has been
+    decided is returned unchanged (check ``offer.status`` against
+    DECIDED_STATUSES).
+    """
+    for item in items:
+        item['external_id'] = item.get('external_id') or None
+
+    keys = {
+        (item['service_request'].pk, item['external_id'])
+        for item in items if item['external_id']
+    }
+
+    with write_transaction():
+        existing = {}
+        if keys:
+            rows = ServiceOffer.objects.select_related('service_request').filter(
+                service_request_id__in={service_request_id for service_request_id, _ in keys},
+                external_id__in={external_id for _, external_id in keys},
+            )
+            existing = {(row.service_request_id, row.external_id): row for row in rows}
+
+        results = []
+        new = {}
+        changed = {}
+        update_fields = {'updated_at'}
+
+        for item in items:
+            key = (item['service_request'].pk, item['external_id'])
+            offer = existing.get(key) if item['external_id'] else None
+
+            if offer is None:
+                offer = ServiceOffer(**item)
+                new[offer.pk] = offer
+                if item['external_id']:
+                    existing[key] = offer
+                results.append((offer, True))
+                continue
+
+            if offer.status in DECIDED_STATUSES:
+                results.append((offer, False))
+                continue
+
+            fields = item.keys() - UPSERT_KEPT_FIELDS
+            for field in fields:
+                setattr(offer, field, item[field])
+            if offer.pk not in new:
+                changed[offer.pk] = offer
+                update_fields.update(fields)
+            results.append((offer, False))
+
+        ServiceOffer.objects.bulk_create(new.values())
+
+        if changed:
+            now = timezone.now()
+            for offer in changed.values():
+                offer.updated_at = now
+            ServiceOffer.objects.bulk_update(changed.values(), sorted(update_fields))
+
+    return results
+
+
+def offer_message_variables(offers):
+    return [
+        # The first offer of the batch, as when offers arrived one by one
+        {"name": "offerId", "value": str(offers[0].id)},
+        {"name": "offerIds", "value": ",".join(str(offer.id) for offer in offers)},
+    ]
+
+
+def trigger_offer_event(process_id, offers):
+    """
+    Fire the offer message event of one process instance, once, for
+    ``offers``. Returns a dict with ``status`` (triggered, not_waiting,
+    lookup_failed or failed) and the HTTP ``status_code`` to report.
+    """
+    try:
+        execution_id = get_waiting_execution_id(process_instance_id=process_id)
+    except Exception:
+        return {'status': 'lookup_failed', 'error': 'Failed to find executions', 'status_code': 400}
+
+    if not execution_id:
+        return {'status': 'not_waiting', 'error': 'No execution found waiting at message event', 'status_code': 404}
+
+    try:
+        response = get_flowable_client().trigger_message(
+            execution_id=execution_id,
+            message_name=OFFER_MESSAGE_NAME,
+            variables=offer_message_variables(offers),
+        )
+    except Exception as e:
+        invalidate_waiting_execution(process_instance_id=process_id)
+        return {'status': 'failed', 'error': str(e), 'status_code': 500}
+    finally:
+        # The offer moves the process on to the suppliers' task
+        invalidate_inboxes()
+
+    logger.debug('Triggered %s on execution %s', OFFER_MESSAGE_NAME, execution_id)
+
+    if response.status_code in [200, 201]:
+        mark_message_consumed(process_instance_id=process_id)
+        return {'status': 'triggered', 'execution_id': execution_id, 'status_code': 200}
+
+    # The cached execution may be gone (process moved on); look it up again next time
+    invalidate_waiting_execution(process_instance_id=process_id)
+    return {'status': 'failed', 'error': response.text, 'status_code': response.status_code}
+
+
+def trigger_offer_events(offers, *, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Group new offers by process instance and trigger each process once,
+    processes in parallel on a bounded pool. Returns ``{process_id: result}``.
+    """
+    by_process = defaultdict(list)
+    for offer in offers:
+        if offer.service_request.process_id:
+            by_process[offer.service_request.process_id].append(offer)
+
+    if not by_process:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(by_process))) as pool:
+        results = pool.map(propagate(lambda group: trigger_offer_event(*group)), by_process.items())
+        return dict(zip(by_process, results))
+
+
+def decide_offer(offer, decision):
+    """
+    Record the evaluation decision on ``offer``, awarding the offer when it
+    is accepted. Returns the new ServiceOrder, or None.
+
+    Call it before completing the offer's Flowable task: an acceptance that
+    loses to another offer raises AlreadyAwarded here, while its task is
+    still open. A decision that is already recorded (the completion is
+    being retried) is not written again.
+
+    ``offer`` must come with its service_request (``select_related``).
+    Everything is written in one write transaction, partner pushes
+    included (they are queued as sync jobs); cache invalidation waits for
+    the commit.
+    """
+    new_status = offer_status_for(decision)
+    if offer.status == new_status:
+        return None
+
+    previous_status, offer.status = offer.status, new_status
+    try:
+        with write_transaction():
+            offer.save(update_fields=['status', 'updated_at'])
+            enqueue_offer_status(offer)
+
+            if offer.status != 'ACCEPTED':
+                return None
+            return award_offer(offer)
+    except BaseException:
+        offer.status = previous_status
+        raise
+
+
+def award_offer(offer):
+    """
+    Create the service order for ``offer``, mark its request AWARDED and
+    reject the competing offers. Call inside a write transaction; raises
+    AlreadyAwarded if another offer won the request.
+    """
+    service_request = offer.service_request
+    now = timezone.now()
+
+    # Claim the request first, so a second acceptance cannot award it again
+    awarded = ServiceRequest.objects.filter(pk=service_request.pk).exclude(
+        status=RequestStatus.AWARDED
+    ).update(status=RequestStatus.AWARDED, updated_at=now)
+    if not awarded:
+        raise AlreadyAwarded(f'Service request {service_request.pk} is already awarded')
+    service_request.status, service_request.updated_at = RequestStatus.AWARDED, now
+
+    order = ServiceOrder.objects.create(**service_order_fields(offer))
+
+    losers = list(
+        service_request.offers.exclude(pk=offer.pk).exclude(status__in=['ACCEPTED', 'REJECTED'])
+    )
+    for loser in losers:
+        loser.status = 'REJECTED'
+        loser.updated_at = now
+    ServiceOffer.objects.bulk_update(losers, ['status', 'updated_at'])
+
+    for loser in losers:
+        enqueue_offer_status(loser)
+
+    # No link from a service request to its project yet: staff the oldest
+    # project request, in one UPDATE
+    ProjectRequest.objects.filter(
+        pk=Subquery(ProjectRequest.objects.order_by('created_at', 'id').values('pk')[:1])
+    ).update(specialist_id=offer.specialist_id)
+
+    if service_request.process_id:
+        # The process has left the offer wait state for good
+        transaction.on_commit(
+            partial(invalidate_waiting_execution, process_instance_id=service_request.process_id)
+        )
+
+    return order
@@ -0,0 +1,153 @@
+"""
+Transactional outbox for Flowable process starts.
+
+``ServiceRequestViewSet.create`` only records a ProcessStartOutbox row in
+the same transaction as the request; ``drain_process_starts`` (run by
+``manage.py drain_process_outbox``) starts the process instances
+concurrently and back-fills ``ServiceRequest.process_id`` in bulk.
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import ServiceRequest, ProcessStartOutbox, ProcessStartStatus
+from config.db import write_transaction
+from config.timing import propagate
+from flowable_client import generate_request_task
+
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_ATTEMPTS = 8
+
+# A claimed batch is handed to another worker if not finished in time
+CLAIM_LEASE = timedelta(minutes=5)
+
+RETRY_BASE_DELAY = 2      # seconds, doubled per attempt
+RETRY_MAX_DELAY = 600
+
+
+def enqueue_process_start(service_request):
+    return ProcessStartOutbox.objects.create(service_request=service_request)
+
+
+def enqueue_process_starts(service_requests):
+    return ProcessStartOutbox.objects.bulk_create(
+        [ProcessStartOutbox(service_request=service_request) for service_request in service_requests]
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY))
+
+
+def claim_batch(*, batch_size=DEFAULT_BATCH_SIZE, ids=None):
+    """
+    Claim up to ``batch_size`` due entries for this worker.
+
+    SQLite has no SELECT ... FOR UPDATE SKIP LOCKED, so entries are claimed
+    with a conditional UPDATE that stamps a token and pushes
+    ``next_attempt_at`` past the lease; a worker that dies mid-batch simply
+    lets its entries come due again.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+
+    due = ProcessStartOutbox.objects.filter(
+        status=ProcessStartStatus.PENDING,
+        next_attempt_at__lte=now,
+    )
+    if ids is not None:
+        due = due.filter(pk__in=ids)
+
+    candidate_ids = list(due.order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size])
+
+    ProcessStartOutbox.objects.filter(
+        pk__in=candidate_ids,
+        status=ProcessStartStatus.PENDING,
+        next_attempt_at__lte=now,
+    ).update(claimed_by=token, next_attempt_at=now + CLAIM_LEASE, updated_at=now)
+
+    return list(
+        ProcessStartOutbox.objects
+        .filter(claimed_by=token)
+        .select_related('service_request')
+    )
+
+
+def _start(entry):
+    try:
+        return entry, generate_request_task(request_id=str(entry.service_request_id))['id'], None
+    except Exception as e:
+        return entry, None, str(e)
+
+
+def drain_process_starts(*, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                         max_attempts=DEFAULT_MAX_ATTEMPTS, ids=None):
+    """
+    Start one claimed batch of process instances.
+
+    Flowable calls run on a bounded thread pool; all DB writes happen here
+    afterwards, as one bulk_update per table. Returns a list of
+    ``(entry, process_id, error)`` tuples.
+    """
+    entries = claim_batch(batch_size=batch_size, ids=ids)
+    if not entries:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(entries))) as pool:
+        results = list(pool.map(propagate(_start), entries))
+
+    now = timezone.now()
+    started_requests = []
+
+    for entry, process_id, error in results:
+        entry.attempts += 1
+        entry.claimed_by = ''
+        entry.updated_at = now
+
+        if process_id:
+            entry.status = ProcessStartStatus.STARTED
+            entry.last_error = ''
+            entry.service_request.process_id = process_id
+            entry.service_request.updated_at = now
+            started_requests.append(entry.service_request)
+        else:
+            entry.last_error = error
+            if entry.attempts >= max_attempts:
+                entry.status = ProcessStartStatus.FAILED
+            else:
+                entry.next_attempt_at = now + retry_delay(entry.attempts)
+
+    with write_transaction():
+        ServiceRequest.objects.bulk_update(started_requests, ['process_id', 'updated_at'])
+        ProcessStartOutbox.objects.bulk_update(
+            [entry for entry, _, _ in results],
+            ['status', 'attempts', 'last_error', 'next_attempt_at', 'claimed_by', 'updated_at'],
+        )
+
+    return results
+
+
+def process_start_status(service_request):
+    """
+    Pollable state of a request's workflow start
+    """
+    try:
+        entry = service_request.process_start
+    except ProcessStartOutbox.DoesNotExist:
+        # Requests created before the outbox started their process inline
+        return {
+            'process_status': ProcessStartStatus.STARTED if service_request.process_id else None,
+            'process_id': service_request.process_id,
+        }
+
+    return {
+        'process_status': entry.status,
+        'process_id': service_request.process_id,
+        'attempts': entry.attempts,
+        'last_error': entry.last_error,
+        'next_attempt_at': entry.next_attempt_at if entry.status == ProcessStartStatus.PENDING else None,
+    }
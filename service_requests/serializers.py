@@ -1,8 +1,48 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from .models import *
+from config.timing import TimedModelSerializer
 
 
-class ServiceRequestSerializer(serializers.ModelSerializer):
+def load_related(queryset, values):
+    """
+    ``{pk: row}`` for the valid primary keys among ``values``, in one query
+    """
+    pk_field = queryset.model._meta.pk
+    pks = set()
+    for value in values:
+        try:
+            pks.add(pk_field.to_python(value))
+        except (DjangoValidationError, TypeError, ValueError):
+            pass
+    return queryset.in_bulk(pks)
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that looks rows up in
+    ``context['related'][field_name]`` when the view loaded them already
+    (see load_related), so a batch is validated without a query per item.
+    """
+
+    def to_internal_value(self, data):
+        related = self.context.get('related', {}).get(self.field_name)
+        if related is None:
+            return super().to_internal_value(data)
+
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        if pk not in related:
+            self.fail('does_not_exist', pk_value=data)
+        return related[pk]
+
+
+class ServiceRequestSerializer(TimedModelSerializer):
     class Meta:
         model = ServiceRequest
         fields = "__all__"
@@ -40,7 +80,8 @@ class ServiceRequestSerializer(serializers.ModelSerializer):
         return value
     
 
-class ServiceOfferSerializer(serializers.ModelSerializer):
+class ServiceOfferSerializer(TimedModelSerializer):
+    service_request = PreloadedPrimaryKeyRelatedField(queryset=ServiceRequest.objects.all())
     title = serializers.CharField(
         source='service_request.title',
         read_only=True
@@ -59,12 +100,22 @@ class ServiceOfferSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+        extra_kwargs = {
+            "external_id": {"required": False},
+        }
     
+    def get_validators(self):
+        # Creating with a re-sent (service_request, external_id) is an
+        # upsert (see upsert_offers), not an error; updates keep the check
+        if self.instance is None:
+            return []
+        return super().get_validators()
+
     def get_duration(self, obj):
         return f"{obj.service_request.start_date} to {obj.service_request.end_date}"
     
 
-class ProjectRequestSerializer(serializers.ModelSerializer):
+class ProjectRequestSerializer(TimedModelSerializer):
     class Meta:
         model = ProjectRequest
         fields = '__all__'
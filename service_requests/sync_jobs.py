@@ -0,0 +1,187 @@
+"""
+Background delivery of status pushes to the partner platform.
+
+The complete_task actions record a ThirdPartySyncJob next to their local
+status change instead of calling the partner API inline. ``drain_sync_jobs``
+(run by ``manage.py drain_sync_jobs``) delivers them with a per-host
+concurrency limit and exponential backoff.
+"""
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ThirdPartySyncJob, SyncJobStatus
+from .outbox import CLAIM_LEASE, retry_delay
+from config.db import write_transaction
+from flowable_client import call_third_party_api
+
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 16
+DEFAULT_MAX_ATTEMPTS = 10
+
+
+def request_generate_url():
+    return f"{settings.THIRD_PARTY_API_BASE}/requests/service-requests/generate/"
+
+
+def offer_status_url():
+    return f"{settings.THIRD_PARTY_API_BASE}/requests/service-offers/update-status/"
+
+
+def enqueue_sync_job(*, url, payload, coalesce_key=''):
+    """
+    Record a push, merging it into a pending job with the same coalesce_key.
+
+    A job already claimed by a worker is in flight and is left alone; the
+    new state gets its own job, which the worker will not start until the
+    in-flight one has finished.
+    """
+    with write_transaction():
+        if coalesce_key:
+            updated = ThirdPartySyncJob.objects.filter(
+                coalesce_key=coalesce_key,
+                status=SyncJobStatus.PENDING,
+                claimed_by='',
+            ).update(url=url, payload=payload, updated_at=timezone.now())
+
+            if updated:
+                return
+
+        ThirdPartySyncJob.objects.create(url=url, payload=payload, coalesce_key=coalesce_key)
+
+
+def enqueue_request_generate(service_request, payload):
+    enqueue_sync_job(
+        url=request_generate_url(),
+        payload=payload,
+        coalesce_key=f"request-generate:{service_request.id}",
+    )
+
+
+def enqueue_offer_status(offer):
+    # Only offers the partner sent us have a partner-side id
+    if not offer.external_id:
+        return
+
+    enqueue_sync_job(
+        url=offer_status_url(),
+        payload={
+            "id": offer.external_id,
+            "status": offer.status,
+        },
+        coalesce_key=f"offer-status:{offer.external_id}",
+    )
+
+
+def claim_batch(*, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Claim due jobs, skipping keys that already have a job in flight so the
+    partner never sees two states of the same object out of order.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+
+    in_flight_keys = (
+        ThirdPartySyncJob.objects
+        .filter(status=SyncJobStatus.PENDING)
+        .exclude(claimed_by='')
+        .exclude(coalesce_key='')
+        .values('coalesce_key')
+    )
+
+    candidate_ids = list(
+        ThirdPartySyncJob.objects
+        .filter(status=SyncJobStatus.PENDING, claimed_by='', next_attempt_at__lte=now)
+        .filter(Q(coalesce_key='') | ~Q(coalesce_key__in=in_flight_keys))
+        .order_by('next_attempt_at')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+
+    ThirdPartySyncJob.objects.filter(
+        pk__in=candidate_ids,
+        status=SyncJobStatus.PENDING,
+        claimed_by='',
+    ).update(claimed_by=token, next_attempt_at=now + CLAIM_LEASE, updated_at=now)
+
+    return list(ThirdPartySyncJob.objects.filter(claimed_by=token))
+
+
+def release_expired_claims():
+    """
+    Hand back jobs whose worker died mid-batch
+    """
+    ThirdPartySyncJob.objects.filter(
+        status=SyncJobStatus.PENDING,
+        next_attempt_at__lte=timezone.now(),
+    ).exclude(claimed_by='').update(claimed_by='')
+
+
+def drain_sync_jobs(*, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                    per_host=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Deliver one claimed batch. At most ``per_host`` pushes run against the
+    same partner host at a time. Returns a list of ``(job, error)`` tuples.
+    """
+    release_expired_claims()
+
+    jobs = claim_batch(batch_size=batch_size)
+    if not jobs:
+        return []
+
+    per_host = per_host or settings.THIRD_PARTY_MAX_CONCURRENCY_PER_HOST
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+    # Create every host's semaphore up front, not racily from the pool threads
+    for job in jobs:
+        host_slots[urlsplit(job.url).netloc]
+
+    def deliver(job):
+        with host_slots[urlsplit(job.url).netloc]:
+            try:
+                call_third_party_api(url=job.url, payload=job.payload)
+                return job, None
+            except Exception as e:
+                return job, str(e)
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(jobs))) as pool:
+        results = list(pool.map(deliver, jobs))
+
+    # A failed push whose object changed state meanwhile is not retried;
+    # the newer job queued behind it carries the latest state
+    failed_keys = {job.coalesce_key for job, error in results if error and job.coalesce_key}
+    superseded_keys = set(
+        ThirdPartySyncJob.objects
+        .filter(coalesce_key__in=failed_keys, status=SyncJobStatus.PENDING, claimed_by='')
+        .values_list('coalesce_key', flat=True)
+    ) if failed_keys else set()
+
+    now = timezone.now()
+    for job, error in results:
+        job.attempts += 1
+        job.claimed_by = ''
+        job.updated_at = now
+
+        if error is None:
+            job.status = SyncJobStatus.SENT
+            job.last_error = ''
+        else:
+            job.last_error = error
+            if job.coalesce_key in superseded_keys:
+                job.status = SyncJobStatus.SUPERSEDED
+            elif job.attempts >= max_attempts:
+                job.status = SyncJobStatus.FAILED
+            else:
+                job.next_attempt_at = now + retry_delay(job.attempts)
+
+    ThirdPartySyncJob.objects.bulk_update(
+        [job for job, _ in results],
+        ['status', 'attempts', 'last_error', 'next_attempt_at', 'claimed_by', 'updated_at'],
+    )
+
+    return results
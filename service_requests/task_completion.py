@@ -0,0 +1,145 @@
+"""
+Batch completion of inbox tasks for the ``tasks/complete-bulk/`` actions.
+
+The single ``complete`` action reads the task's variables, loads its row,
+writes the local decision and completes the Flowable task, one call after
+another. A batch does each step for every task at once: the variable GETs
+and completion POSTs run concurrently on a bounded pool, the rows come from
+one query and the local writes share one write transaction. Every task gets
+its own outcome; a task that fails does not hold up the others.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+
+from config.db import write_transaction
+from config.timing import propagate
+from flowable_client import get_task_variable, complete_task
+
+
+DEFAULT_CONCURRENCY = 8
+
+
+def _pool_map(fn, items, concurrency):
+    """
+    ``fn`` over ``items`` on a bounded pool, as ``(result, error)`` pairs
+    """
+    def call(item):
+        try:
+            return fn(item), None
+        except Exception as e:
+            return None, e
+
+    if not items:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as pool:
+        return list(pool.map(propagate(call), items))
+
+
+def _failure(outcome, status_code, error):
+    outcome.update(success=False, status_code=status_code, error=error)
+    return outcome
+
+
+def complete_tasks_bulk(items, *, queryset, variable, label, apply=None, conflicts=(),
+                        concurrency=DEFAULT_CONCURRENCY):
+    """
+    Complete ``items`` (``{task_id, decision}`` dicts); returns one outcome
+    dict per item, in input order.
+
+    ``variable`` names the task variable holding the row's id, looked up in
+    ``queryset``. ``apply(row, decision)`` makes a local change before the
+    completion, inside the shared write transaction but in a savepoint of
+    its own: when it raises, only that task's change is rolled back and its
+    Flowable task is left open (409 for the exception types in
+    ``conflicts``, 500 otherwise).
+    """
+    outcomes = []
+    pending = []
+    seen = set()
+
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        task_id, decision = item.get('task_id'), item.get('decision')
+        outcome = {'index': index, 'task_id': task_id, 'decision': decision}
+        outcomes.append(outcome)
+
+        if not task_id:
+            _failure(outcome, 400, 'No task id provided')
+        elif not decision:
+            _failure(outcome, 400, 'No decision provided')
+        elif task_id in seen:
+            _failure(outcome, 400, 'Task appears more than once in the batch')
+        else:
+            seen.add(task_id)
+            pending.append(outcome)
+
+    # Task variables, concurrently
+    fetched = _pool_map(lambda outcome: get_task_variable(task_id=outcome['task_id']), pending, concurrency)
+
+    resolved = []
+    for outcome, (task_info, error) in zip(pending, fetched):
+        if error is not None:
+            _failure(outcome, 404, 'Task not found')
+            continue
+
+        object_id = task_info['variables'].get(variable)
+        try:
+            outcome['object_id'] = object_id and str(queryset.model._meta.pk.to_python(object_id))
+        except ValidationError:
+            outcome['object_id'] = None
+
+        if not outcome['object_id']:
+            _failure(outcome, 404, f'Task does not have {label} id')
+            continue
+        resolved.append(outcome)
+
+    # Rows, in one query
+    rows = {
+        str(pk): row
+        for pk, row in queryset.in_bulk([outcome['object_id'] for outcome in resolved]).items()
+    }
+
+    ready = []
+    for outcome in resolved:
+        if outcome['object_id'] not in rows:
+            _failure(outcome, 404, f'Service {label} not found')
+        else:
+            ready.append(outcome)
+
+    # Local decisions, in one write transaction
+    if apply is not None:
+        applied = []
+        with write_transaction():
+            for outcome in ready:
+                try:
+                    with write_transaction():
+                        apply(rows[outcome['object_id']], outcome['decision'])
+                except conflicts as e:
+                    _failure(outcome, 409, str(e))
+                except Exception as e:
+                    _failure(outcome, 500, f'Failed to record the decision: {e}')
+                else:
+                    applied.append(outcome)
+        ready = applied
+
+    # Flowable completions, concurrently
+    completed = _pool_map(
+        lambda outcome: complete_task(task_id=outcome['task_id'], decision=outcome['decision']),
+        ready,
+        concurrency,
+    )
+
+    for outcome, (_, error) in zip(ready, completed):
+        if error is not None:
+            _failure(outcome, 500, f'Failed to complete task: {error}')
+            continue
+
+        outcome.update(
+            success=True,
+            status_code=200,
+            message=f"Initial validation {outcome['decision']} successfully",
+        )
+
+    return outcomes
@@ -1,3 +1,1399 @@
-from django.test import TestCase
+import asyncio
+from io import StringIO
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+import uuid
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import sync_jobs
+from .urls import async_urlpatterns, router as service_requests_router
+from .models import (
+    ServiceRequest,
+    ServiceOffer,
+    ProcessStartOutbox,
+    ProcessStartStatus,
+    ThirdPartySyncJob,
+    SyncJobStatus,
+)
+from .management.commands.bench_workflow import InProcessDriver, run_benchmark
+from .inbox import STALE_WARNING
+from .offers import AlreadyAwarded, decide_offer
+from .outbox import drain_process_starts
+from .sync_jobs import drain_sync_jobs, enqueue_offer_status
+from config import metrics
+from config.urls import urlpatterns as site_urlpatterns
+from config.dependencies import BulkheadFull, CircuitOpen, get_dependency, reset_dependencies
+from config.testing import EndpointBudgetMixin, QueryPlanAssertionsMixin
+from fake_flowable import FakeFlowable, fake_flowable_transport, use_fake_flowable
+from service_orders.models import ServiceOrder
+from flowable_client import (
+    AsyncFlowableClient,
+    _async_clients,
+    complete_task,
+    get_task_page,
+    inbox_cache_stats,
+    invalidate_inboxes,
+    iter_tasks_by_group,
+)
+
+
+# ROOT_URLCONF of AsyncTaskViewTests: the site as served with
+# ASYNC_TASK_VIEWS on
+urlpatterns = [path('api/requests/', include(async_urlpatterns))] + site_urlpatterns
+
+
+def flowable_task(task_id, **variables):
+    return {
+        'task_id': task_id,
+        'task_name': 'Internal Validation',
+        'process_instance_id': f'proc-{task_id}',
+        'created_time': '2026-01-01T00:00:00.000+00:00',
+        'assignee': None,
+        'variables': variables,
+    }
+
+
+# Every call returns different fake Flowable data
+@override_settings(FLOWABLE_INBOX_CACHE_TTL=0)
+class TaskInboxEnrichmentTests(TestCase):
+    """
+    The inbox endpoints must resolve every task on a Flowable page with a
+    single query, however many tasks the page holds.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_requests(self, count):
+        return [
+            ServiceRequest.objects.create(title=f'Request {i}', role_name='Developer')
+            for i in range(count)
+        ]
+
+    def create_offers(self, count):
+        service_request = ServiceRequest.objects.create(title='Request', role_name='Developer')
+        return [
+            ServiceOffer.objects.create(
+                service_request=service_request,
+                provider_name=f'Provider {i}',
+                daily_rate=500,
+                total_cost=5000,
+            )
+            for i in range(count)
+        ]
+
+    def get_request_tasks(self, tasks):
+        with mock.patch('service_requests.inbox.iter_tasks_by_group', return_value=iter(tasks)):
+            return self.client.get('/api/requests/service-requests/tasks/', {'group': 'procurement'})
+
+    def get_offer_tasks(self, tasks):
+        with mock.patch('service_requests.inbox.iter_tasks_by_group', return_value=iter(tasks)):
+            return self.client.get('/api/requests/service-offers/tasks/', {'group': 'resourcePlanners'})
+
+    def test_request_tasks_cost_one_query_per_chunk(self):
+        for count in (1, 25, 100):
+            service_requests = self.create_requests(count)
+            tasks = [
+                flowable_task(f't{i}', request_id=str(sr.id))
+                for i, sr in enumerate(service_requests)
+            ]
+
+            # One query per inbox chunk (page_size defaults to 50)
+            with self.assertNumQueries(-(-count // 50)):
+                response = self.get_request_tasks(tasks)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], count)
+
+    def test_offer_tasks_query_count_is_constant(self):
+        for count in (1, 25, 100):
+            offers = self.create_offers(count)
+            tasks = [
+                flowable_task(f't{i}', offerId=str(offer.id))
+                for i, offer in enumerate(offers)
+            ]
+
+            with self.assertNumQueries(1):
+                with mock.patch('service_requests.inbox.iter_tasks_by_group', return_value=iter(tasks)):
+                    response = self.client.get(
+                        '/api/requests/service-offers/tasks/',
+                        {'group': 'resourcePlanners', 'page_size': 500},
+                    )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], count)
+
+    def test_request_tasks_keep_order_and_skip_missing_rows(self):
+        first, second = self.create_requests(2)
+        tasks = [
+            flowable_task('t1', request_id=str(second.id)),
+            flowable_task('t2', request_id=str(uuid.uuid4())),
+            flowable_task('t3'),
+            flowable_task('t4', request_id='not-a-uuid'),
+            flowable_task('t5', request_id=str(first.id)),
+        ]
+
+        response = self.get_request_tasks(tasks)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(task['task_id'], task['service_request']['id']) for task in response.data['tasks']],
+            [('t1', second.id), ('t5', first.id)],
+        )
+        self.assertEqual(response.data['tasks'][0]['service_request']['title'], second.title)
+
+    def test_no_query_when_page_has_no_local_ids(self):
+        with self.assertNumQueries(0):
+            response = self.get_offer_tasks([flowable_task('t1')])
+
+        self.assertEqual(response.data, {'count': 0, 'tasks': []})
+
+
+class FakeTaskList:
+    """
+    Stand-in for FlowableClient.list_tasks serving `total` tasks by start/size
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.calls = []
+
+    def __call__(self, *, params):
+        self.calls.append(params)
+        start, size = params['start'], params['size']
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {
+            'data': [
+                {'id': f't{i}', 'name': 'Task', 'variables': [{'name': 'request_id', 'value': str(i)}]}
+                for i in range(start, min(start + size, self.total))
+            ],
+            'total': self.total,
+            'start': start,
+            'size': size,
+        }
+        return response
+
+
+# Every call returns different fake Flowable data
+@override_settings(FLOWABLE_INBOX_CACHE_TTL=0)
+class TaskPagerTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def patch_flowable(self, total):
+        fake = FakeTaskList(total)
+        patcher = mock.patch('flowable_client.FlowableClient.list_tasks', side_effect=fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return fake
+
+    def test_iter_tasks_fetches_every_page_in_order(self):
+        fake = self.patch_flowable(total=95)
+
+        tasks = list(iter_tasks_by_group(group_id='procurement', size=10, max_workers=3))
+
+        self.assertEqual([task['task_id'] for task in tasks], [f't{i}' for i in range(95)])
+        self.assertEqual(sorted(call['start'] for call in fake.calls), list(range(0, 95, 10)))
+
+    def test_iter_tasks_maps_sort_onto_flowable(self):
+        fake = self.patch_flowable(total=3)
+
+        list(iter_tasks_by_group(group_id='procurement', size=10, sort='-created_time'))
+
+        self.assertEqual(fake.calls[0]['sort'], 'createTime')
+        self.assertEqual(fake.calls[0]['order'], 'desc')
+
+    def test_page_parameter_fetches_a_single_flowable_page(self):
+        fake = self.patch_flowable(total=120)
+
+        response = self.client.get(
+            '/api/requests/service-requests/tasks/',
+            {'group': 'procurement', 'page': 3, 'page_size': 25},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 120)
+        self.assertEqual(response.data['page'], 3)
+        self.assertEqual(len(fake.calls), 1)
+        self.assertEqual((fake.calls[0]['start'], fake.calls[0]['size']), (50, 25))
+
+    def test_invalid_paging_parameters_are_rejected(self):
+        for params in ({'page': 0}, {'page_size': 10000}, {'page': 'x'}, {'sort': 'owner'}):
+            response = self.client.get(
+                '/api/requests/service-offers/tasks/',
+                {'group': 'suppliers', **params},
+            )
+            self.assertEqual(response.status_code, 400, params)
+
+
+class OfferSubmissionTests(TestCase):
+    """
+    A burst of offers for one request resolves the waiting execution once.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.service_request = ServiceRequest.objects.create(
+            title='Request', role_name='Developer', process_id='proc-1'
+        )
+
+        executions = mock.Mock(status_code=200)
+        executions.json.return_value = {'data': [{'id': 'exec-1', 'activityId': 'waitForApiTrigger'}]}
+        triggered = mock.Mock(status_code=200)
+
+        patchers = [
+            mock.patch('flowable_client.FlowableClient.list_executions', return_value=executions),
+            mock.patch('flowable_client.FlowableClient.trigger_message', return_value=triggered),
+        ]
+        self.list_executions, self.trigger_message = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def submit_offer(self, external_id):
+        return self.client.post('/api/requests/service-offers/', {
+            'service_request': str(self.service_request.id),
+            'external_id': external_id,
+            'daily_rate': '500.00',
+            'total_cost': '5000.00',
+        }, format='json')
+
+    def test_burst_of_offers_costs_one_execution_lookup(self):
+        first = self.submit_offer('ext-1')
+        later = [self.submit_offer(f'ext-{i}') for i in range(2, 6)]
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['executionId'], 'exec-1')
+        self.assertEqual(self.list_executions.call_count, 1)
+        self.assertEqual(
+            self.list_executions.call_args.kwargs['params'],
+            {'processInstanceId': 'proc-1', 'activityId': 'waitForApiTrigger'},
+        )
+        # The message event is consumed by the first offer
+        self.assertEqual(self.trigger_message.call_count, 1)
+        self.assertEqual({response.status_code for response in later}, {404})
+
+    def test_failed_trigger_invalidates_cached_execution(self):
+        self.trigger_message.return_value = mock.Mock(status_code=404, text='gone')
+
+        self.submit_offer('ext-1')
+        self.submit_offer('ext-2')
+
+        self.assertEqual(self.list_executions.call_count, 2)
+
+    def test_validation_decision_invalidates_cached_execution(self):
+        self.submit_offer('ext-1')
+
+        with mock.patch('service_requests.views.get_task_variable', return_value={
+            'task_id': 't1', 'variables': {'request_id': str(self.service_request.id)}
+        }), mock.patch('service_requests.views.complete_task', return_value=True):
+            response = self.client.post(
+                '/api/requests/service-requests/tasks/t1/complete/',
+                {'decision': 'rejected'},
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.submit_offer('ext-2')
+        self.assertEqual(self.list_executions.call_count, 2)
+
+    def test_resent_offer_updates_the_existing_row(self):
+        self.submit_offer('ext-1')
+        response = self.client.post('/api/requests/service-offers/', {
+            'service_request': str(self.service_request.id),
+            'external_id': 'ext-1',
+            'daily_rate': '450.00',
+            'total_cost': '4500.00',
+        }, format='json')
+
+        self.assertEqual(response.data['message'], 'Offer updated')
+        offer = ServiceOffer.objects.get()
+        self.assertEqual(str(offer.daily_rate), '450.00')
+        self.assertEqual(self.trigger_message.call_count, 1)
+
+    def test_resent_offer_keeps_its_evaluation(self):
+        self.submit_offer('ext-1')
+        ServiceOffer.objects.update(status='UNDER_REVIEW')
+        resent = {
+            'service_request': str(self.service_request.id),
+            'external_id': 'ext-1',
+            'status': 'SUBMITTED',
+            'daily_rate': '450.00',
+            'total_cost': '4500.00',
+        }
+
+        self.client.post('/api/requests/service-offers/', resent, format='json')
+        offer = ServiceOffer.objects.get()
+        self.assertEqual((offer.status, str(offer.daily_rate)), ('UNDER_REVIEW', '450.00'))
+
+        ServiceOffer.objects.update(status='REJECTED')
+        response = self.client.post('/api/requests/service-offers/', {**resent, 'daily_rate': '400.00'}, format='json')
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.post('/api/requests/service-offers/bulk/', [{**resent, 'daily_rate': '400.00'}], format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['updated'], response.data['failed']), (0, 1))
+
+        offer = ServiceOffer.objects.get()
+        self.assertEqual((offer.status, str(offer.daily_rate)), ('REJECTED', '450.00'))
+
+    def test_offer_before_process_start_triggers_nothing(self):
+        self.service_request.process_id = None
+        self.service_request.save()
+
+        response = self.submit_offer('ext-1')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['trigger'], 'no_process')
+        self.assertEqual(ServiceOffer.objects.count(), 1)
+        self.assertFalse(self.list_executions.called)
+        self.assertFalse(self.trigger_message.called)
+
+    def test_update_to_a_taken_external_id_is_rejected(self):
+        self.submit_offer('ext-1')
+        self.submit_offer('ext-2')
+        offer = ServiceOffer.objects.get(external_id='ext-2')
+
+        response = self.client.patch(
+            f'/api/requests/service-offers/{offer.id}/', {'external_id': 'ext-1'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_offers_trigger_each_process_once(self):
+        other = ServiceRequest.objects.create(title='Other', role_name='Developer', process_id='proc-2')
+        items = [
+            {
+                'service_request': str(service_request.id),
+                'external_id': f'ext-{service_request.process_id}-{i}',
+                'daily_rate': '500.00',
+                'total_cost': '5000.00',
+            }
+            for service_request in (self.service_request, other)
+            for i in range(10)
+        ]
+        items.append({'service_request': str(other.id), 'daily_rate': 'lots'})
+        items.append({'service_request': str(uuid.uuid4()), 'daily_rate': '500.00', 'total_cost': '5000.00'})
+
+        response = self.client.post('/api/requests/service-offers/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['created'], response.data['failed']), (20, 2))
+        self.assertIn('service_request', response.data['results'][-1]['errors'])
+        self.assertEqual(self.trigger_message.call_count, 2)
+        self.assertEqual(
+            {process_id: result['status'] for process_id, result in response.data['processes'].items()},
+            {'proc-1': 'triggered', 'proc-2': 'triggered'},
+        )
+        offer_ids = self.trigger_message.call_args.kwargs['variables'][1]['value'].split(',')
+        self.assertEqual(len(offer_ids), 10)
+
+        # The partner re-sends the same batch
+        response = self.client.post('/api/requests/service-offers/bulk/', items[:-2], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 20))
+        self.assertEqual({result['trigger'] for result in response.data['results']}, {'duplicate'})
+        self.assertEqual(ServiceOffer.objects.count(), 20)
+        self.assertEqual(self.trigger_message.call_count, 2)
+
+
+class ProcessStartOutboxTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_request(self):
+        return self.client.post('/api/requests/service-requests/', {
+            'title': 'Backend developer',
+            'role_name': 'Developer',
+        }, format='json')
+
+    def test_create_queues_process_start_without_calling_flowable(self):
+        with mock.patch('service_requests.outbox.generate_request_task') as generate:
+            response = self.create_request()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['process_status'], 'PENDING')
+        generate.assert_not_called()
+
+        entry = ProcessStartOutbox.objects.get()
+        self.assertEqual(str(entry.service_request_id), response.data['service_request_id'])
+
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.data['process_status'], 'PENDING')
+
+    def test_drain_backfills_process_ids(self):
+        ids = [self.create_request().data['service_request_id'] for _ in range(3)]
+
+        with mock.patch(
+            'service_requests.outbox.generate_request_task',
+            side_effect=lambda request_id: {'id': f'proc-{request_id}'},
+        ):
+            call_command('drain_process_outbox', stdout=StringIO())
+
+        for request_id in ids:
+            self.assertEqual(ServiceRequest.objects.get(id=request_id).process_id, f'proc-{request_id}')
+        self.assertEqual(
+            set(ProcessStartOutbox.objects.values_list('status', flat=True)),
+            {ProcessStartStatus.STARTED},
+        )
+
+    def test_failed_start_is_retried_later_then_marked_failed(self):
+        request_id = self.create_request().data['service_request_id']
+
+        with mock.patch('service_requests.outbox.generate_request_task', side_effect=Exception('down')):
+            drain_process_starts()
+            entry = ProcessStartOutbox.objects.get()
+            self.assertEqual((entry.status, entry.attempts, entry.last_error), ('PENDING', 1, 'down'))
+            self.assertGreater(entry.next_attempt_at, timezone.now())
+
+            # Not due yet, nothing is claimed
+            self.assertEqual(drain_process_starts(), [])
+
+            ProcessStartOutbox.objects.update(next_attempt_at=timezone.now())
+            drain_process_starts(max_attempts=2)
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('FAILED', 2))
+        self.assertIsNone(ServiceRequest.objects.get(id=request_id).process_id)
+
+    def test_bulk_create_starts_processes_and_reports_each_item(self):
+        def start(request_id):
+            if request_id.startswith('0'):
+                raise Exception('down')
+            return {'id': f'proc-{request_id}'}
+
+        items = [{'title': f'Request {i}', 'role_name': 'Developer'} for i in range(20)]
+        items[5] = {'role_name': 'Developer'}
+
+        with mock.patch('service_requests.outbox.generate_request_task', side_effect=start):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/api/requests/service-requests/bulk/', items, format='json')
+
+        # Two inserts, claim (select, update, fetch), two bulk updates
+        statements = [query for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 7)
+
+        self.assertIn(response.status_code, (201, 207))
+        self.assertEqual((response.data['created'], response.data['failed']), (19, 1))
+        self.assertFalse(response.data['results'][5]['success'])
+        self.assertIn('title', response.data['results'][5]['errors'])
+
+        for result in response.data['results']:
+            if not result['success']:
+                continue
+            service_request = ServiceRequest.objects.get(id=result['service_request_id'])
+            self.assertEqual(service_request.process_id, result['process_id'])
+            if result['process_id']:
+                self.assertEqual(result['process_status'], 'STARTED')
+            else:
+                # Left to the outbox worker
+                self.assertEqual(result['process_status'], 'PENDING')
+                self.assertEqual(result['process_error'], 'down')
+
+    def test_bulk_create_rejects_non_lists(self):
+        response = self.client.post('/api/requests/service-requests/bulk/', {'title': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(THIRD_PARTY_API_BASE='https://partner.example/api')
+class ThirdPartySyncJobTests(TestCase):
+
+    def setUp(self):
+        service_request = ServiceRequest.objects.create(title='Request', role_name='Developer')
+        self.offer = ServiceOffer.objects.create(
+            service_request=service_request,
+            external_id='ext-1',
+            daily_rate=500,
+            total_cost=5000,
+        )
+
+    def set_status(self, offer_status):
+        self.offer.status = offer_status
+        self.offer.save()
+        enqueue_offer_status(self.offer)
+
+    def test_successive_status_changes_are_coalesced(self):
+        self.set_status('UNDER_REVIEW')
+        self.set_status('ACCEPTED')
+
+        job = ThirdPartySyncJob.objects.get()
+        self.assertEqual(job.payload, {'id': 'ext-1', 'status': 'ACCEPTED'})
+
+        with mock.patch('service_requests.sync_jobs.call_third_party_api') as push:
+            results = drain_sync_jobs()
+
+        push.assert_called_once_with(
+            url='https://partner.example/api/requests/service-offers/update-status/',
+            payload={'id': 'ext-1', 'status': 'ACCEPTED'},
+        )
+        self.assertEqual(results[0][1], None)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJobStatus.SENT)
+
+    def test_offer_without_external_id_is_not_pushed(self):
+        self.offer.external_id = None
+        self.set_status('REJECTED')
+
+        self.assertFalse(ThirdPartySyncJob.objects.exists())
+
+    def test_in_flight_job_is_not_merged_or_overtaken(self):
+        self.set_status('UNDER_REVIEW')
+        in_flight = sync_jobs.claim_batch()
+
+        self.set_status('ACCEPTED')
+
+        self.assertEqual(ThirdPartySyncJob.objects.count(), 2)
+        self.assertEqual(in_flight[0].payload['status'], 'UNDER_REVIEW')
+        # The newer state waits until the in-flight push has finished
+        self.assertEqual(sync_jobs.claim_batch(), [])
+
+    def test_failed_push_backs_off(self):
+        self.set_status('ACCEPTED')
+
+        with mock.patch('service_requests.sync_jobs.call_third_party_api', side_effect=Exception('timeout')):
+            drain_sync_jobs()
+
+        job = ThirdPartySyncJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.last_error), ('PENDING', 1, 'timeout'))
+        self.assertGreater(job.next_attempt_at, timezone.now())
+        self.assertEqual(drain_sync_jobs(), [])
+
+    def test_offer_decision_does_not_call_partner_inline(self):
+        task = {'task_id': 't1', 'variables': {'offerId': str(self.offer.id)}}
+
+        with mock.patch('service_requests.offer_views.get_task_variable', return_value=task), \
+                mock.patch('service_requests.offer_views.complete_task', return_value=True), \
+                mock.patch('flowable_client.requests.post') as post:
+            response = APIClient().post(
+                '/api/requests/service-offers/tasks/t1/complete/',
+                {'decision': 'final_rejection'},
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        post.assert_not_called()
+        self.assertEqual(ThirdPartySyncJob.objects.get().payload, {'id': 'ext-1', 'status': 'REJECTED'})
+
+
+@override_settings(THIRD_PARTY_API_BASE='https://partner.example/api')
+class BulkTaskCompletionTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.variables = {}
+        self.failing = set()
+
+        def get_task_variable(*, task_id):
+            if task_id not in self.variables:
+                raise Exception('404')
+            return {'task_id': task_id, 'variables': self.variables[task_id]}
+
+        def complete(*, task_id, decision):
+            if task_id in self.failing:
+                raise Exception('timeout')
+            return True
+
+        patchers = [
+            mock.patch('service_requests.task_completion.get_task_variable', side_effect=get_task_variable),
+            mock.patch('service_requests.task_completion.complete_task', side_effect=complete),
+        ]
+        self.get_task_variable, self.complete_task = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_request_tasks_complete_independently(self):
+        requests = [
+            ServiceRequest.objects.create(title=f'Request {i}', role_name='Developer', status='DRAFT')
+            for i in range(3)
+        ]
+        for i, service_request in enumerate(requests):
+            self.variables[f't{i}'] = {'request_id': str(service_request.id)}
+        self.variables['t-orphan'] = {'request_id': str(uuid.uuid4())}
+        self.failing.add('t2')
+
+        with mock.patch('service_requests.views.third_party_request_payload', return_value={}):
+            response = self.client.post('/api/requests/service-requests/tasks/complete-bulk/', [
+                {'task_id': 't0', 'decision': 'approved'},
+                {'task_id': 't1', 'decision': 'rejected'},
+                {'task_id': 't2', 'decision': 'approved'},
+                {'task_id': 't-missing', 'decision': 'approved'},
+                {'task_id': 't-orphan', 'decision': 'approved'},
+                {'task_id': 't0', 'decision': 'approved'},
+                {'task_id': 't3'},
+            ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['completed'], response.data['failed']), (2, 5))
+        self.assertEqual(
+            [outcome['status_code'] for outcome in response.data['results']],
+            [200, 200, 500, 404, 404, 400, 400],
+        )
+        self.assertEqual(self.complete_task.call_count, 3)
+        self.assertEqual(
+            set(ServiceRequest.objects.values_list('status', flat=True)),
+            {'OPEN'},
+        )
+        # Only approvals are pushed to the partner
+        self.assertEqual(ThirdPartySyncJob.objects.count(), 2)
+
+    def test_cached_execution_is_forgotten_after_commit(self):
+        service_request = ServiceRequest.objects.create(title='Request', role_name='Developer', process_id='proc-1')
+        self.variables['t0'] = {'request_id': str(service_request.id)}
+
+        with mock.patch('service_requests.views.invalidate_waiting_execution') as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/requests/service-requests/tasks/complete-bulk/', [
+                {'task_id': 't0', 'decision': 'rejected'},
+            ], format='json')
+            self.assertFalse(invalidate.called)
+
+        invalidate.assert_called_once_with(process_instance_id='proc-1')
+
+    def test_losing_acceptance_leaves_its_task_open(self):
+        service_request = ServiceRequest.objects.create(
+            title='Request',
+            role_name='Developer',
+            start_date='2026-01-01',
+            end_date='2026-06-30',
+            expected_man_days=100,
+        )
+        offers = [
+            ServiceOffer.objects.create(
+                service_request=service_request,
+                external_id=f'ext-{i}',
+                provider_id='sup-1',
+                provider_name='Supplier',
+                specialist_id=f'spec-{i}',
+                specialist_name='Specialist',
+                daily_rate=500,
+                total_cost=5000,
+            )
+            for i in range(2)
+        ]
+        self.variables = {f't{i}': {'offerId': str(offer.id)} for i, offer in enumerate(offers)}
+
+        response = self.client.post('/api/requests/service-offers/tasks/complete-bulk/', [
+            {'task_id': 't0', 'decision': 'final_approval'},
+            {'task_id': 't1', 'decision': 'final_approval'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([outcome['status_code'] for outcome in response.data['results']], [200, 409])
+        self.assertEqual([call.kwargs['task_id'] for call in self.complete_task.call_args_list], ['t0'])
+        self.assertEqual(
+            list(ServiceOrder.objects.values_list('winning_offer_id', flat=True)),
+            [str(offers[0].id)],
+        )
+
+
+@override_settings(THIRD_PARTY_API_BASE='https://partner.example/api')
+class OfferAwardTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.service_request = ServiceRequest.objects.create(
+            title='Request',
+            role_name='Developer',
+            start_date='2026-01-01',
+            end_date='2026-06-30',
+            expected_man_days=100,
+            process_id='proc-1',
+        )
+        self.offers = [
+            ServiceOffer.objects.create(
+                service_request=self.service_request,
+                external_id=f'ext-{i}',
+                provider_id='sup-1',
+                provider_name='Supplier',
+                specialist_id=f'spec-{i}',
+                specialist_name='Specialist',
+                daily_rate=500,
+                total_cost=5000,
+            )
+            for i in range(3)
+        ]
+
+    def decide(self, offer, decision, complete=True):
+        task = {'task_id': 't1', 'variables': {'offerId': str(offer.id)}}
+
+        with mock.patch('service_requests.offer_views.get_task_variable', return_value=task), \
+                mock.patch('service_requests.offer_views.complete_task',
+                           return_value=True, side_effect=None if complete else Exception('down')) as complete_task:
+            response = self.client.post(
+                '/api/requests/service-offers/tasks/t1/complete/',
+                {'decision': decision},
+                format='json',
+            )
+        self.completed = complete_task.call_count
+        return response
+
+    def test_award_rejects_competing_offers(self):
+        response = self.decide(self.offers[0], 'final_approval')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(ServiceOrder.objects.values_list('winning_offer_id', 'current_specialist_id')),
+            [(str(self.offers[0].id), 'spec-0')],
+        )
+        self.service_request.refresh_from_db()
+        self.assertEqual(self.service_request.status, 'AWARDED')
+        self.assertEqual(
+            dict(ServiceOffer.objects.values_list('external_id', 'status')),
+            {'ext-0': 'ACCEPTED', 'ext-1': 'REJECTED', 'ext-2': 'REJECTED'},
+        )
+        self.assertEqual(
+            sorted(ThirdPartySyncJob.objects.values_list('payload__id', 'payload__status')),
+            [('ext-0', 'ACCEPTED'), ('ext-1', 'REJECTED'), ('ext-2', 'REJECTED')],
+        )
+
+    def test_awarded_request_is_not_awarded_again(self):
+        self.decide(self.offers[0], 'final_approval')
+        response = self.decide(self.offers[1], 'final_approval')
+
+        self.assertEqual(response.status_code, 409)
+        # Refused before Flowable hears of it: the losing task stays open
+        self.assertEqual(self.completed, 0)
+        self.assertEqual(ServiceOrder.objects.count(), 1)
+        self.offers[1].refresh_from_db()
+        self.assertEqual(self.offers[1].status, 'REJECTED')
+
+    def test_failed_completion_can_be_retried(self):
+        response = self.decide(self.offers[0], 'final_approval', complete=False)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(ServiceOrder.objects.count(), 1)
+
+        response = self.decide(self.offers[0], 'final_approval')
+
+        self.assertEqual((response.status_code, self.completed), (200, 1))
+        self.assertEqual(ServiceOrder.objects.count(), 1)
+        self.assertEqual(ThirdPartySyncJob.objects.filter(payload__id='ext-0').count(), 1)
+
+    def test_refused_award_leaves_offer_status_alone(self):
+        self.decide(self.offers[0], 'final_approval')
+        offer = ServiceOffer.objects.select_related('service_request').get(pk=self.offers[1].pk)
+        offer.status = None
+
+        with self.assertRaises(AlreadyAwarded):
+            decide_offer(offer, 'final_approval')
+
+        self.assertIsNone(offer.status)
+
+
+class QueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """
+    Hot list/filter paths must be served by index searches on a seeded
+    dataset: no full table scans and no temp B-tree sorts.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        statuses = ['DRAFT', 'OPEN', 'CLOSED', 'AWARDED']
+        cls.service_requests = [
+            ServiceRequest.objects.create(title=f'Request {i}', role_name='Developer', status=statuses[i % 4])
+            for i in range(40)
+        ]
+        for i in range(200):
+            ServiceOffer.objects.create(
+                service_request=cls.service_requests[i % 40],
+                daily_rate=500,
+                total_cost=5000,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_request_list(self):
+        self.assertIndexedPlans(self.client.get, '/api/requests/service-requests/')
+
+    def test_request_list_by_status(self):
+        response = self.assertIndexedPlans(
+            self.client.get, '/api/requests/service-requests/', {'status': 'OPEN', 'page_size': 5}
+        )
+        self.assertIndexedPlans(self.client.get, response.data['next'])
+
+    def test_offer_list_by_request(self):
+        self.assertIndexedPlans(
+            self.client.get,
+            '/api/requests/service-offers/',
+            {'service_request': str(self.service_requests[3].id)},
+        )
+
+    def test_offer_list(self):
+        self.assertIndexedPlans(self.client.get, '/api/requests/service-offers/')
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.service_request = ServiceRequest.objects.create(title='Request', role_name='Developer')
+        self.offer = ServiceOffer.objects.create(service_request=self.service_request, daily_rate=500, total_cost=5000)
+
+    def test_offer_validators_follow_the_inlined_request(self):
+        for url in ('/api/requests/service-offers/', f'/api/requests/service-offers/{self.offer.id}/'):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, url)
+
+            self.service_request.title = 'Renamed'
+            self.service_request.save()
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.data.get('title') or response.data['results'][0]['title'], 'Renamed')
+
+
+@override_settings(FLOWABLE_INBOX_CACHE_TTL=60)
+class InboxCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.fake = FakeTaskList(3)
+        patcher = mock.patch('flowable_client.FlowableClient.list_tasks', side_effect=self.fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_tasks(self, group, **params):
+        return self.client.get('/api/requests/service-requests/tasks/', {'group': group, **params})
+
+    def test_polls_share_one_flowable_call_per_group(self):
+        for _ in range(3):
+            self.assertEqual(self.get_tasks('procurement').status_code, 200)
+            self.get_tasks('procurement', page=1)
+        self.get_tasks('suppliers')
+
+        # whole inbox + page 1 for procurement, whole inbox for suppliers
+        self.assertEqual(len(self.fake.calls), 3)
+        self.assertEqual(
+            inbox_cache_stats(['procurement', 'suppliers']),
+            {'procurement': {'hits': 4, 'misses': 2}, 'suppliers': {'hits': 0, 'misses': 1}},
+        )
+
+    def test_completing_a_task_invalidates_every_group(self):
+        self.get_tasks('procurement')
+        self.get_tasks('suppliers')
+
+        with mock.patch('flowable_client.FlowableClient.complete_task', return_value=mock.Mock(status_code=200)):
+            complete_task(task_id='t1', decision='approved')
+
+        self.get_tasks('procurement')
+        self.get_tasks('suppliers')
+        self.assertEqual(len(self.fake.calls), 4)
+
+
+class FakeFlowableLifecycleTests(TestCase):
+    """
+    The real views against fake_flowable's run of the BPMN process
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        fake = use_fake_flowable(FakeFlowable(seed=1))
+        self.fake = fake.__enter__()
+        self.addCleanup(fake.__exit__, None, None, None)
+
+    def create_request(self):
+        response = self.client.post('/api/requests/service-requests/', {
+            'title': 'Backend developer',
+            'role_name': 'Developer',
+            'start_date': '2026-01-01',
+            'end_date': '2026-06-30',
+            'expected_man_days': 100,
+            'offer_deadline': '2025-12-15',
+        }, format='json')
+        drain_process_starts()
+        return ServiceRequest.objects.get(id=response.data['service_request_id'])
+
+    def inbox(self, viewset, group):
+        response = self.client.get(f'/api/requests/{viewset}/tasks/', {'group': group})
+        return response.data['tasks']
+
+    def decide(self, viewset, task, decision):
+        return self.client.post(
+            f"/api/requests/{viewset}/tasks/{task['task_id']}/complete/",
+            {'decision': decision},
+            format='json',
+        )
+
+    def test_request_runs_through_validation_and_offer_intake(self):
+        service_request = self.create_request()
+        self.assertIn(service_request.process_id, self.fake.instances)
+
+        [task] = self.inbox('service-requests', 'procurement')
+        self.assertEqual(task['service_request']['id'], service_request.id)
+        self.assertEqual(self.decide('service-requests', task, 'approved').status_code, 200)
+        self.assertEqual(self.inbox('service-requests', 'procurement'), [])
+
+        response = self.client.post('/api/requests/service-offers/', {
+            'service_request': str(service_request.id),
+            'external_id': 'ext-1',
+            'daily_rate': '500.00',
+            'total_cost': '50000.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        offer = ServiceOffer.objects.get()
+        [task] = self.inbox('service-offers', 'suppliers')
+        self.assertEqual((task['task_name'], task['offer']['id']), ('Receive Supplier Offers', offer.id))
+
+    def test_rejected_request_returns_to_validation(self):
+        self.create_request()
+        [task] = self.inbox('service-requests', 'procurement')
+
+        self.decide('service-requests', task, 'rejected')
+
+        [again] = self.inbox('service-requests', 'procurement')
+        self.assertNotEqual(again['task_id'], task['task_id'])
+
+    def test_injected_failures_reach_the_outbox(self):
+        self.fake.error_rate = 1
+
+        service_request = self.create_request()
+
+        entry = service_request.process_start
+        self.assertEqual(entry.status, ProcessStartStatus.PENDING)
+        self.assertIn('503', entry.last_error)
+        self.assertEqual(self.fake.instances, {})
+
+
+@override_settings(ROOT_URLCONF=__name__, FLOWABLE_INBOX_CACHE_TTL=0)
+class AsyncTaskViewTests(TestCase):
+    """
+    The ASGI inbox views, with AsyncFlowableClient talking to fake_flowable
+    """
+
+    def setUp(self):
+        cache.clear()
+        reset_dependencies()
+        self.addCleanup(reset_dependencies)
+
+        fake = use_fake_flowable(FakeFlowable(seed=1))
+        self.fake = fake.__enter__()
+        self.addCleanup(fake.__exit__, None, None, None)
+        self.transport = fake_flowable_transport(self.fake, settings.FLOWABLE_BASE_URL)
+
+        APIClient().post('/api/requests/service-requests/', {
+            'title': 'Backend developer',
+            'role_name': 'Developer',
+            'start_date': '2026-01-01',
+            'end_date': '2026-06-30',
+            'expected_man_days': 100,
+            'offer_deadline': '2025-12-15',
+        }, format='json')
+        drain_process_starts()
+        self.service_request = ServiceRequest.objects.get()
+        self.client = AsyncClient()
+
+    async def use_transport(self):
+        # One client per event loop; each async test runs in a fresh one
+        _async_clients[asyncio.get_running_loop()] = AsyncFlowableClient(
+            base_url=settings.FLOWABLE_BASE_URL, auth=settings.FLOWABLE_AUTH, backoff_factor=0, transport=self.transport,
+        )
+
+    async def inbox(self, viewset, group):
+        response = await self.client.get(f'/api/requests/{viewset}/tasks/', {'group': group})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['tasks']
+
+    async def decide(self, viewset, task, decision):
+        return await self.client.post(
+            f"/api/requests/{viewset}/tasks/{task['task_id']}/complete/",
+            {'decision': decision},
+            content_type='application/json',
+        )
+
+    async def approve_request(self):
+        [task] = await self.inbox('service-requests', 'procurement')
+        response = await self.decide('service-requests', task, 'approved')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        await sync_to_async(APIClient().post)('/api/requests/service-offers/', {
+            'service_request': str(self.service_request.id),
+            'external_id': 'ext-1',
+            'provider_id': 'sup-1',
+            'provider_name': 'Supplier',
+            'specialist_id': 'spec-1',
+            'specialist_name': 'Specialist',
+            'daily_rate': '500.00',
+            'total_cost': '50000.00',
+        }, format='json')
+        return await ServiceOffer.objects.aget()
+
+    async def test_request_task_is_listed_and_completed(self):
+        await self.use_transport()
+
+        [task] = await self.inbox('service-requests', 'procurement')
+        self.assertEqual(task['service_request']['id'], str(self.service_request.id))
+
+        response = await self.decide('service-requests', task, 'approved')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await ServiceRequest.objects.aget()).status, 'OPEN')
+        self.assertEqual(await self.inbox('service-requests', 'procurement'), [])
+
+    async def test_offer_task_is_listed_and_accepted(self):
+        await self.use_transport()
+        offer = await self.approve_request()
+
+        [task] = await self.inbox('service-offers', 'suppliers')
+        self.assertEqual(task['offer']['id'], str(offer.id))
+
+        response = await self.decide('service-offers', task, 'final_approval')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((await ServiceOffer.objects.aget()).status, 'ACCEPTED')
+        self.assertTrue(await ServiceOrder.objects.filter(winning_offer_id=str(offer.id)).aexists())
+
+    async def test_failed_completion_is_logged(self):
+        fake = self.transport.handler
+
+        def handler(request):
+            if request.method == 'POST':
+                return httpx.Response(500, json={'message': 'Boom'})
+            return fake(request)
+
+        self.transport = httpx.MockTransport(handler)
+        await self.use_transport()
+        [task] = await self.inbox('service-requests', 'procurement')
+
+        with self.assertLogs('service_requests.async_views', 'ERROR') as logs:
+            response = await self.decide('service-requests', task, 'approved')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn(task['task_id'], logs.output[0])
+
+    async def test_inbox_is_unavailable_while_flowable_is_shed(self):
+        await self.use_transport()
+        get_dependency('flowable').breaker._open()
+        calls = self.fake.call_count
+
+        response = await self.client.get('/api/requests/service-offers/tasks/', {'group': 'suppliers'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.fake.call_count, calls)
+
+    async def test_client_retries_reads_with_backoff(self):
+        statuses = iter([503, 502, 200])
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            return httpx.Response(next(statuses), json={'data': [], 'total': 0})
+
+        client = AsyncFlowableClient(base_url='http://flowable', auth=(None, None), backoff_factor=0.01,
+                                     transport=httpx.MockTransport(handler))
+        with mock.patch('flowable_client.asyncio.sleep', wraps=asyncio.sleep) as sleep:
+            response = await client.list_tasks(params={})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.01, 0.02])
+
+        statuses = iter([503])
+        response = await client.complete_task(task_id='t1', variables=[])
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(calls, ['GET', 'GET', 'GET', 'POST'])
+
+    async def test_client_gives_up_after_repeated_transport_errors(self):
+        def handler(request):
+            raise httpx.ConnectError('refused', request=request)
+
+        client = AsyncFlowableClient(base_url='http://flowable', auth=(None, None), max_retries=2, backoff_factor=0,
+                                     transport=httpx.MockTransport(handler))
+
+        with self.assertRaises(httpx.ConnectError):
+            await client.get_task_variables(task_id='t1')
+
+
+class RequestTimingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        fake = use_fake_flowable(FakeFlowable(seed=1))
+        self.fake = fake.__enter__()
+        self.addCleanup(fake.__exit__, None, None, None)
+
+        for index in range(2):
+            self.client.post('/api/requests/service-requests/', {
+                'title': f'Request {index}', 'role_name': 'Developer',
+            }, format='json')
+        drain_process_starts()
+
+    def server_timing(self, response):
+        metrics = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            params = dict(param.split('=', 1) for param in params)
+            metrics[name] = (int(params['desc'].strip('"').split()[0]) if 'desc' in params else None, float(params['dur']))
+        return metrics
+
+    def test_breakdown_goes_to_header_and_log(self):
+        calls = self.fake.call_count
+
+        with self.assertLogs('config.timing', 'INFO') as logs:
+            response = self.client.get('/api/requests/service-requests/tasks/', {'group': 'procurement'})
+
+        timing = self.server_timing(response)
+        self.assertEqual(timing['flowable'][0], self.fake.call_count - calls)
+        self.assertEqual(timing['db'][0], 1)
+        self.assertEqual(timing['serialize'][0], 1)
+        self.assertEqual(timing['partner'], (0, 0.0))
+        self.assertGreaterEqual(timing['total'][1], timing['flowable'][1])
+
+        [record] = [json.loads(output.split(':', 2)[2]) for output in logs.output]
+        self.assertEqual(record['route'], 'api/requests/service-requests/tasks/$')
+        self.assertEqual((record['status'], record['flowable_count']), (200, timing['flowable'][0]))
+
+    def test_serializer_output_is_counted(self):
+        response = self.client.get('/api/requests/service-requests/')
+
+        # One per request on the page, plus rendering the JSON
+        self.assertEqual(self.server_timing(response)['serialize'][0], len(response.data['results']) + 1)
+
+    def test_calls_fanned_out_to_a_pool_are_counted(self):
+        tasks = self.client.get('/api/requests/service-requests/tasks/', {'group': 'procurement'}).data['tasks']
+        calls = self.fake.call_count
+
+        response = self.client.post('/api/requests/service-requests/tasks/complete-bulk/', [
+            {'task_id': task['task_id'], 'decision': 'rejected'} for task in tasks
+        ], format='json')
+
+        self.assertEqual(response.data['completed'], 2)
+        # Two variable reads and two completions, all on pool threads
+        self.assertEqual(self.server_timing(response)['flowable'][0], self.fake.call_count - calls)
+        self.assertEqual(self.fake.call_count - calls, 4)
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        fake = use_fake_flowable(FakeFlowable(seed=1))
+        self.fake = fake.__enter__()
+        self.addCleanup(fake.__exit__, None, None, None)
+
+    def sample(self, name, **labels):
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        for line in response.content.decode().splitlines():
+            series, _, value = line.rpartition(' ')
+            if series == (f'{name}{{{wanted}}}' if wanted else name):
+                return float(value)
+        return 0
+
+    def test_routes_flowable_calls_and_inbox_cache_are_exported(self):
+        inbox = {
+            'method': 'GET', 'route': 'api/requests/service-requests/tasks/$',
+            'action': 'get_tasks', 'status': '200',
+        }
+        before = (
+            self.sample('http_request_duration_seconds_count', **inbox),
+            self.sample('flowable_request_duration_seconds_count', operation='start_process'),
+            self.sample('inbox_cache_lookups_total', group='procurement', outcome='hit'),
+            self.sample('flowable_request_errors_total', operation='get_task_variables', reason='404'),
+        )
+
+        self.client.post('/api/requests/service-requests/', {'title': 'Request', 'role_name': 'Developer'}, format='json')
+        drain_process_starts()
+        for _ in range(2):
+            self.client.get('/api/requests/service-requests/tasks/', {'group': 'procurement'})
+        self.client.post('/api/requests/service-requests/tasks/missing/complete/', {'decision': 'approved'}, format='json')
+
+        after = (
+            self.sample('http_request_duration_seconds_count', **inbox),
+            self.sample('flowable_request_duration_seconds_count', operation='start_process'),
+            self.sample('inbox_cache_lookups_total', group='procurement', outcome='hit'),
+            self.sample('flowable_request_errors_total', operation='get_task_variables', reason='404'),
+        )
+        self.assertEqual([b - a for a, b in zip(before, after)], [2, 1, 1, 1])
+        self.assertEqual(self.sample('flowable_pool_connections_in_use', client='sync'), 0)
+        self.assertEqual(self.sample('flowable_pool_connections_max', client='sync'), settings.FLOWABLE_POOL_SIZE)
+
+    def test_other_processes_are_merged(self):
+        snapshot = {
+            'inbox_cache_lookups_total': [[['other', 'hit'], 3]],
+            'partner_push_in_flight': [[['partner.example'], 2]],
+        }
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            def write(key):
+                with open(os.path.join(directory, f'metrics-{key}.json'), 'w') as f:
+                    json.dump(snapshot, f)
+
+            # A live process holds its lock; an exited one's lock is free
+            live_lock = metrics._try_lock(os.path.join(directory, 'metrics-100-1.lock'))
+            self.addCleanup(live_lock.close)
+            write('100-1')
+            write('200-1')
+
+            # Counters from every process, gauges from live ones only
+            self.assertEqual(self.sample('inbox_cache_lookups_total', group='other', outcome='hit'), 6)
+            self.assertEqual(self.sample('partner_push_in_flight', host='partner.example'), 2)
+            self.assertTrue(os.path.exists(os.path.join(directory, f'metrics-{metrics._process_key}.json')))
+
+            # The exited process was folded into the retired totals
+            self.assertFalse(os.path.exists(os.path.join(directory, 'metrics-200-1.json')))
+            self.assertEqual(self.sample('inbox_cache_lookups_total', group='other', outcome='hit'), 6)
+
+            # A reused PID is a new process, not the old one restarting
+            write('200-2')
+            self.assertEqual(self.sample('inbox_cache_lookups_total', group='other', outcome='hit'), 9)
+
+
+class DependencyGuardTests(TestCase):
+    """
+    Circuit breaker, bulkhead and stale inbox fallback around Flowable
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        fake = use_fake_flowable(FakeFlowable(seed=1))
+        self.fake = fake.__enter__()
+        self.addCleanup(fake.__exit__, None, None, None)
+
+        limits = override_settings(DEPENDENCY_LIMITS={
+            **settings.DEPENDENCY_LIMITS,
+            'flowable': {**settings.DEPENDENCY_LIMITS['flowable'], 'window': 4, 'min_calls': 2, 'max_wait': 0},
+        })
+        limits.enable()
+        self.addCleanup(limits.disable)
+        reset_dependencies()
+        self.addCleanup(reset_dependencies)
+
+    def test_circuit_opens_then_fails_fast(self):
+        self.fake.error_rate = 1
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                get_task_page(group_id='procurement')
+        calls = self.fake.call_count
+
+        with self.assertRaises(CircuitOpen):
+            get_task_page(group_id='procurement')
+        self.assertEqual(self.fake.call_count, calls)
+
+    def test_trial_call_closes_the_circuit(self):
+        breaker = get_dependency('flowable').breaker
+        breaker.reset_timeout = 0
+        breaker._open()
+
+        get_task_page(group_id='procurement')
+
+        self.assertEqual(breaker.state, breaker.CLOSED)
+
+    def test_cancelled_trial_call_frees_the_trial(self):
+        dependency = get_dependency('flowable')
+        dependency.breaker.reset_timeout = 0
+        dependency.breaker._open()
+
+        async def trial():
+            async with dependency.acall():
+                await asyncio.sleep(10)
+
+        async def cancel_trial():
+            task = asyncio.ensure_future(trial())
+            await asyncio.sleep(0)
+            self.assertEqual(dependency.breaker.state, dependency.breaker.HALF_OPEN)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_trial())
+
+        get_task_page(group_id='procurement')
+        self.assertEqual(dependency.breaker.state, dependency.breaker.CLOSED)
+
+    def test_bulkhead_bounds_calls_in_flight(self):
+        dependency = get_dependency('flowable')
+        held = [dependency.call() for _ in range(settings.DEPENDENCY_LIMITS['flowable']['max_concurrent'])]
+        for guard in held:
+            guard.__enter__()
+
+        with self.assertRaises(BulkheadFull):
+            get_task_page(group_id='procurement')
+
+        for guard in held:
+            guard.__exit__(None, None, None)
+        get_task_page(group_id='procurement')
+
+    def test_async_calls_wait_for_a_slot(self):
+        dependency = get_dependency('flowable')
+        dependency.async_bulkhead.max_concurrent = 2
+
+        async def flowable_call():
+            async with dependency.acall():
+                await asyncio.sleep(0.01)
+
+        async def burst(max_wait):
+            dependency.async_bulkhead.max_wait = max_wait
+            return await asyncio.gather(*(flowable_call() for _ in range(10)), return_exceptions=True)
+
+        # Queued on the event loop instead of turned away...
+        self.assertEqual(asyncio.run(burst(1)), [None] * 10)
+        # ...until the wait runs out
+        outcomes = asyncio.run(burst(0.001))
+        self.assertEqual(sum(isinstance(outcome, BulkheadFull) for outcome in outcomes), 8)
+
+    def test_inbox_serves_the_last_good_copy_while_open(self):
+        self.client.post('/api/requests/service-requests/', {'title': 'Request', 'role_name': 'Developer'}, format='json')
+        drain_process_starts()
+        fresh = self.client.get('/api/requests/service-requests/tasks/', {'group': 'procurement'})
+        self.assertNotIn('Warning', fresh)
+
+        invalidate_inboxes()
+        get_dependency('flowable').breaker._open()
+
+        stale = self.client.get('/api/requests/service-requests/tasks/', {'group': 'procurement'})
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale['Warning'], STALE_WARNING)
+        self.assertTrue(stale.data['stale'])
+        self.assertEqual(stale.data['tasks'], fresh.data['tasks'])
+
+        # No earlier copy for this group
+        response = self.client.get('/api/requests/service-offers/tasks/', {'group': 'suppliers'})
+        self.assertEqual(response.status_code, 503)
+
+
+class BenchWorkflowTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        fake = use_fake_flowable(FakeFlowable(seed=1))
+        self.fake = fake.__enter__()
+        self.addCleanup(fake.__exit__, None, None, None)
+
+    def test_lifecycles_complete_and_are_counted(self):
+        report = run_benchmark(InProcessDriver, tenants=2, concurrency=1, timeout=5)
+
+        self.assertEqual((report['completed'], report['errors']), (2, {}))
+        self.assertEqual(ServiceOrder.objects.count(), 2)
+        for name, step in report['steps'].items():
+            self.assertEqual((name, step['count'], step['errors']), (name, 2, 0))
+        self.assertGreater(report['steps']['award']['db_queries'], 0)
+        self.assertEqual(report['outbound_calls'], self.fake.call_count)
+
+
+class EndpointBudgetTests(EndpointBudgetMixin, TestCase):
+    router = service_requests_router
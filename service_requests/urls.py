@@ -1,6 +1,9 @@
+from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import ServiceRequestViewSet
 from .offer_views import ServiceOfferViewSet
+from . import async_views
 
 
 router = DefaultRouter()
@@ -8,3 +11,15 @@ router.register(r"service-requests", ServiceRequestViewSet, basename="service-re
 router.register(r"service-offers", ServiceOfferViewSet, basename="service-offers")
 
 urlpatterns = router.urls
+
+# Under ASGI, serve the Flowable-bound inbox endpoints from native async views
+# instead of the DRF actions (which hold a worker thread per round trip).
+async_urlpatterns = [
+    path("service-requests/tasks/", async_views.request_tasks),
+    path("service-requests/tasks/<str:task_id>/complete/", async_views.complete_request_task),
+    path("service-offers/tasks/", async_views.offer_tasks),
+    path("service-offers/tasks/<str:task_id>/complete/", async_views.complete_offer_task),
+]
+
+if settings.ASYNC_TASK_VIEWS:
+    urlpatterns = async_urlpatterns + urlpatterns
@@ -1,16 +1,39 @@
+from functools import partial
+
+from django.db import transaction
 from django.db.models import Count
 from django.conf import settings
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
 from .models import *
 from .serializers import *
+from .inbox import (
+    enrich_request_tasks,
+    inbox_headers,
+    inbox_page_params,
+    load_inbox,
+    third_party_request_payload,
+)
+from .outbox import (
+    enqueue_process_start,
+    enqueue_process_starts,
+    drain_process_starts,
+    process_start_status,
+)
+from .sync_jobs import enqueue_request_generate
+from .task_completion import complete_tasks_bulk
+from config.conditional import ConditionalGetMixin
+from config.dependencies import DependencyUnavailable
+from config.db import write_transaction
 from flowable_client import *
 
 
 class ServiceRequestViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
@@ -41,25 +64,99 @@ class ServiceRequestViewSet(
     def create(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        service_request = serializer.save()
 
-        try:
-            flowable_result = generate_request_task(request_id=str(service_request.id))
+        # The Flowable process is started by the outbox worker, not inline
+        with write_transaction():
+            service_request = serializer.save()
+            enqueue_process_start(service_request)
 
-            service_request.process_id = flowable_result['id']
-            service_request.save()
-            
-            return Response({
-                'message': 'Service Request and Task generated',
-                'service_request_id': str(service_request.id),
-                'status': service_request.status
-            }, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
+        return Response({
+            'message': 'Service Request created, task generation queued',
+            'service_request_id': str(service_request.id),
+            'status': service_request.status,
+            'process_status': ProcessStartStatus.PENDING,
+            'status_url': reverse(
+                'service-requests-process-status',
+                kwargs={'pk': service_request.pk},
+                request=request,
+            ),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Create many service requests at once and start their processes.
+
+        Valid items are inserted with one bulk_create; invalid ones are
+        reported and skipped. The Flowable processes are then started
+        concurrently through the outbox, so any start that fails here is
+        retried by the outbox worker.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
             return Response(
-                {'error': f'Failed to generate request: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Expected a non-empty list of service requests'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        if len(items) > settings.SERVICE_REQUEST_BULK_MAX:
+            return Response(
+                {'error': f'At most {settings.SERVICE_REQUEST_BULK_MAX} service requests per call'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=items, many=True)
+        errors = [{}] * len(items) if serializer.is_valid() else serializer.errors
+        valid = [index for index, item_errors in enumerate(errors) if not item_errors]
+
+        if len(valid) != len(items):
+            serializer = self.get_serializer(data=[items[index] for index in valid], many=True)
+            serializer.is_valid(raise_exception=True)
+
+        with write_transaction():
+            service_requests = ServiceRequest.objects.bulk_create(
+                [ServiceRequest(**data) for data in serializer.validated_data]
+            )
+            entries = enqueue_process_starts(service_requests)
+
+        started = {
+            entry.service_request_id: (process_id, error)
+            for entry, process_id, error in drain_process_starts(
+                ids=[entry.pk for entry in entries],
+                batch_size=len(entries),
+            )
+        }
+
+        results = [{'index': index, 'success': False, 'errors': item_errors} for index, item_errors in enumerate(errors)]
+        for index, service_request in zip(valid, service_requests):
+            process_id, error = started.get(service_request.id, (None, 'Not started yet'))
+            results[index] = {
+                'index': index,
+                'success': True,
+                'service_request_id': str(service_request.id),
+                'process_status': ProcessStartStatus.STARTED if process_id else ProcessStartStatus.PENDING,
+                'process_id': process_id,
+                'process_error': error,
+            }
+
+        all_started = len(valid) == len(items) and all(process_id for process_id, _ in started.values())
+
+        return Response({
+            'created': len(service_requests),
+            'started': sum(1 for process_id, _ in started.values() if process_id),
+            'failed': len(items) - len(valid),
+            'results': results,
+        }, status=status.HTTP_201_CREATED if all_started else status.HTTP_207_MULTI_STATUS)
+
+
+    @action(detail=True, methods=['get'], url_path='process-status')
+    def process_status(self, request, pk=None):
+        service_request = self.get_object()
+
+        return Response({
+            'service_request_id': str(service_request.id),
+            **process_start_status(service_request),
+        }, status=status.HTTP_200_OK)
 
 
     @action(detail=False, methods=['get'], url_path='tasks')
@@ -73,51 +170,22 @@ class ServiceRequestViewSet(
             }, status=status.HTTP_200_OK)
         
         try:
-            # Step 1: Get tasks from Flowable
-            flowable_tasks = get_tasks_by_group(group_id=group_id)
-            
-            # Step 2: Enrich with contract details from local database
-            tasks_with_request = []
+            paging = inbox_page_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # Get tasks from Flowable and enrich them from the local database
+            data = load_inbox(group_id=group_id, paging=paging, enrich=enrich_request_tasks)
             
-            for task in flowable_tasks:
-                request_id = task['variables'].get('request_id')
-                
-                if not request_id:
-                    continue
-                
-                try:
-                    # Get contract from database
-                    service_request = ServiceRequest.objects.get(id=request_id)
-                    
-                    task_data = {
-                        'task_id': task['task_id'],
-                        'task_name': task['task_name'],
-                        'created_time': task['created_time'],
-                        'service_request': {
-                            'id': service_request.id,
-                            'title': service_request.title,
-                            'role_name': service_request.role_name,
-                            'technology': service_request.technology,
-                            'specialization': service_request.specialization,
-                            'experience_level': service_request.experience_level,
-                            'start_date': service_request.start_date,
-                            'end_date': service_request.end_date,
-                            'expected_man_days': service_request.expected_man_days,
-                            'criteria_json': service_request.criteria_json,
-                            'task_description': service_request.task_description,
-                            'offer_deadline': service_request.offer_deadline,
-                        }
-                    }
-                    
-                    tasks_with_request.append(task_data)
-                    
-                except ServiceRequest.DoesNotExist:
-                    continue
-                        
-            return Response({
-                'count': len(tasks_with_request),
-                'tasks': tasks_with_request
-            }, status=status.HTTP_200_OK)
+            return Response(data, status=status.HTTP_200_OK, headers=inbox_headers(data))
+
+        except DependencyUnavailable as e:
+            # Flowable is being shed and there is no earlier copy to fall back on
+            return Response(
+                {'error': f'Failed to retrieve tasks: {str(e)}'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
             
         except Exception as e:
             return Response(
@@ -160,38 +228,18 @@ class ServiceRequestViewSet(
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        service_request.status = "OPEN"
-        service_request.save()
-
-        # generate service request in 3rd party app
-        if decision == "approved":
-            try:
-                third_party_api_url = f"{settings.THIRD_PARTY_API_BASE}/requests/service-requests/generate/"
-                payload = {
-                    "external_id": str(service_request.id),
-                    "title": service_request.title, 
-                    "role_name": service_request.role_name,
-                    "technology": service_request.technology,
-                    "specialization": service_request.specialization,
-                    "experience_level": service_request.experience_level,
-                    "start_date": service_request.start_date.isoformat(),
-                    "end_date": service_request.end_date.isoformat(),
-                    "expected_man_days": service_request.expected_man_days,
-                    "criteria_json": {
-                        "skills": service_request.criteria_json.get("skills", []),
-                        "certifications": service_request.criteria_json.get("certifications", []),
-                        "languages": service_request.criteria_json.get("languages", [])
-                    },
-                    "status": service_request.status,
-                    "task_description": service_request.task_description,
-                    "offer_deadline": service_request.offer_deadline.isoformat(),
-                    "word_mode": "Remote"
-                }
-                response = call_third_party_api(url=third_party_api_url, payload=payload)
-
-            except Exception as e:
-                print(f"Failed to call 3rd party API: {str(e)}")
-                raise Exception(f"Failed to update 3rd party API: {str(e)}")
+        # The partner push is delivered by the sync worker, not inline
+        with write_transaction():
+            service_request.status = "OPEN"
+            service_request.save()
+
+            # generate service request in 3rd party app
+            if decision == "approved":
+                enqueue_request_generate(service_request, third_party_request_payload(service_request))
+
+        # The process leaves (or re-enters) the offer wait state with this decision
+        if service_request.process_id:
+            invalidate_waiting_execution(process_instance_id=service_request.process_id)
 
         try:
             print("completing task.........")
@@ -209,7 +257,56 @@ class ServiceRequestViewSet(
         return Response({
             'message': f'Initial validation {decision} successfully',
         }, status=status.HTTP_200_OK)
-    
+
+    @action(detail=False, methods=['post'], url_path='tasks/complete-bulk')
+    def complete_tasks_bulk(self, request):
+        """
+        Complete many request validation tasks at once.
+
+        Takes a list of {task_id, decision}; returns one outcome per task.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Expected a non-empty list of {task_id, decision}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.TASK_COMPLETE_BULK_MAX:
+            return Response(
+                {'error': f'At most {settings.TASK_COMPLETE_BULK_MAX} tasks per call'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        def apply(service_request, decision):
+            service_request.status = "OPEN"
+            service_request.save()
+
+            # generate service request in 3rd party app
+            if decision == "approved":
+                enqueue_request_generate(service_request, third_party_request_payload(service_request))
+
+            # The process leaves (or re-enters) the offer wait state with this
+            # decision; forget the cached execution once the decision is stored
+            if service_request.process_id:
+                transaction.on_commit(
+                    partial(invalidate_waiting_execution, process_instance_id=service_request.process_id)
+                )
+
+        outcomes = complete_tasks_bulk(
+            items,
+            queryset=ServiceRequest.objects.all(),
+            variable='request_id',
+            label='request',
+            apply=apply,
+        )
+
+        completed = sum(1 for outcome in outcomes if outcome['success'])
+        return Response({
+            'completed': completed,
+            'failed': len(outcomes) - completed,
+            'results': outcomes,
+        }, status=status.HTTP_200_OK if completed == len(outcomes) else status.HTTP_207_MULTI_STATUS)
+
 
 class ProjectRequestViewSet(viewsets.ModelViewSet):
     queryset = ProjectRequest.objects.all()
@@ -218,4 +315,4 @@ class ProjectRequestViewSet(viewsets.ModelViewSet):
 
     # Ordering
     ordering_fields = ['created_at']
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at', '-id']
\ No newline at end of file